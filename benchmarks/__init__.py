@@ -0,0 +1,6 @@
+"""Benchmarks for bitml2mcmas.
+
+Each module is a script; run it from the repository root, e.g.:
+
+    python -m benchmarks.bench_parser
+"""
@@ -0,0 +1,80 @@
+"""Generators of synthetic BitML contracts for the benchmarks."""
+
+import string
+from collections.abc import Sequence
+
+
+def participant_names(nb_participants: int) -> Sequence[str]:
+    """Get the participant names "A", "B", ..., "Z", "A1", "B1", ..."""
+    letters = string.ascii_uppercase
+    return [
+        letters[i % len(letters)] + (str(i // len(letters)) if i >= len(letters) else "") for i in range(nb_participants)
+    ]
+
+
+def _header(participants: Sequence[str], deposit_amounts: Sequence[int], secret_ids: Sequence[str] = ()) -> str:
+    """Get the contract up to its preconditions; the secrets are committed by the first participant."""
+    lines = ["#lang bitml", ""]
+    lines.extend(f'(participant "{name}" "{i:02x}")' for i, name in enumerate(participants))
+    lines.append("")
+    lines.append("(contract")
+    lines.append("  (pre")
+    lines.extend(
+        f'    (deposit "{name}" {amount} "tx{name}@0")' for name, amount in zip(participants, deposit_amounts, strict=True)
+    )
+    lines.extend(f'    (secret "{participants[0]}" {secret_id} "{i:04x}")' for i, secret_id in enumerate(secret_ids))
+    lines.append("  )")
+    return "\n".join(lines)
+
+
+def split_contract(nb_branches: int) -> str:
+    """
+    Get a contract whose root is a split with the given number of branches.
+
+    Each branch is a choice between a withdraw and a timed withdraw, so the contract has 3 * nb_branches + 1 nodes.
+    """
+    participants = participant_names(2)
+    body = ["  (split"]
+    for i in range(nb_branches):
+        winner, loser = participants[i % 2], participants[(i + 1) % 2]
+        body.append(f'    (1 -> (choice (auth "{winner}" (withdraw "{winner}")) (after 10 (withdraw "{loser}"))))')
+    body.append("  )")
+    # the first participant pays for the whole contract
+    return _header(participants, [nb_branches, 0]) + "\n" + "\n".join(body) + "\n)\n"
+
+
+def deep_contract(depth: int) -> str:
+    """Get a contract made of a chain of nested 'after' expressions, with the given depth."""
+    participants = participant_names(2)
+    body = "(after 1 " * depth + f'(withdraw "{participants[0]}")' + ")" * depth
+    return _header(participants, [1, 0]) + "\n  " + body + "\n)\n"
+
+
+def reveal_chain_contract(depth: int) -> str:
+    """Get a contract made of a chain of nested 'reveal' expressions, with the given depth: each of them is a node."""
+    participants = participant_names(2)
+    body = "(reveal (a) " * depth + f'(withdraw "{participants[0]}")' + ")" * depth
+    return _header(participants, [1, 0], ["a"]) + "\n  " + body + "\n)\n"
+
+
+def participants_contract(nb_participants: int) -> str:
+    """Get a contract with the given number of participants, where each of them can take all the funds."""
+    participants = participant_names(nb_participants)
+    branches = " ".join(f'(auth "{name}" (withdraw "{name}"))' for name in participants)
+    return _header(participants, [1] * nb_participants) + f"\n  (choice {branches})\n)\n"
+
+
+def timelock_contract(timeouts: Sequence[int]) -> str:
+    """Get a contract with a choice between timed withdraws, one for each timeout, by alternating participants."""
+    participants = participant_names(2)
+    branches = " ".join(
+        f'(after {timeout} (withdraw "{participants[i % 2]}"))' for i, timeout in enumerate(timeouts)
+    )
+    return _header(participants, [1, 1]) + f"\n  (choice {branches})\n)\n"
+
+
+def wide_choice_contract(nb_branches: int) -> str:
+    """Get a contract with two participants, whose root is a choice between the given number of withdraws."""
+    participants = participant_names(2)
+    branches = " ".join(f'(withdraw "{participants[i % 2]}")' for i in range(nb_branches))
+    return _header(participants, [1, 0]) + f"\n  (choice {branches})\n)\n"
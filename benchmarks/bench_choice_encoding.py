@@ -0,0 +1,54 @@
+"""Benchmark of the encodings of the choices: size of the ISPL code, and time taken by MCMAS, by number of branches."""
+
+import argparse
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks._contracts import wide_choice_contract
+from bitml2mcmas.bitml.parser.parser import parse_contract
+from bitml2mcmas.compiler.core import ChoiceEncoding, Compiler
+from bitml2mcmas.mcmas.formula import AtomicFormula, DiamondEventuallyFormula
+from bitml2mcmas.mcmas.to_string import interpreted_system_to_string
+
+_FORMULA = DiamondEventuallyFormula("Participants", AtomicFormula("contract_is_initialized"))
+
+
+def _run_mcmas(mcmas: Path, ispl: str, timeout: float) -> str:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        ispl_file = Path(tmp_dir) / "system.ispl"
+        ispl_file.write_text(ispl)
+        start = time.perf_counter()
+        try:
+            subprocess.run([str(mcmas.resolve()), ispl_file], capture_output=True, check=True, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            return f"MCMAS timed out after {timeout}s"
+        return f"MCMAS {time.perf_counter() - start:.3f}s"
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--branches", type=int, nargs="+", default=[10, 50, 100])
+    arg_parser.add_argument("--mcmas", type=Path, default=None, help="if set, the path of the MCMAS binary to run")
+    arg_parser.add_argument("--mcmas-timeout", type=float, default=60.0)
+    args = arg_parser.parse_args()
+
+    for nb_branches in args.branches:
+        contract = parse_contract(wide_choice_contract(nb_branches))
+        for choice_encoding in ChoiceEncoding:
+            start = time.perf_counter()
+            system = Compiler(contract, [_FORMULA], choice_encoding=choice_encoding).compile()
+            elapsed = time.perf_counter() - start
+            ispl = interpreted_system_to_string(system)
+            line = (
+                f"{nb_branches:>4} branches, {choice_encoding.value:>13}: compilation {elapsed:.3f}s, "
+                f"ISPL {len(ispl)} chars"
+            )
+            if args.mcmas is not None:
+                line += ", " + _run_mcmas(args.mcmas, ispl, args.mcmas_timeout)
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""Benchmark of the compilation of a BitML contract into an MCMAS interpreted system."""
+
+import argparse
+import time
+
+from benchmarks._contracts import split_contract
+from bitml2mcmas.bitml.parser.parser import parse_contract
+from bitml2mcmas.compiler.core import Compiler
+from bitml2mcmas.mcmas.formula import AtomicFormula, DiamondEventuallyFormula
+
+_FORMULA = DiamondEventuallyFormula("Participants", AtomicFormula("contract_is_initialized"))
+
+_MODES = {
+    "validated": {},
+    "trusted": {"trusted_construction": True},
+    "trusted+final-pass": {"trusted_construction": True, "validate_output": True},
+    "interned": {"intern_nodes": True},
+}
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--branches", type=int, default=20, help="number of branches of the split contract")
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    contract = parse_contract(split_contract(args.branches))
+    for mode, options in _MODES.items():
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            Compiler(contract, [_FORMULA], **options).compile()
+            timings.append(time.perf_counter() - start)
+        print(f"{mode:>20}: best {min(timings):.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""Benchmark of the construction of validated boolean condition nodes."""
+
+import argparse
+import time
+
+from bitml2mcmas.mcmas.boolcond import AndBooleanCondition, EqualTo, IdAtom, IntAtom
+
+
+def build_conditions(nb_nodes: int) -> None:
+    """Build nb_nodes nodes, half EqualTo nodes and half AndBooleanCondition nodes."""
+    variable = IdAtom("x")
+    values = [IntAtom(i) for i in range(10)]
+    condition = EqualTo(variable, values[0])
+    for i in range(nb_nodes // 2):
+        condition = AndBooleanCondition(EqualTo(variable, values[i % 10]), condition)
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--nodes", type=int, default=1_000_000)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        build_conditions(args.nodes)
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    print(f"{args.nodes} nodes: best {best:.3f}s, {args.nodes / best / 1000:.1f}k nodes/s")
+
+
+if __name__ == "__main__":
+    main()
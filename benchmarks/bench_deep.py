@@ -0,0 +1,61 @@
+"""Benchmark of the passes over the BitML contracts on deep contracts, beyond the recursion limit."""
+
+import argparse
+import time
+from collections.abc import Callable
+
+from benchmarks._contracts import deep_contract, reveal_chain_contract
+from bitml2mcmas.bitml.core import BitMLContract
+from bitml2mcmas.bitml.parser.parser import BitMLParser, parse_contract
+from bitml2mcmas.bitml.to_string import to_string
+from bitml2mcmas.compiler._private.contract_graph import BitMLGraph
+from bitml2mcmas.compiler.check_supported import check_supported
+from bitml2mcmas.compiler.core import Compiler
+from bitml2mcmas.mcmas.formula import AtomicFormula, DiamondEventuallyFormula
+
+_FORMULA = DiamondEventuallyFormula("Participants", AtomicFormula("contract_is_initialized"))
+
+_CONTRACTS: dict[str, Callable[[int], str]] = {
+    # a single node, guarded by a chain of 'after' expressions
+    "after": deep_contract,
+    # a chain of nodes
+    "reveal": reveal_chain_contract,
+}
+
+
+def _timed(function: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--depths", type=int, nargs="+", default=[1000, 10000], help="depths of the contracts")
+    arg_parser.add_argument("--contracts", nargs="+", choices=list(_CONTRACTS), default=list(_CONTRACTS))
+    arg_parser.add_argument("--compile", action="store_true", help="also time the whole compilation")
+    args = arg_parser.parse_args()
+
+    inline_parser = BitMLParser(inline_transform=True)
+    for name in args.contracts:
+        for depth in args.depths:
+            text = _CONTRACTS[name](depth)
+            contract = parse_contract(text)
+            timings = {
+                "parse": _timed(lambda: parse_contract(text)),
+                "parse inline": _timed(lambda: inline_parser(text)),
+                "validation": _timed(
+                    lambda: BitMLContract(contract.participants, contract.preconditions, contract.contract_root)
+                ),
+                "check_supported": _timed(lambda: check_supported(contract)),
+                "graph": _timed(lambda: BitMLGraph(contract)),
+                "to_string": _timed(lambda: to_string(contract)),
+            }
+            if args.compile:
+                timings["compile"] = _timed(lambda: Compiler(contract, [_FORMULA]).compile())
+            line = ", ".join(f"{key} {value:.3f}s" for key, value in timings.items())
+            print(f"{name:>6} depth {depth:>6}: {line}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Benchmark of the contract graph: build time, memory, and time of a traversal, by number of nodes."""
+
+import argparse
+import time
+import tracemalloc
+
+from benchmarks._contracts import split_contract
+from bitml2mcmas.bitml.parser.parser import parse_contract
+from bitml2mcmas.compiler._private.contract_graph import BitMLGraph
+
+
+def _traverse(graph: BitMLGraph) -> int:
+    """Visit the data of every node, as the compilation does."""
+    total = 0
+    for node in graph.nodes:
+        total += len(node.auths) + len(node.afters) + int(node.funds) + len(node.full_node_id)
+        if not node.is_leaf_node:
+            total += len(node.children)
+        if node.parent is not None:
+            total += 1
+    return total
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--branches", type=int, nargs="+", default=[1000, 10000], help="branches of the split")
+    args = arg_parser.parse_args()
+
+    for nb_branches in args.branches:
+        contract = parse_contract(split_contract(nb_branches))
+
+        start = time.perf_counter()
+        BitMLGraph(contract)
+        build_time = time.perf_counter() - start
+
+        # the memory is measured on another build, since the tracing slows it down
+        tracemalloc.start()
+        graph = BitMLGraph(contract)
+        memory, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        start = time.perf_counter()
+        _traverse(graph)
+        traversal_time = time.perf_counter() - start
+        print(
+            f"{len(graph.nodes):>7} nodes: build {build_time:.3f}s, {memory / len(graph.nodes):.0f} bytes per node, "
+            f"traversal {traversal_time:.3f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""Benchmark of the generation of the groups: compilation time and size of the ISPL code, by number of participants."""
+
+import argparse
+import time
+
+from benchmarks._contracts import participants_contract
+from bitml2mcmas.bitml.parser.parser import parse_contract
+from bitml2mcmas.compiler.core import Compiler
+from bitml2mcmas.mcmas.formula import AtomicFormula, DiamondEventuallyFormula
+from bitml2mcmas.mcmas.to_string import interpreted_system_to_string
+
+_FORMULAE = [
+    DiamondEventuallyFormula("Participants", AtomicFormula("contract_is_initialized")),
+    DiamondEventuallyFormula("Agent_A__Agent_B", AtomicFormula("contract_is_initialized")),
+]
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--participants", type=int, nargs="+", default=[4, 8, 12, 16])
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    for nb_participants in args.participants:
+        contract = parse_contract(participants_contract(nb_participants))
+        for all_coalitions in (False, True):
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                system = Compiler(contract, _FORMULAE, all_coalitions=all_coalitions).compile()
+                timings.append(time.perf_counter() - start)
+            ispl = interpreted_system_to_string(system)
+            mode = "all coalitions" if all_coalitions else "used coalitions"
+            print(
+                f"{nb_participants:>3} participants, {mode:>15}: {len(system.groups)} groups, "
+                f"compilation {min(timings):.3f}s, ISPL {len(ispl)} chars"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Benchmark of hashing and comparing boolean conditions, and of compiling large contracts."""
+
+import argparse
+import operator
+import sys
+import time
+from functools import reduce
+
+from benchmarks._contracts import split_contract
+from bitml2mcmas.bitml.parser.parser import parse_contract
+from bitml2mcmas.compiler.core import Compiler
+from bitml2mcmas.mcmas.boolcond import EnvironmentIdAtom, EqualTo, IdAtom
+from bitml2mcmas.mcmas.formula import AtomicFormula, DiamondEventuallyFormula
+
+_FORMULA = DiamondEventuallyFormula("Participants", AtomicFormula("contract_is_initialized"))
+
+
+def _time(func) -> float:  # type: ignore[no-untyped-def]
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def hash_conjunctions(nb_clauses: int) -> None:
+    """Use every prefix of a conjunction of nb_clauses clauses as a dictionary key, and look it up again."""
+    clauses = [EqualTo(EnvironmentIdAtom(f"status_{i}"), IdAtom("executed")) for i in range(nb_clauses)]
+    conjunctions = []
+    conjunction = clauses[0]
+    for clause in clauses[1:]:
+        conjunction = conjunction & clause
+        conjunctions.append(conjunction)
+    index = {conjunction: i for i, conjunction in enumerate(conjunctions)}
+    assert all(index[conjunction] == i for i, conjunction in enumerate(conjunctions))
+    # equal but distinct objects
+    assert reduce(operator.and_, clauses) == conjunctions[-1]
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--clauses", type=int, default=2000)
+    arg_parser.add_argument("--branches", type=int, default=250, help="split contract with 4 * branches + 1 nodes")
+    args = arg_parser.parse_args()
+    # the validators still recurse on the long conjunctions of large contracts
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 20_000))
+
+    elapsed = _time(lambda: hash_conjunctions(args.clauses))
+    print(f"{args.clauses} clauses, hash all the prefixes: {elapsed:.3f}s")
+
+    contract = parse_contract(split_contract(args.branches))
+    elapsed = _time(lambda: Compiler(contract, [_FORMULA]).compile())
+    print(f"split contract with {4 * args.branches + 1} nodes, compile: {elapsed:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
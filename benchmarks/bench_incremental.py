@@ -0,0 +1,38 @@
+"""Benchmark of the incremental parser against a full re-parse, on an edit of one branch."""
+
+import argparse
+import timeit
+
+from benchmarks._contracts import split_contract
+from bitml2mcmas.bitml.parser.incremental import IncrementalBitMLParser
+from bitml2mcmas.bitml.parser.parser import BitMLParser
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--branches", type=int, nargs="+", default=[10, 100, 1000])
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    args = arg_parser.parse_args()
+
+    full_parser = BitMLParser()
+    print(f"{'branches':>10} {'full (ms)':>12} {'incremental (ms)':>18}")
+    for nb_branches in args.branches:
+        text = split_contract(nb_branches)
+        incremental_parser = IncrementalBitMLParser(text)
+        # edit the participant of a withdraw in the middle of the contract, back and forth
+        start = text.index('(withdraw "A")', len(text) // 2) + len("(withdraw ")
+        replacements = iter(['"B"', '"A"'] * args.repeat)
+
+        full_time = min(timeit.repeat(lambda: full_parser(text), number=1, repeat=args.repeat))
+        incremental_time = min(
+            timeit.repeat(
+                lambda: incremental_parser.edit(start, start + 3, next(replacements)),
+                number=1,
+                repeat=args.repeat,
+            )
+        )
+        print(f"{nb_branches:>10} {full_time * 1000:>12.2f} {incremental_time * 1000:>18.2f}")
+
+
+if __name__ == "__main__":
+    main()
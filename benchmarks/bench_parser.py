@@ -0,0 +1,30 @@
+"""Benchmark of the two-pass parser against the inline-transform parser."""
+
+import argparse
+import timeit
+
+from benchmarks._contracts import split_contract
+from bitml2mcmas.bitml.parser.parser import BitMLParser
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--branches", type=int, nargs="+", default=[10, 100, 1000])
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    args = arg_parser.parse_args()
+
+    parsers = {
+        "two-pass": BitMLParser(),
+        "inline": BitMLParser(inline_transform=True),
+    }
+    print(f"{'branches':>10} {'parser':>10} {'best (ms)':>12}")
+    for nb_branches in args.branches:
+        text = split_contract(nb_branches)
+        for name, parser in parsers.items():
+            parser(text)  # warm-up
+            best = min(timeit.repeat(lambda: parser(text), number=1, repeat=args.repeat))  # noqa: B023
+            print(f"{nb_branches:>10} {name:>10} {best * 1000:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""Profile the stages of the compilation of a contract, and optionally export the profile."""
+
+import argparse
+from pathlib import Path
+
+from benchmarks._contracts import participants_contract
+from bitml2mcmas.bitml.parser.parser import parse_contract
+from bitml2mcmas.compiler.core import Compiler
+from bitml2mcmas.mcmas.formula import AtomicFormula, DiamondEventuallyFormula
+
+_FORMULA = DiamondEventuallyFormula("Participants", AtomicFormula("contract_is_initialized"))
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--contract", type=Path, default=None, help="contract file; by default, a generated one")
+    arg_parser.add_argument("--participants", type=int, default=8, help="participants of the generated contract")
+    arg_parser.add_argument("--optimize", action="store_true", help="also simplify the compiled system")
+    arg_parser.add_argument("--json", type=Path, default=None, help="if set, the file where to write the profile")
+    arg_parser.add_argument("--trace", type=Path, default=None, help="if set, the file where to write a Chrome trace")
+    args = arg_parser.parse_args()
+
+    if args.contract is not None:
+        contract = parse_contract(args.contract.read_text())
+    else:
+        contract = parse_contract(participants_contract(args.participants))
+
+    compiler = Compiler(contract, [_FORMULA], optimize=args.optimize, profile=True)
+    compiler.compile()
+    report = compiler.profile_report
+    print(report)
+    if args.json is not None:
+        args.json.write_text(report.to_json())
+    if args.trace is not None:
+        args.trace.write_text(report.to_chrome_trace())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Report of the bits saved by the tight ranges of the integer variables, for each contract."""
+
+import argparse
+from pathlib import Path
+
+from bitml2mcmas.bitml.parser.parser import parse_contract
+from bitml2mcmas.compiler.core import Compiler
+from bitml2mcmas.mcmas.ast import IntegerRangeVarType, InterpretedSystem
+from bitml2mcmas.mcmas.formula import AtomicFormula, DiamondEventuallyFormula
+
+_FORMULA = DiamondEventuallyFormula("Participants", AtomicFormula("contract_is_initialized"))
+
+_DEFAULT_CONTRACTS_DIR = Path(__file__).parent.parent / "tests" / "bitml_contracts"
+
+
+def _get_bits(system: InterpretedSystem) -> int:
+    var_definitions = [*system.environment.obs_var_definitions, *(system.environment.env_var_definitions or ())]
+    return sum(
+        (var_definition.vartype.upper - var_definition.vartype.lower).bit_length()
+        for var_definition in var_definitions
+        if isinstance(var_definition.vartype, IntegerRangeVarType)
+    )
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("contracts", type=Path, nargs="*", help="contract files; by default, the test contracts")
+    args = arg_parser.parse_args()
+
+    contract_files = args.contracts or sorted(_DEFAULT_CONTRACTS_DIR.rglob("*.rkt"))
+    total_bits, total_tight_bits = 0, 0
+    for contract_file in contract_files:
+        name = f"{contract_file.parent.name}/{contract_file.name}"
+        try:
+            contract = parse_contract(contract_file.read_text())
+            bits = _get_bits(Compiler(contract, [_FORMULA]).compile())
+        except Exception as e:
+            print(f"{name}: skipped ({e.__class__.__name__})")
+            continue
+        tight_bits = _get_bits(Compiler(contract, [_FORMULA], tight_ranges=True).compile())
+        total_bits += bits
+        total_tight_bits += tight_bits
+        print(f"{name}: {bits} -> {tight_bits} bits, {bits - tight_bits} saved")
+    print(f"total: {total_bits} -> {total_tight_bits} bits, {total_bits - total_tight_bits} saved")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Benchmark of the serialization of an MCMAS interpreted system into ISPL code."""
+
+import argparse
+import os
+import time
+import tracemalloc
+from typing import TextIO
+
+from benchmarks._contracts import participants_contract, split_contract
+from bitml2mcmas.bitml.parser.parser import parse_contract
+from bitml2mcmas.compiler.core import Compiler
+from bitml2mcmas.mcmas.ast import InterpretedSystem
+from bitml2mcmas.mcmas.formula import AtomicFormula, DiamondEventuallyFormula
+from bitml2mcmas.mcmas.to_string import (
+    SerializationMemo,
+    interpreted_system_to_stream,
+    interpreted_system_to_string,
+)
+
+_FORMULA = DiamondEventuallyFormula("Participants", AtomicFormula("contract_is_initialized"))
+
+
+def _write_string(system: InterpretedSystem, fileobj: TextIO) -> SerializationMemo | None:
+    fileobj.write(interpreted_system_to_string(system))
+    return None
+
+
+def _write_string_with_memo(system: InterpretedSystem, fileobj: TextIO) -> SerializationMemo | None:
+    memo = SerializationMemo()
+    fileobj.write(interpreted_system_to_string(system, memo))
+    return memo
+
+
+def _write_stream(system: InterpretedSystem, fileobj: TextIO) -> SerializationMemo | None:
+    interpreted_system_to_stream(system, fileobj)
+    return None
+
+
+def _write_stream_with_memo(system: InterpretedSystem, fileobj: TextIO) -> SerializationMemo | None:
+    memo = SerializationMemo()
+    interpreted_system_to_stream(system, fileobj, memo)
+    return memo
+
+
+_WRITERS = {
+    "string": _write_string,
+    "string+memo": _write_string_with_memo,
+    "stream": _write_stream,
+    "stream+memo": _write_stream_with_memo,
+}
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--branches", type=int, default=100, help="number of branches of the split contract")
+    arg_parser.add_argument(
+        "--participants", type=int, default=None, help="if set, use a contract with this number of participants"
+    )
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    if args.participants is not None:
+        contract = parse_contract(participants_contract(args.participants))
+    else:
+        contract = parse_contract(split_contract(args.branches))
+    systems = {
+        "compiled": Compiler(contract, [_FORMULA]).compile(),
+        "interned": Compiler(contract, [_FORMULA], intern_nodes=True).compile(),
+    }
+    for system_name, system in systems.items():
+        for name, writer in _WRITERS.items():
+            timings = []
+            for _ in range(args.repeat):
+                with open(os.devnull, "w") as fileobj:
+                    start = time.perf_counter()
+                    memo = writer(system, fileobj)
+                    timings.append(time.perf_counter() - start)
+
+            with open(os.devnull, "w") as fileobj:
+                tracemalloc.start()
+                writer(system, fileobj)
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+            hit_rate = f", memo hit rate {memo.hit_rate:.0%}" if memo is not None else ""
+            print(
+                f"{system_name:>8} {name:>11}: best {min(timings):.3f}s, peak memory {peak / 1024:.0f} KiB{hit_rate}"
+            )
+
+
+if __name__ == "__main__":
+    main()
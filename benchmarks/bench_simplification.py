@@ -0,0 +1,71 @@
+"""Benchmark of the optimizations of the compiled systems: size of the ISPL code, and time taken by MCMAS."""
+
+import argparse
+import re
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks._contracts import participants_contract
+from bitml2mcmas.bitml.parser.parser import parse_contract
+from bitml2mcmas.compiler.core import Compiler
+from bitml2mcmas.mcmas.formula import AtomicFormula, DiamondEventuallyFormula
+from bitml2mcmas.mcmas.to_string import interpreted_system_to_string
+
+_FORMULA = DiamondEventuallyFormula("Participants", AtomicFormula("contract_is_initialized"))
+
+_CONFIGURATIONS = {
+    "compiled": dict(),
+    "optimized": dict(optimize=True),
+    "reduced": dict(cone_of_influence=True),
+    "both": dict(optimize=True, cone_of_influence=True),
+}
+
+_BDD_MEMORY_REGEX = re.compile(r"BDD memory in use = (\d+)")
+
+
+def _run_mcmas(mcmas: Path, ispl: str) -> tuple[float, str]:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        ispl_file = Path(tmp_dir) / "system.ispl"
+        ispl_file.write_text(ispl)
+        start = time.perf_counter()
+        completed = subprocess.run([str(mcmas.resolve()), ispl_file], capture_output=True, text=True, check=True)
+        elapsed = time.perf_counter() - start
+    match = _BDD_MEMORY_REGEX.search(completed.stdout)
+    return elapsed, f", BDD memory {int(match.group(1)) // 1024} KiB" if match is not None else ""
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--contract", type=Path, default=None, help="contract file; by default, a generated one")
+    arg_parser.add_argument("--participants", type=int, default=3, help="participants of the generated contract")
+    arg_parser.add_argument("--mcmas", type=Path, default=None, help="if set, the path of the MCMAS binary to run")
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    if args.contract is not None:
+        contract = parse_contract(args.contract.read_text())
+    else:
+        contract = parse_contract(participants_contract(args.participants))
+
+    for name, compiler_kwargs in _CONFIGURATIONS.items():
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            system = Compiler(contract, [_FORMULA], **compiler_kwargs).compile()
+            timings.append(time.perf_counter() - start)
+        ispl = interpreted_system_to_string(system)
+        line = f"{name:>9}: compilation {min(timings):.3f}s, ISPL {len(ispl)} chars"
+
+        if args.mcmas is not None:
+            mcmas_timings = []
+            for _ in range(args.repeat):
+                elapsed, bdd_memory = _run_mcmas(args.mcmas, ispl)
+                mcmas_timings.append(elapsed)
+            line += f", MCMAS {min(mcmas_timings):.3f}s{bdd_memory}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Benchmark of the encodings of the time: size of the ISPL code, and time taken by MCMAS."""
+
+import argparse
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks._contracts import timelock_contract
+from bitml2mcmas.bitml.parser.parser import parse_contract
+from bitml2mcmas.compiler.core import Compiler, TimeEncoding
+from bitml2mcmas.mcmas.ast import IntegerRangeVarType
+from bitml2mcmas.mcmas.formula import AtomicFormula, DiamondEventuallyFormula
+from bitml2mcmas.mcmas.to_string import interpreted_system_to_string
+
+_FORMULA = DiamondEventuallyFormula("Participants", AtomicFormula("time_reaches_maximum"))
+
+
+def _run_mcmas(mcmas: Path, ispl: str, timeout: float) -> str:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        ispl_file = Path(tmp_dir) / "system.ispl"
+        ispl_file.write_text(ispl)
+        start = time.perf_counter()
+        try:
+            subprocess.run([str(mcmas.resolve()), ispl_file], capture_output=True, check=True, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            return f"MCMAS timed out after {timeout}s"
+        return f"MCMAS {time.perf_counter() - start:.3f}s"
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--timeouts", type=int, nargs="+", default=[10, 100, 1000], help="timeouts of the contract")
+    arg_parser.add_argument("--mcmas", type=Path, default=None, help="if set, the path of the MCMAS binary to run")
+    arg_parser.add_argument("--mcmas-timeout", type=float, default=60.0)
+    args = arg_parser.parse_args()
+
+    contract = parse_contract(timelock_contract(args.timeouts))
+    for time_encoding in TimeEncoding:
+        start = time.perf_counter()
+        system = Compiler(contract, [_FORMULA], time_encoding=time_encoding).compile()
+        elapsed = time.perf_counter() - start
+        time_type = next(
+            var_definition.vartype
+            for var_definition in system.environment.obs_var_definitions
+            if var_definition.varname == "time"
+        )
+        assert isinstance(time_type, IntegerRangeVarType)
+        ispl = interpreted_system_to_string(system)
+        bits = (time_type.upper - time_type.lower).bit_length()
+        line = f"{time_encoding.value:>8}: compilation {elapsed:.3f}s, time {bits} bits, ISPL {len(ispl)} chars"
+        if args.mcmas is not None:
+            line += ", " + _run_mcmas(args.mcmas, ispl, args.mcmas_timeout)
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
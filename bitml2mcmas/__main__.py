@@ -0,0 +1,7 @@
+"""Entry point for 'python -m bitml2mcmas'."""
+
+import sys
+
+from bitml2mcmas.cli import main
+
+sys.exit(main())
@@ -16,12 +16,14 @@ class BitMLContract:
         participants: Sequence[BitMLParticipant],
         preconditions: Sequence[BitMLPreconditionExpression],
         contract: BitMLExpression,
+        check_validity: bool = True,
     ) -> None:
         self.__participants = participants
         self.__preconditions = preconditions
         self.__contract_root = contract
 
-        self._check_validity()
+        if check_validity:
+            self._check_validity()
 
     @property
     def participants(self) -> Sequence[BitMLParticipant]:
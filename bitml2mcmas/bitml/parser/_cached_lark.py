@@ -1,20 +1,96 @@
 """Cache for Lark object."""
 
+import hashlib
+import os
+import sys
+import threading
+from pathlib import Path
 from typing import Any
 
+import lark
 from lark import Lark
 
+_CACHE_DIR_ENV_VAR = "BITML2MCMAS_CACHE_DIR"
+
+# Lark options that cannot be part of the cache key (same as Lark's own list)
+_UNHASHABLE_OPTIONS = frozenset({"transformer", "postlex", "lexer_callbacks", "edit_terminals", "_plugins"})
+
+
+def get_user_cache_dir() -> Path:
+    """
+    Get the directory where bitml2mcmas stores its cache files.
+
+    The location can be overridden with the BITML2MCMAS_CACHE_DIR environment variable.
+
+    :return: the path to the user cache directory
+    """
+    override = os.environ.get(_CACHE_DIR_ENV_VAR)
+    if override:
+        return Path(override)
+
+    if sys.platform == "win32":
+        base_dir = Path(os.environ.get("LOCALAPPDATA") or Path.home() / "AppData" / "Local")
+    elif sys.platform == "darwin":
+        base_dir = Path.home() / "Library" / "Caches"
+    else:
+        base_dir = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
+    return base_dir / "bitml2mcmas"
+
+
+def get_grammar_cache_file(grammar: str, cache_dir: Path, **options: Any) -> Path | None:
+    """
+    Get the path of the cache file for the serialized parser of a grammar.
+
+    The file name is derived from a hash of the grammar content, of the Lark options and of the Lark version, so a
+    change in any of them points to a different file.
+
+    :param grammar: the grammar text
+    :param cache_dir: the directory that contains the cache files
+    :param options: the options passed to the Lark constructor
+    :return: the path to the cache file, or None if the cache directory is not usable
+    """
+    options_str = "".join(f"{key}={options[key]!r};" for key in sorted(options) if key not in _UNHASHABLE_OPTIONS)
+    key_str = f"{grammar}\0{options_str}\0{lark.__version__}\0{sys.version_info[:2]}"
+    digest = hashlib.sha256(key_str.encode("utf-8")).hexdigest()
+
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+    except OSError:
+        return None
+    return cache_dir / f"lark-{digest[:32]}.cache"
+
 
 class CachedLark:
-    def __init__(self, *args: Any, **kwargs: Any) -> None:
+    def __init__(self, *args: Any, cache_dir: Path | None = None, **kwargs: Any) -> None:
+        """
+        Initialize the cached Lark object.
+
+        :param args: the positional arguments of the Lark constructor
+        :param cache_dir: if not None, the directory where to store the serialized parser across processes
+        :param kwargs: the keyword arguments of the Lark constructor
+        """
         self._args = args
         self._kwargs = kwargs
+        self._cache_dir = cache_dir
 
         self._cached_lark: Lark | None = None
+        self._lock = threading.Lock()
+
+    def _get_lark_kwargs(self) -> dict[str, Any]:
+        kwargs = dict(self._kwargs)
+        if self._cache_dir is None or not self._args or not isinstance(self._args[0], str):
+            return kwargs
+
+        cache_file = get_grammar_cache_file(self._args[0], self._cache_dir, **self._kwargs)
+        if cache_file is not None:
+            kwargs["cache"] = str(cache_file)
+        return kwargs
 
     def get_parser(self, force_reload: bool = False) -> Lark:
         if force_reload or self._cached_lark is None:
-            self._cached_lark = Lark(*self._args, **self._kwargs)
+            with self._lock:
+                if force_reload or self._cached_lark is None:
+                    self._cached_lark = Lark(*self._args, **self._get_lark_kwargs())
 
         return self._cached_lark
 
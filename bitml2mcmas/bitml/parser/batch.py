@@ -0,0 +1,89 @@
+"""Parse many BitML contracts in parallel."""
+
+import dataclasses
+import os
+from collections.abc import Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from pathlib import Path
+
+from lark.exceptions import VisitError
+
+from bitml2mcmas.bitml.core import BitMLContract
+from bitml2mcmas.bitml.parser.parser import get_shared_parser, parse_contract
+
+# number of files submitted to the pool, per worker, before waiting for results
+_TASKS_PER_WORKER = 4
+
+
+@dataclasses.dataclass(frozen=True)
+class ParseResult:
+    """The outcome of parsing one contract file."""
+
+    path: Path
+    contract: BitMLContract | None = None
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def parse_file(path: Path) -> ParseResult:
+    """
+    Parse a contract file with the shared parser.
+
+    Errors are not raised, but returned in the result.
+
+    :param path: the path to the contract file
+    :return: the parse result
+    """
+    try:
+        contract = parse_contract(path.read_text())
+    except Exception as e:
+        if isinstance(e, VisitError):
+            e = e.orig_exc
+        return ParseResult(path, error=f"{type(e).__name__}: {e}")
+    return ParseResult(path, contract=contract)
+
+
+def _init_worker() -> None:
+    get_shared_parser()
+
+
+def parse_many(paths: Iterable[Path | str], jobs: int | None = None) -> Iterator[ParseResult]:
+    """
+    Parse many contract files, yielding the results as soon as they are ready.
+
+    The files are parsed by a pool of processes, each holding a warm parser; with jobs=1, they are parsed in the
+    current process. An error in one file does not stop the batch: it is reported in the result of that file.
+    When more than one job is used, the results are yielded in completion order.
+
+    :param paths: the paths to the contract files
+    :param jobs: the number of worker processes; if None, the number of CPUs
+    :return: an iterator over the parse results
+    """
+    paths_iter = (Path(path) for path in paths)
+    nb_jobs = jobs if jobs is not None else (os.cpu_count() or 1)
+    if nb_jobs < 1:
+        raise ValueError(f"the number of jobs must be positive, got {nb_jobs}")
+
+    if nb_jobs == 1:
+        yield from map(parse_file, paths_iter)
+        return
+
+    with ProcessPoolExecutor(max_workers=nb_jobs, initializer=_init_worker) as executor:
+        pending: set[Future[ParseResult]] = set()
+        max_pending = nb_jobs * _TASKS_PER_WORKER
+        exhausted = False
+        while not exhausted or pending:
+            while not exhausted and len(pending) < max_pending:
+                path = next(paths_iter, None)
+                if path is None:
+                    exhausted = True
+                    break
+                pending.add(executor.submit(parse_file, path))
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
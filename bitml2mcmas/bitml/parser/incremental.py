@@ -0,0 +1,315 @@
+"""Incremental parsing of BitML contracts.
+
+The incremental parser keeps, for every contract expression, the span of text it was parsed from. When the text is
+edited, only the smallest contract expression that encloses the edit is re-parsed and re-validated; the other
+expressions of the contract are reused as they are.
+"""
+
+import dataclasses
+from collections.abc import Sequence
+
+from lark import Tree
+from lark.exceptions import LarkError
+
+from bitml2mcmas.bitml.ast import (
+    BitMLAuthorizationExpression,
+    BitMLChoiceExpression,
+    BitMLExpression,
+    BitMLPutExpression,
+    BitMLPutRevealExpression,
+    BitMLPutRevealIfExpression,
+    BitMLSplitExpression,
+    BitMLWithdrawExpression,
+)
+from bitml2mcmas.bitml.core import BitMLContract
+from bitml2mcmas.bitml.parser._cached_lark import CachedLark, get_user_cache_dir
+from bitml2mcmas.bitml.parser.parser import BitMLParser, BitMLTransformer
+from bitml2mcmas.bitml.validation import BitMLContractValidator, _BitMLFundsCheck
+from bitml2mcmas.helpers.misc import assert_
+
+_START = "start"
+_CONTRACT_EXPR = "contract_expr"
+_CONTRACT_BRANCH_EXPR = "contract_branch_expr"
+
+_EXPRESSION_RULES = frozenset(
+    {
+        "withdraw_expr",
+        "after_expr",
+        "choice_expr",
+        "authorization_expr",
+        "split_expr",
+        "put_expr",
+        "put_reveal_expr",
+        "put_reveal_if_expr",
+        "reveal_if_expr",
+        "reveal_expr",
+    }
+)
+
+# the start symbol that parses the children of an expression, by grammar rule
+_CHILD_START_SYMBOLS = {
+    "after_expr": _CONTRACT_BRANCH_EXPR,
+    "choice_expr": _CONTRACT_BRANCH_EXPR,
+    "authorization_expr": _CONTRACT_BRANCH_EXPR,
+}
+
+
+@dataclasses.dataclass(eq=False)
+class _Span:
+    """The text span of a contract expression, with the spans of its children contract expressions."""
+
+    # offset of the span with respect to the start of the parent span (or of the text, for the root span)
+    offset: int
+    length: int
+    start_symbol: str
+    # number of participant ids in an 'auth' expression, i.e. the number of nested authorization nodes in the AST
+    nb_auth_levels: int
+    children: list["_Span"]
+
+
+def _get_children_trees(tree: Tree) -> list[Tree]:
+    if tree.data == "split_expr":
+        return [
+            child
+            for split_branch in tree.children
+            if isinstance(split_branch, Tree)
+            for child in split_branch.children
+            if isinstance(child, Tree) and child.data in _EXPRESSION_RULES
+        ]
+    return [child for child in tree.children if isinstance(child, Tree) and child.data in _EXPRESSION_RULES]
+
+
+def _build_span(root_tree: Tree, start_symbol: str, base_offset: int) -> _Span:
+    """Build the span tree of a parse tree; base_offset is the position of the parsed text in the whole text."""
+    root_span = _Span(base_offset + root_tree.meta.start_pos, 0, start_symbol, 0, [])
+    stack: list[tuple[Tree, _Span, int]] = [(root_tree, root_span, base_offset + root_tree.meta.start_pos)]
+    while stack:
+        tree, span, absolute_start = stack.pop()
+        span.length = tree.meta.end_pos - tree.meta.start_pos
+        if tree.data == "authorization_expr":
+            span.nb_auth_levels = sum(
+                1 for child in tree.children if isinstance(child, Tree) and child.data == "participant_id"
+            )
+        child_start_symbol = _CHILD_START_SYMBOLS.get(str(tree.data), _CONTRACT_EXPR)
+        for child_tree in _get_children_trees(tree):
+            child_absolute_start = base_offset + child_tree.meta.start_pos
+            child_span = _Span(child_absolute_start - absolute_start, 0, child_start_symbol, 0, [])
+            span.children.append(child_span)
+            stack.append((child_tree, child_span, child_absolute_start))
+    return root_span
+
+
+def _get_children(expr: BitMLExpression, span: _Span) -> Sequence[BitMLExpression]:
+    match expr:
+        case BitMLWithdrawExpression():
+            return ()
+        case BitMLChoiceExpression():
+            return expr.choices
+        case BitMLSplitExpression():
+            return tuple(split_branch.branch for split_branch in expr.branches)
+        case BitMLAuthorizationExpression():
+            for _ in range(span.nb_auth_levels - 1):
+                expr = expr.branch
+            return (expr.branch,)
+        case _:
+            return (expr.branch,)
+
+
+def _replace_child(expr: BitMLExpression, span: _Span, index: int, new_child: BitMLExpression) -> BitMLExpression:
+    match expr:
+        case BitMLChoiceExpression():
+            choices = list(expr.choices)
+            choices[index] = new_child
+            return dataclasses.replace(expr, choices=tuple(choices))
+        case BitMLSplitExpression():
+            branches = list(expr.branches)
+            branches[index] = dataclasses.replace(branches[index], branch=new_child)
+            return dataclasses.replace(expr, branches=tuple(branches))
+        case BitMLAuthorizationExpression():
+            auth_nodes = [expr]
+            for _ in range(span.nb_auth_levels - 1):
+                auth_nodes.append(auth_nodes[-1].branch)
+            result = new_child
+            for auth_node in reversed(auth_nodes):
+                result = dataclasses.replace(auth_node, branch=result)
+            return result
+        case _:
+            assert_(index == 0, f"expected only one child, got index {index}")
+            return dataclasses.replace(expr, branch=new_child)
+
+
+def _get_child_state(
+    expr: BitMLExpression, index: int, state: _BitMLFundsCheck._State
+) -> _BitMLFundsCheck._State:
+    match expr:
+        case BitMLSplitExpression():
+            return state.set_funds(expr.branches[index].amount)
+        case BitMLPutExpression() | BitMLPutRevealExpression() | BitMLPutRevealIfExpression():
+            return _BitMLFundsCheck.spend_volatile_deposits(expr.deposit_ids, state)
+        case _:
+            return state
+
+
+class IncrementalBitMLParser:
+    """
+    Parser that keeps a BitML contract in sync with the edits of its text.
+
+    Edits that fall inside the contract body re-parse and re-validate only the smallest contract expression that
+    encloses them; all the other expressions are reused. Any other edit (e.g. to the participants or to the
+    preconditions) re-parses the whole text.
+    """
+
+    def __init__(self, text: str, use_cache: bool = True) -> None:
+        """
+        Initialize the parser, and parse the text.
+
+        :param text: the contract text
+        :param use_cache: if True, the compiled parse table is stored in (and loaded from) the user cache directory
+        """
+        self.__cached_parser = CachedLark(
+            BitMLParser._read_main_grammar(),
+            parser="lalr",
+            import_paths=[BitMLParser._get_grammars_dir()],
+            propagate_positions=True,
+            start=[_START, _CONTRACT_EXPR, _CONTRACT_BRANCH_EXPR],
+            cache_dir=get_user_cache_dir() if use_cache else None,
+        )
+        self.__transformer = BitMLTransformer()
+
+        self.__text = ""
+        self.__contract: BitMLContract | None = None
+        self.__root_span: _Span | None = None
+        self.__validator = BitMLContractValidator()
+        self.__last_edit_incremental = False
+
+        self.__parse_full(text)
+
+    @property
+    def text(self) -> str:
+        return self.__text
+
+    @property
+    def contract(self) -> BitMLContract:
+        assert_(self.__contract is not None, "contract not parsed")
+        return self.__contract
+
+    @property
+    def last_edit_incremental(self) -> bool:
+        """Whether the last edit was handled by re-parsing only a subtree of the contract."""
+        return self.__last_edit_incremental
+
+    def edit(self, start: int, end: int, replacement: str) -> BitMLContract:
+        """
+        Replace the text between two positions, and update the contract.
+
+        If the new text is not a valid contract, an exception is raised and the state of the parser is unchanged.
+
+        :param start: the start position (inclusive) of the replaced text
+        :param end: the end position (exclusive) of the replaced text
+        :param replacement: the new text
+        :return: the updated contract
+        """
+        if not 0 <= start <= end <= len(self.__text):
+            raise ValueError(f"invalid edit range [{start}, {end}) for a text of length {len(self.__text)}")
+
+        new_text = self.__text[:start] + replacement + self.__text[end:]
+        path = self.__find_enclosing_path(start, end)
+        if path is None:
+            self.__parse_full(new_text)
+            self.__last_edit_incremental = False
+        else:
+            self.__parse_subtree(new_text, path, len(replacement) - (end - start))
+            self.__last_edit_incremental = True
+        return self.contract
+
+    def __parse_full(self, text: str) -> None:
+        tree = self.__call_parser(text, _START)
+        self.__transformer.reset()
+        contract = self.__transformer.transform(tree)
+
+        (contract_body,) = tree.find_data("contract_body")
+        validator = BitMLContractValidator()
+        for participant in contract.participants:
+            validator.add_participant(participant)
+        for precondition in contract.preconditions:
+            validator.add_precondition(precondition)
+
+        self.__text = text
+        self.__contract = contract
+        self.__root_span = _build_span(contract_body.children[0], _CONTRACT_EXPR, 0)
+        self.__validator = validator
+
+    def __parse_subtree(self, new_text: str, path: list[tuple[_Span, int, int]], delta: int) -> None:
+        """Re-parse the last span of the path, made of (span, absolute start, index in the parent span) triples."""
+        contract = self.contract
+        target_span, target_start, target_index = path[-1]
+        subtree_text = new_text[target_start : target_start + target_span.length + delta]
+
+        # re-parse and re-validate the subtree
+        tree = self.__call_parser(subtree_text, target_span.start_symbol)
+        self.__transformer.reset(self.__validator)
+        new_subtree = self.__transformer.transform(tree)
+        self.__validator.check_bitml_contract_validity(new_subtree)
+
+        ancestors = [contract.contract_root]
+        funds_check = _BitMLFundsCheck(contract)
+        state = funds_check.initial_state
+        for (span, _, _), (_, _, index) in zip(path[:-1], path[1:], strict=True):
+            state = _get_child_state(ancestors[-1], index, state)
+            ancestors.append(_get_children(ancestors[-1], span)[index])
+        funds_check.check_funds(new_subtree, state)
+
+        # rebuild the ancestors of the subtree
+        new_expr = new_subtree
+        for (span, _, _), (_, _, index), expr in zip(
+            reversed(path[:-1]), reversed(path[1:]), reversed(ancestors[:-1]), strict=True
+        ):
+            new_expr = _replace_child(expr, span, index, new_expr)
+
+        # update the spans: the new subtree replaces the old one, and the spans that follow the edit are shifted
+        new_span = _build_span(tree, target_span.start_symbol, target_start)
+        if len(path) == 1:
+            self.__root_span = new_span
+        else:
+            parent_span, parent_start, _ = path[-2]
+            new_span.offset -= parent_start
+            parent_span.children[target_index] = new_span
+        for (span, _, _), (_, _, index) in zip(path[:-1], path[1:], strict=True):
+            span.length += delta
+            for sibling_span in span.children[index + 1 :]:
+                sibling_span.offset += delta
+
+        self.__text = new_text
+        self.__contract = BitMLContract(contract.participants, contract.preconditions, new_expr, check_validity=False)
+
+    def __find_enclosing_path(self, start: int, end: int) -> list[tuple[_Span, int, int]] | None:
+        """Find the path from the root to the smallest span that encloses the edit, or None if no span does."""
+
+        def encloses(span_start: int, span: _Span) -> bool:
+            span_end = span_start + span.length
+            if not span_start <= start <= end <= span_end:
+                return False
+            # insertions at the boundaries belong to the parent span
+            return not (start == end and start in (span_start, span_end))
+
+        root_span = self.__root_span
+        assert_(root_span is not None, "contract not parsed")
+        if not encloses(root_span.offset, root_span):
+            return None
+
+        path = [(root_span, root_span.offset, 0)]
+        while True:
+            span, span_start, _ = path[-1]
+            for index, child_span in enumerate(span.children):
+                child_start = span_start + child_span.offset
+                if encloses(child_start, child_span):
+                    path.append((child_span, child_start, index))
+                    break
+            else:
+                return path
+
+    def __call_parser(self, text: str, start_symbol: str) -> Tree:
+        try:
+            return self.__cached_parser.parser.parse(text, start=start_symbol)
+        except LarkError as e:
+            raise e.with_traceback(None) from None
@@ -1,11 +1,13 @@
 """Parser for BitML contracts."""
 
-import sys
+import threading
 from collections.abc import Sequence
 from pathlib import Path
-from typing import Any, TypeVar
+from typing import Any, TypeVar, cast
 
 from lark import Lark, Token, Transformer
+from lark.visitors import Transformer_NonRecursive
+from lark.exceptions import LarkError
 
 from bitml2mcmas.bitml.ast import (
     And,
@@ -46,7 +48,7 @@ from bitml2mcmas.bitml.ast import (
 )
 from bitml2mcmas.bitml.core import BitMLContract
 from bitml2mcmas.bitml.custom_types import HexString, Name, TermString
-from bitml2mcmas.bitml.parser._cached_lark import CachedLark
+from bitml2mcmas.bitml.parser._cached_lark import CachedLark, get_user_cache_dir
 from bitml2mcmas.bitml.validation import BitMLContractValidator
 from bitml2mcmas.helpers.misc import ROOT_PATH, assert_
 from bitml2mcmas.helpers.validation import NonNegativeDecimal, NonNegativeInt
@@ -54,14 +56,38 @@ from bitml2mcmas.helpers.validation import NonNegativeDecimal, NonNegativeInt
 _PARSER_DIR = ROOT_PATH / "bitml" / "parser"
 
 
-class BitMLTransformer(Transformer[Any, BitMLContract]):
-    """Domain Transformer."""
+class BitMLTransformer(Transformer_NonRecursive[Any, BitMLContract]):
+    """
+    Domain Transformer.
+
+    The transformer does not recurse, so it works on the parse trees of arbitrarily deep contracts; the nodes are
+    transformed in the same order as by a recursive transformer.
+
+    The validation context is kept per thread, so the same transformer can be used by several threads at once, as
+    long as each thread calls reset() before transforming a new contract.
+    """
 
     def __init__(self, *args: Any, **kwargs: Any) -> None:
         """Initialize the domain transformer."""
         super().__init__(*args, **kwargs)
 
-        self.__context = BitMLContractValidator()
+        self.__local = threading.local()
+
+    @property
+    def _context(self) -> BitMLContractValidator:
+        context = getattr(self.__local, "context", None)
+        if context is None:
+            context = BitMLContractValidator()
+            self.__local.context = context
+        return context
+
+    def reset(self, context: BitMLContractValidator | None = None) -> None:
+        """
+        Discard the validation context of the current thread.
+
+        :param context: the new validation context; if None, an empty one is used
+        """
+        self.__local.context = context if context is not None else BitMLContractValidator()
 
     def start(self, args: Sequence) -> BitMLContract:
         """Entry point."""
@@ -89,7 +115,7 @@ class BitMLTransformer(Transformer[Any, BitMLContract]):
 
     def participant_clause(self, args: Sequence) -> BitMLParticipant:
         participant = BitMLParticipant(args[2], args[3])
-        self.__context.add_participant(participant)
+        self._context.add_participant(participant)
         return participant
 
     def debug_mode_clause(self, args: Sequence) -> None:
@@ -114,19 +140,19 @@ class BitMLTransformer(Transformer[Any, BitMLContract]):
     def deposit_clause(self, args: Sequence) -> BitMLDepositPrecondition:
         participant_id, tx_amount, tx_id = args[2:-1]
         precondition = BitMLDepositPrecondition(participant_id, tx_amount, tx_id)
-        self.__context.add_deposit_precondition(precondition)
+        self._context.add_deposit_precondition(precondition)
         return precondition
 
     def secret_clause(self, args: Sequence) -> BitMLSecretPrecondition:
         participant_id, secret_id, secret_hash = args[2:-1]
         precondition = BitMLSecretPrecondition(participant_id, secret_id, secret_hash)
-        self.__context.add_secret_precondition(precondition)
+        self._context.add_secret_precondition(precondition)
         return precondition
 
     def fee_clause(self, args: Sequence) -> BitMLFeePrecondition:
         participant_id, tx_amount, tx_id = args[2:-1]
         precondition = BitMLFeePrecondition(participant_id, tx_amount, tx_id)
-        self.__context.add_fee_deposit_precondition(precondition)
+        self._context.add_fee_deposit_precondition(precondition)
         return precondition
 
     def volatile_deposit_clause(
@@ -136,7 +162,7 @@ class BitMLTransformer(Transformer[Any, BitMLContract]):
         precondition = BitMLVolatileDepositPrecondition(
             participant_id, deposit_id, tx_amount, tx_id
         )
-        self.__context.add_volatile_deposit_precondition(precondition)
+        self._context.add_volatile_deposit_precondition(precondition)
         return precondition
 
     def contract_body(self, args: Sequence) -> BitMLExpression:
@@ -145,20 +171,20 @@ class BitMLTransformer(Transformer[Any, BitMLContract]):
     def withdraw_expr(self, args: Sequence) -> BitMLWithdrawExpression:
         participant_id = args[2]
         expr = BitMLWithdrawExpression(participant_id)
-        self.__context.check_bitml_contract_validity(expr, recursive=False)
+        self._context.check_bitml_contract_validity(expr, recursive=False)
         return expr
 
     def after_expr(self, args: Sequence) -> BitMLAfterExpression:
         timeout = args[2]
         arg = args[3]
         expr = BitMLAfterExpression(timeout, arg)
-        self.__context.check_bitml_contract_validity(expr, recursive=False)
+        self._context.check_bitml_contract_validity(expr, recursive=False)
         return expr
 
     def choice_expr(self, args: Sequence) -> BitMLChoiceExpression:
         choices = args[2:-1]
         expr = BitMLChoiceExpression(choices)
-        self.__context.check_bitml_contract_validity(expr, recursive=False)
+        self._context.check_bitml_contract_validity(expr, recursive=False)
         return expr
 
     def authorization_expr(self, args: Sequence) -> BitMLAuthorizationExpression:
@@ -170,19 +196,19 @@ class BitMLTransformer(Transformer[Any, BitMLContract]):
         )
         for participant_id in reversed_participant_ids[1:]:
             result = BitMLAuthorizationExpression(participant_id, result)
-        self.__context.check_bitml_contract_validity(result, recursive=False)
+        self._context.check_bitml_contract_validity(result, recursive=False)
         return result
 
     def split_expr(self, args: Sequence) -> BitMLSplitExpression:
         expr = BitMLSplitExpression(args[2:-1])
-        self.__context.check_bitml_contract_validity(expr, recursive=False)
+        self._context.check_bitml_contract_validity(expr, recursive=False)
         return expr
 
     def put_expr(self, args: Sequence) -> BitMLPutExpression:
         vol_deposits = args[2]
         contract_expr = args[3]
         expr = BitMLPutExpression(vol_deposits, contract_expr)
-        self.__context.check_bitml_contract_validity(expr, recursive=False)
+        self._context.check_bitml_contract_validity(expr, recursive=False)
         return expr
 
     def put_reveal_expr(self, args: Sequence) -> BitMLPutRevealExpression:
@@ -192,7 +218,7 @@ class BitMLTransformer(Transformer[Any, BitMLContract]):
         expr = BitMLPutRevealExpression(
             vol_deposits_or_empty, secret_ids, contract_expr
         )
-        self.__context.check_bitml_contract_validity(expr, recursive=False)
+        self._context.check_bitml_contract_validity(expr, recursive=False)
         return expr
 
     def put_reveal_if_expr(self, args: Sequence) -> BitMLPutRevealIfExpression:
@@ -209,7 +235,7 @@ class BitMLTransformer(Transformer[Any, BitMLContract]):
             expr = BitMLPutRevealExpression(
                 vol_deposits_or_empty, secret_ids, contract_expr
             )
-        self.__context.check_bitml_contract_validity(expr, recursive=False)
+        self._context.check_bitml_contract_validity(expr, recursive=False)
         return expr
 
     def reveal_if_expr(self, args: Sequence) -> BitMLRevealIfExpression:
@@ -217,15 +243,15 @@ class BitMLTransformer(Transformer[Any, BitMLContract]):
         predicate = args[3]
         contract_expr = args[4]
         expr = BitMLRevealIfExpression(secret_ids, predicate, contract_expr)
-        self.__context.check_predicate(predicate)
-        self.__context.check_bitml_contract_validity(expr, recursive=False)
+        self._context.check_predicate(predicate)
+        self._context.check_bitml_contract_validity(expr, recursive=False)
         return expr
 
     def reveal_expr(self, args: Sequence) -> BitMLRevealExpression:
         secret_ids = args[2]
         contract_expr = args[3]
         expr = BitMLRevealExpression(secret_ids, contract_expr)
-        self.__context.check_bitml_contract_validity(expr, recursive=False)
+        self._context.check_bitml_contract_validity(expr, recursive=False)
         return expr
 
     def compilation_directives(self, args: Sequence) -> None:
@@ -352,12 +378,24 @@ class BitMLTransformer(Transformer[Any, BitMLContract]):
 class BitMLParser:
     """BitML parser class."""
 
-    def __init__(self) -> None:
-        """Initialize."""
+    def __init__(self, use_cache: bool = True, inline_transform: bool = False) -> None:
+        """
+        Initialize.
+
+        :param use_cache: if True, the compiled parse table is stored in (and loaded from) the user cache directory, so
+            that it is built only once across processes.
+        :param inline_transform: if True, the transformer is applied by the LALR parser while parsing, so the contract
+            is built in a single pass without allocating the intermediate parse tree. In this mode, errors raised by
+            the transformer are not wrapped in a lark.exceptions.VisitError.
+        """
+        self._transformer = BitMLTransformer()
+        self._inline_transform = inline_transform
         self._cached_parser = CachedLark(
             self._read_main_grammar(),
             parser="lalr",
             import_paths=[self._get_grammars_dir()],
+            cache_dir=get_user_cache_dir() if use_cache else None,
+            transformer=self._transformer if inline_transform else None,
         )
 
     @classmethod
@@ -371,33 +409,68 @@ class BitMLParser:
 
     def __call__(self, text: str) -> BitMLContract:
         """Call."""
-        return call_parser(text, self._cached_parser.parser, BitMLTransformer())
+        self._transformer.reset()
+        if self._inline_transform:
+            return call_parser(text, self._cached_parser.parser, None)
+        return call_parser(text, self._cached_parser.parser, self._transformer)
+
+
+_shared_parser: BitMLParser | None = None
+_shared_parser_lock = threading.Lock()
+
+
+def get_shared_parser() -> BitMLParser:
+    """
+    Get the process-wide BitML parser.
+
+    The parser is created, and its parse table loaded, only once, on the first call.
+
+    :return: the shared parser
+    """
+    global _shared_parser
+    if _shared_parser is None:
+        with _shared_parser_lock:
+            if _shared_parser is None:
+                parser = BitMLParser()
+                # load the parse table while holding the lock
+                _ = parser._cached_parser.parser
+                _shared_parser = parser
+    return _shared_parser
+
+
+def parse_contract(text: str) -> BitMLContract:
+    """
+    Parse a BitML contract with the shared parser.
+
+    The function is safe to call from several threads at once.
+
+    :param text: the contract text
+    :return: the parsed contract
+    """
+    return get_shared_parser()(text)
 
 
 T = TypeVar("T")
 
 
-def call_parser(text: str, parser: Lark, transformer: Transformer[Any, T]) -> T:
+def call_parser(text: str, parser: Lark, transformer: Transformer[Any, T] | None) -> T:
     """Parse a text with a Lark parser and transformer.
 
-    To produce a better traceback in case of an error, the function will temporarily overwrite the sys.tracebacklimit
-    value of the current interpreter.
+    To produce a better traceback in case of a parsing error, the frames internal to Lark are dropped from the
+    traceback of the raised exception. Differently from changing sys.tracebacklimit, this does not affect other threads.
 
     :param text: the text to parse
     :param parser: the Lark parser object
-    :param transformer: the Lark transformer object
+    :param transformer: the Lark transformer object, or None if the parser already applies its transformer inline
     :return: the object returned by the parser
     """
-    old_tracebacklimit = getattr(sys, "tracebacklimit", None)
     try:
-        sys.tracebacklimit = 0
         tree = parser.parse(text)
-        sys.tracebacklimit = None  # type: ignore[assignment]
-        result = transformer.transform(tree)
-    finally:
-        if old_tracebacklimit is not None:
-            sys.tracebacklimit = old_tracebacklimit
-    return result
+    except LarkError as e:
+        raise e.with_traceback(None) from None
+    if transformer is None:
+        return cast(T, tree)
+    return transformer.transform(tree)
 
 
 class BitMLParsingError(Exception):
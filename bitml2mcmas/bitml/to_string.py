@@ -1,7 +1,9 @@
 """Convert a BitML contract into string."""
 
+from collections.abc import Callable, Sequence
 from functools import singledispatch
 from textwrap import indent
+from typing import Any, TypeVar
 
 from bitml2mcmas.bitml.ast import (
     And,
@@ -20,6 +22,7 @@ from bitml2mcmas.bitml.ast import (
     BitMLRevealExpression,
     BitMLRevealIfExpression,
     BitMLSecretPrecondition,
+    BitMLSplitBranch,
     BitMLSplitExpression,
     BitMLTransactionOutput,
     BitMLVolatileDepositPrecondition,
@@ -34,31 +37,105 @@ from bitml2mcmas.bitml.ast import (
     NotEqualTo,
     Or,
     Plus,
-    _BinaryExpression,
-    _BinaryPredicate,
-    _BooleanConnectivePredicate,
 )
 from bitml2mcmas.bitml.core import BitMLContract
 from bitml2mcmas.bitml.exceptions import BitMLDispatchError
+from bitml2mcmas.helpers.hashing import _get_field_getter
+from bitml2mcmas.helpers.traversal import Children, DispatchCache, Visitor
+from bitml2mcmas.helpers.validation import _BaseDataClass
 
 _INDENTATION = " " * 2
 LANG_BITML = "#lang bitml"
 
+_F = TypeVar("_F", bound=Callable[..., str])
+
+# the implementations of to_string that convert the nodes with the iterative traversal
+_ITERATIVE_IMPLEMENTATIONS: set[Callable[..., str]] = set()
+
+
+def _iterative(function: _F) -> _F:
+    _ITERATIVE_IMPLEMENTATIONS.add(function)
+    return function
+
 
 @singledispatch
+@_iterative
 def to_string(obj: object) -> str:
+    """
+    Convert a BitML contract, or a part of it, into string.
+
+    The conversion of the contract expressions and of the predicates does not recurse, so it works on arbitrarily deep
+    contracts. A node whose class has an implementation registered by another module is converted by it, as a whole.
+
+    :param obj: the contract, or a participant, a precondition, a contract expression or a predicate
+    :return: the BitML code of the object
+    """
     raise BitMLDispatchError(obj, "BitMLExpression")
 
 
+def _is_converted_as_whole(node: object) -> bool:
+    """Check whether the node is converted by a non-iterative implementation of to_string."""
+    return to_string.dispatch(node.__class__) not in _ITERATIVE_IMPLEMENTATIONS
+
+
+def _get_children(obj: object) -> Sequence[Any]:
+    """Get the children of a node: its fields that are nodes, and the nodes in its sequence fields, in order."""
+    if isinstance(obj, BitMLContract):
+        return [*obj.participants, *obj.preconditions, obj.contract_root]
+    if not isinstance(obj, _BaseDataClass):
+        return ()
+    children = []
+    for value in _get_field_getter(obj.__class__)(obj):
+        if isinstance(value, _BaseDataClass):
+            children.append(value)
+        elif isinstance(value, (list, tuple)):
+            children.extend(item for item in value if isinstance(item, _BaseDataClass))
+    return children
+
+
+class _ToString(Visitor[None, str]):
+    """Convert a node into string, given the strings of its children."""
+
+    def enter(self, node: Any, state: None) -> Children[None]:
+        if _is_converted_as_whole(node):
+            return ()
+        return [(child, None) for child in _get_children(node)]
+
+    def exit(self, node: Any, state: None, results: Sequence[str]) -> str:
+        if _is_converted_as_whole(node):
+            return to_string(node)
+        return _TO_STRING_IMPLEMENTATIONS(node)(node, *results)  # type: ignore[no-any-return]
+
+
+def _visit(obj: object) -> str:
+    return _ToString().visit(obj, None)
+
+
+@singledispatch
+def _node_to_string(obj: object, *children: str) -> str:
+    """Convert a node into string, given the strings of its children."""
+    raise BitMLDispatchError(obj, "BitMLExpression")
+
+
+_TO_STRING_IMPLEMENTATIONS = DispatchCache(_node_to_string)
+
+
 @to_string.register
+@_iterative
 def bitml_contract_to_string(contract: BitMLContract) -> str:
+    return _visit(contract)
+
+
+@_node_to_string.register
+def _bitml_contract_to_string(contract: BitMLContract, *children: str) -> str:
     header = LANG_BITML
-    participants_str = "\n".join([to_string(p) for p in contract.participants])
-    preconditions_str = "\n".join([to_string(prec) for prec in contract.preconditions])
+    nb_participants = len(contract.participants)
+    participants_str = "\n".join(children[:nb_participants])
+    preconditions_str = "\n".join(children[nb_participants:-1])
     preconditions_clause_str = (
         "(pre\n" + indent(preconditions_str, _INDENTATION) + "\n)"
     )
-    contract_root_str = to_string(contract.contract_root)
+    contract_root_str = children[-1]
     return (
         f"{header}\n"
         "\n"
@@ -109,64 +186,122 @@ def withdraw_to_string(expr: BitMLWithdrawExpression) -> str:
 
 
 @to_string.register
+@_iterative
 def after_to_string(expr: BitMLAfterExpression) -> str:
-    return f"(after {expr.timeout} {to_string(expr.branch)})"
+    return _visit(expr)
+
+
+@_node_to_string.register
+def _after_to_string(expr: BitMLAfterExpression, branch_str: str) -> str:
+    return f"(after {expr.timeout} {branch_str})"
 
 
 @to_string.register
+@_iterative
 def choice_to_string(expr: BitMLChoiceExpression) -> str:
-    choices_str = "\n".join([to_string(branch) for branch in expr.choices])
+    return _visit(expr)
+
+
+@_node_to_string.register
+def _choice_to_string(expr: BitMLChoiceExpression, *choices: str) -> str:
+    choices_str = "\n".join(choices)
     return "(choice\n" + indent(choices_str, prefix=_INDENTATION) + "\n)"
 
 
 @to_string.register
+@_iterative
 def authorization_to_string(expr: BitMLAuthorizationExpression) -> str:
-    return f'(auth "{expr.participant_id}" {to_string(expr.branch)})'
+    return _visit(expr)
+
+
+@_node_to_string.register
+def _authorization_to_string(
+    expr: BitMLAuthorizationExpression, branch_str: str
+) -> str:
+    return f'(auth "{expr.participant_id}" {branch_str})'
+
+
+@_node_to_string.register
+def _split_branch_to_string(split_branch: BitMLSplitBranch, branch_str: str) -> str:
+    return f"({split_branch.amount} -> {branch_str})"
 
 
 @to_string.register
+@_iterative
 def split_to_string(expr: BitMLSplitExpression) -> str:
-    body = "\n".join(
-        [
-            f"({split_branch.amount} -> {to_string(split_branch.branch)})"
-            for split_branch in expr.branches
-        ]
-    )
+    return _visit(expr)
+
+
+@_node_to_string.register
+def _split_to_string(expr: BitMLSplitExpression, *branches: str) -> str:
+    body = "\n".join(branches)
     return "(split\n" + indent(body, prefix=_INDENTATION) + "\n)"
 
 
 @to_string.register
+@_iterative
 def put_to_string(expr: BitMLPutExpression) -> str:
+    return _visit(expr)
+
+
+@_node_to_string.register
+def _put_to_string(expr: BitMLPutExpression, branch_str: str) -> str:
     deposit_ids_str = "(" + " ".join(expr.deposit_ids) + ")"
-    return f"(put {deposit_ids_str} {to_string(expr.branch)})"
+    return f"(put {deposit_ids_str} {branch_str})"
 
 
 @to_string.register
+@_iterative
 def put_reveal_to_string(expr: BitMLPutRevealExpression) -> str:
+    return _visit(expr)
+
+
+@_node_to_string.register
+def _put_reveal_to_string(expr: BitMLPutRevealExpression, branch_str: str) -> str:
     deposit_ids_str = "(" + " ".join(expr.deposit_ids) + ")"
     secret_ids_str = "(" + " ".join(expr.secret_ids) + ")"
-    return f"(putreveal {deposit_ids_str} {secret_ids_str} {to_string(expr.branch)})"
+    return f"(putreveal {deposit_ids_str} {secret_ids_str} {branch_str})"
 
 
 @to_string.register
+@_iterative
 def put_reveal_if_to_string(expr: BitMLPutRevealIfExpression) -> str:
+    return _visit(expr)
+
+
+@_node_to_string.register
+def _put_reveal_if_to_string(
+    expr: BitMLPutRevealIfExpression, predicate_str: str, branch_str: str
+) -> str:
     deposit_ids_str = "(" + " ".join(expr.deposit_ids) + ")"
     secret_ids_str = "(" + " ".join(expr.secret_ids) + ")"
-    predicate_str = to_string(expr.predicate)
-    return f"(putrevealif {deposit_ids_str} {secret_ids_str} (pred {predicate_str}) {to_string(expr.branch)})"
+    return f"(putrevealif {deposit_ids_str} {secret_ids_str} (pred {predicate_str}) {branch_str})"
 
 
 @to_string.register
+@_iterative
 def reveal_if_to_string(expr: BitMLRevealIfExpression) -> str:
+    return _visit(expr)
+
+
+@_node_to_string.register
+def _reveal_if_to_string(
+    expr: BitMLRevealIfExpression, predicate_str: str, branch_str: str
+) -> str:
     secret_ids_str = "(" + " ".join(expr.secret_ids) + ")"
-    predicate_to_string = to_string(expr.predicate)
-    return f"(revealif {secret_ids_str} (pred {predicate_to_string}) {to_string(expr.branch)})"
+    return f"(revealif {secret_ids_str} (pred {predicate_str}) {branch_str})"
 
 
 @to_string.register
+@_iterative
 def reveal_to_string(expr: BitMLRevealExpression) -> str:
+    return _visit(expr)
+
+
+@_node_to_string.register
+def _reveal_to_string(expr: BitMLRevealExpression, branch_str: str) -> str:
     secret_ids_str = "(" + " ".join(expr.secret_ids) + ")"
-    return f"(reveal {secret_ids_str} {to_string(expr.branch)})"
+    return f"(reveal {secret_ids_str} {branch_str})"
 
 
 @to_string.register
@@ -179,81 +314,143 @@ def atom_secret_to_string(expr: BitMLExpressionSecret) -> str:
     return str(expr.secret_id)
 
 
-def _binary_expression_to_string(expr: _BinaryExpression, symbol: str) -> str:
-    left_str = to_string(expr.left)
-    right_str = to_string(expr.right)
+def _binary_expression_to_string(left_str: str, right_str: str, symbol: str) -> str:
     return f"({symbol} {left_str} {right_str})"
 
 
 @to_string.register
+@_iterative
 def plus_to_string(expr: Plus) -> str:
-    return _binary_expression_to_string(expr, "+")
+    return _visit(expr)
+
+
+@_node_to_string.register
+def _plus_to_string(expr: Plus, left_str: str, right_str: str) -> str:
+    return _binary_expression_to_string(left_str, right_str, "+")
 
 
 @to_string.register
+@_iterative
 def minus_to_string(expr: Minus) -> str:
-    return _binary_expression_to_string(expr, "-")
+    return _visit(expr)
 
 
-def _binary_predicate_to_string(expr: _BinaryPredicate, symbol: str) -> str:
-    left_str = to_string(expr.left)
-    right_str = to_string(expr.right)
-    return f"({symbol} {left_str} {right_str})"
+@_node_to_string.register
+def _minus_to_string(expr: Minus, left_str: str, right_str: str) -> str:
+    return _binary_expression_to_string(left_str, right_str, "-")
 
 
 @to_string.register
+@_iterative
 def equal_to_to_string(expr: EqualTo) -> str:
-    return _binary_predicate_to_string(expr, "=")
+    return _visit(expr)
+
+
+@_node_to_string.register
+def _equal_to_to_string(expr: EqualTo, left_str: str, right_str: str) -> str:
+    return _binary_expression_to_string(left_str, right_str, "=")
 
 
 @to_string.register
+@_iterative
 def not_equal_to_to_string(expr: NotEqualTo) -> str:
-    return _binary_predicate_to_string(expr, "!=")
+    return _visit(expr)
+
+
+@_node_to_string.register
+def _not_equal_to_to_string(expr: NotEqualTo, left_str: str, right_str: str) -> str:
+    return _binary_expression_to_string(left_str, right_str, "!=")
 
 
 @to_string.register
+@_iterative
 def less_than_to_string(expr: LessThan) -> str:
-    return _binary_predicate_to_string(expr, "<")
+    return _visit(expr)
+
+
+@_node_to_string.register
+def _less_than_to_string(expr: LessThan, left_str: str, right_str: str) -> str:
+    return _binary_expression_to_string(left_str, right_str, "<")
 
 
 @to_string.register
+@_iterative
 def less_than_or_equal_to_string(expr: LessThanOrEqual) -> str:
-    return _binary_predicate_to_string(expr, "<=")
+    return _visit(expr)
+
+
+@_node_to_string.register
+def _less_than_or_equal_to_string(
+    expr: LessThanOrEqual, left_str: str, right_str: str
+) -> str:
+    return _binary_expression_to_string(left_str, right_str, "<=")
 
 
 @to_string.register
+@_iterative
 def greater_than_to_string(expr: GreaterThan) -> str:
-    return _binary_predicate_to_string(expr, ">")
+    return _visit(expr)
+
+
+@_node_to_string.register
+def _greater_than_to_string(expr: GreaterThan, left_str: str, right_str: str) -> str:
+    return _binary_expression_to_string(left_str, right_str, ">")
 
 
 @to_string.register
+@_iterative
 def greater_than_or_equal_to_string(expr: GreaterThanOrEqual) -> str:
-    return _binary_predicate_to_string(expr, ">=")
+    return _visit(expr)
+
+
+@_node_to_string.register
+def _greater_than_or_equal_to_string(
+    expr: GreaterThanOrEqual, left_str: str, right_str: str
+) -> str:
+    return _binary_expression_to_string(left_str, right_str, ">=")
 
 
 @to_string.register
+@_iterative
 def between_to_string(expr: Between) -> str:
-    return f"(between {to_string(expr.arg)} {to_string(expr.left)} {to_string(expr.right)})"
+    return _visit(expr)
+
+
+@_node_to_string.register
+def _between_to_string(
+    expr: Between, arg_str: str, left_str: str, right_str: str
+) -> str:
+    return f"(between {arg_str} {left_str} {right_str})"
 
 
 @to_string.register
+@_iterative
 def not_to_string(expr: Not) -> str:
-    return f"(not {to_string(expr.arg)})"
+    return _visit(expr)
 
 
-def _boolean_connective_predicate_to_string(
-    expr: _BooleanConnectivePredicate, symbol: str
-) -> str:
-    left_str = to_string(expr.left)
-    right_str = to_string(expr.right)
-    return f"({symbol} {left_str} {right_str})"
+@_node_to_string.register
+def _not_to_string(expr: Not, arg_str: str) -> str:
+    return f"(not {arg_str})"
 
 
 @to_string.register
+@_iterative
 def and_to_string(expr: And) -> str:
-    return _boolean_connective_predicate_to_string(expr, "and")
+    return _visit(expr)
+
+
+@_node_to_string.register
+def _and_to_string(expr: And, left_str: str, right_str: str) -> str:
+    return _binary_expression_to_string(left_str, right_str, "and")
 
 
 @to_string.register
+@_iterative
 def or_to_string(expr: Or) -> str:
-    return _boolean_connective_predicate_to_string(expr, "or")
+    return _visit(expr)
+
+
+@_node_to_string.register
+def _or_to_string(expr: Or, left_str: str, right_str: str) -> str:
+    return _binary_expression_to_string(left_str, right_str, "or")
@@ -51,6 +51,12 @@ from bitml2mcmas.bitml.exceptions import (
     BitMLVolatileDepositsAlreadySpentError,
 )
 from bitml2mcmas.helpers.misc import assert_
+from bitml2mcmas.helpers.traversal import (
+    Children,
+    DispatchCache,
+    Visitor,
+    visit_preorder,
+)
 
 
 class _ParticipantsIndex:
@@ -300,80 +306,87 @@ class BitMLContractValidator:
 
         self.__secrets_index.add_secret(secret_precondition)
 
-    @singledispatchmethod
     def check_bitml_contract_validity(
         self, obj: object, recursive: bool = True
     ) -> None:
+        """
+        Check that a contract expression refers only to defined participants, deposits and secrets.
+
+        :param obj: the contract expression
+        :param recursive: if True, check also its sub-expressions (without recursion, so the expression can be
+            arbitrarily deep); otherwise, check only the expression itself
+        """
+        if not recursive:
+            self._check_expr_implementations(obj)(self, obj)
+            return
+        visit_preorder(
+            obj, lambda expr: self._check_expr_implementations(expr)(self, expr)
+        )
+
+    @singledispatchmethod
+    def check_expr_validity(self, obj: object) -> Sequence[BitMLExpression]:
+        """Check a contract expression, without its sub-expressions; return the sub-expressions."""
         raise BitMLDispatchError(obj, "BitMLExpression")
 
-    @check_bitml_contract_validity.register
+    @check_expr_validity.register
     def check_withdraw_expression_validity(
-        self, expr: BitMLWithdrawExpression, recursive: bool = True
-    ) -> None:
+        self, expr: BitMLWithdrawExpression
+    ) -> Sequence[BitMLExpression]:
         participant_id = expr.participant_id
         self.__participants_index.check_participant_id_not_defined(participant_id)
+        return ()
 
-    @check_bitml_contract_validity.register
+    @check_expr_validity.register
     def check_after_expr_validity(
-        self, expr: BitMLAfterExpression, recursive: bool = True
-    ) -> None:
-        if recursive:
-            self.check_bitml_contract_validity(expr.branch, recursive=recursive)
+        self, expr: BitMLAfterExpression
+    ) -> Sequence[BitMLExpression]:
+        return (expr.branch,)
 
-    @check_bitml_contract_validity.register
+    @check_expr_validity.register
     def check_choice_expr_validity(
-        self, expr: BitMLChoiceExpression, recursive: bool = True
-    ) -> None:
-        if recursive:
-            for choice in expr.choices:
-                self.check_bitml_contract_validity(choice, recursive=recursive)
+        self, expr: BitMLChoiceExpression
+    ) -> Sequence[BitMLExpression]:
+        return expr.choices
 
-    @check_bitml_contract_validity.register
+    @check_expr_validity.register
     def check_authorization_expr_validity(
-        self, expr: BitMLAuthorizationExpression, recursive: bool = True
-    ) -> None:
+        self, expr: BitMLAuthorizationExpression
+    ) -> Sequence[BitMLExpression]:
         participant_id = expr.participant_id
         self.__participants_index.check_participant_id_not_defined(participant_id)
-        if recursive:
-            self.check_bitml_contract_validity(expr.branch, recursive=recursive)
+        return (expr.branch,)
 
-    @check_bitml_contract_validity.register
+    @check_expr_validity.register
     def check_split_expr_validity(
-        self, expr: BitMLSplitExpression, recursive: bool = True
-    ) -> None:
-        if recursive:
-            for split_branch in expr.branches:
-                self.check_bitml_contract_validity(
-                    split_branch.branch, recursive=recursive
-                )
+        self, expr: BitMLSplitExpression
+    ) -> Sequence[BitMLExpression]:
+        return [split_branch.branch for split_branch in expr.branches]
 
-    @check_bitml_contract_validity.register
+    @check_expr_validity.register
     def check_put_expr_validity(
-        self, expr: BitMLPutExpression, recursive: bool = True
-    ) -> None:
+        self, expr: BitMLPutExpression
+    ) -> Sequence[BitMLExpression]:
         for deposit_id in expr.deposit_ids:
             self.__txs_index.check_volatile_deposit_id_defined(deposit_id)
 
-        if recursive:
-            self.check_bitml_contract_validity(expr.branch, recursive=recursive)
+        return (expr.branch,)
 
-    @check_bitml_contract_validity.register
+    @check_expr_validity.register
     def check_put_reveal_expr_validity(
-        self, expr: BitMLPutRevealExpression, recursive: bool = True
-    ) -> None:
+        self, expr: BitMLPutRevealExpression
+    ) -> Sequence[BitMLExpression]:
         for deposit_id in expr.deposit_ids:
             self.__txs_index.check_volatile_deposit_id_defined(deposit_id)
 
         for secret_id in expr.secret_ids:
             self.__secrets_index.check_secret_id_defined(secret_id)
 
-        if recursive:
-            self.check_bitml_contract_validity(expr.branch, recursive=recursive)
+        return (expr.branch,)
 
-    @check_bitml_contract_validity.register
+    @check_expr_validity.register
     def check_put_reveal_if_expr_validity(
-        self, expr: BitMLPutRevealIfExpression, recursive: bool = True
-    ) -> None:
+        self, expr: BitMLPutRevealIfExpression
+    ) -> Sequence[BitMLExpression]:
         for deposit_id in expr.deposit_ids:
             self.__txs_index.check_volatile_deposit_id_defined(deposit_id)
 
@@ -382,30 +395,29 @@ class BitMLContractValidator:
 
         self.check_predicate(expr.predicate)
 
-        if recursive:
-            self.check_bitml_contract_validity(expr.branch, recursive=recursive)
+        return (expr.branch,)
 
-    @check_bitml_contract_validity.register
+    @check_expr_validity.register
     def check_reveal_if_expr_validity(
-        self, expr: BitMLRevealIfExpression, recursive: bool = True
-    ) -> None:
+        self, expr: BitMLRevealIfExpression
+    ) -> Sequence[BitMLExpression]:
         for secret_id in expr.secret_ids:
             self.__secrets_index.check_secret_id_defined(secret_id)
 
         self.check_predicate(expr.predicate)
 
-        if recursive:
-            self.check_bitml_contract_validity(expr.branch, recursive=recursive)
+        return (expr.branch,)
 
-    @check_bitml_contract_validity.register
+    @check_expr_validity.register
     def check_reveal_expr_validity(
-        self, expr: BitMLRevealExpression, recursive: bool = True
-    ) -> None:
+        self, expr: BitMLRevealExpression
+    ) -> Sequence[BitMLExpression]:
         for secret_id in expr.secret_ids:
             self.__secrets_index.check_secret_id_defined(secret_id)
 
-        if recursive:
-            self.check_bitml_contract_validity(expr.branch, recursive=recursive)
+        return (expr.branch,)
+
+    _check_expr_implementations = DispatchCache(check_expr_validity)
 
     @singledispatchmethod
     def check_atom(self, obj: object) -> None:
@@ -419,57 +431,65 @@ class BitMLContractValidator:
     def check_atom_secret(self, atom_secret: BitMLExpressionSecret) -> None:
         self.__secrets_index.check_secret_id_defined(atom_secret.secret_id)
 
-    @singledispatchmethod
     def check_expression(self, obj: object) -> None:
+        """Check an arithmetic expression, without recursion."""
+        visit_preorder(obj, self.check_expression_node)
+
+    @singledispatchmethod
+    def check_expression_node(self, obj: object) -> Sequence[object]:
         raise ValueError(
             f"cannot handle object {obj} of type {type(obj)} as a BitML expression"
         )
 
-    @check_expression.register
-    def check_atomic_expression(self, atom: _BaseExpression) -> None:
+    @check_expression_node.register
+    def check_atomic_expression(self, atom: _BaseExpression) -> Sequence[object]:
         self.check_atom(atom)
+        return ()
 
-    @check_expression.register
-    def check_binary_expressions(self, expr: _BinaryExpression) -> None:
-        self.check_expression(expr.left)
-        self.check_expression(expr.right)
+    @check_expression_node.register
+    def check_binary_expressions(self, expr: _BinaryExpression) -> Sequence[object]:
+        return expr.left, expr.right
 
-    @singledispatchmethod
     def check_predicate(self, obj: object) -> None:
+        """Check a predicate, without recursion."""
+        visit_preorder(obj, self.check_predicate_node)
+
+    @singledispatchmethod
+    def check_predicate_node(self, obj: object) -> Sequence[object]:
         raise BitMLDispatchError(obj, "BitMLPredicate")
 
-    @check_predicate.register
-    def check_predicate_atom(self, atom: _BaseExpression) -> None:
+    @check_predicate_node.register
+    def check_predicate_atom(self, atom: _BaseExpression) -> Sequence[object]:
         self.check_atom(atom)
+        return ()
 
-    @check_predicate.register
-    def check_predicate_binary_expression(self, pred: _BinaryExpression) -> None:
+    @check_predicate_node.register
+    def check_predicate_binary_expression(
+        self, pred: _BinaryExpression
+    ) -> Sequence[object]:
         self.check_expression(pred)
+        return ()
 
-    @check_predicate.register
-    def check_binary_predicate(self, pred: _BinaryPredicate) -> None:
-        self.check_predicate(pred.left)
-        self.check_predicate(pred.right)
+    @check_predicate_node.register
+    def check_binary_predicate(self, pred: _BinaryPredicate) -> Sequence[object]:
+        return pred.left, pred.right
 
-    @check_predicate.register
-    def check_between_predicate(self, pred: Between) -> None:
-        self.check_predicate(pred.arg)
-        self.check_predicate(pred.left)
-        self.check_predicate(pred.right)
+    @check_predicate_node.register
+    def check_between_predicate(self, pred: Between) -> Sequence[object]:
+        return pred.arg, pred.left, pred.right
 
-    @check_predicate.register
-    def check_not_predicate(self, pred: Not) -> None:
-        self.check_predicate(pred.arg)
+    @check_predicate_node.register
+    def check_not_predicate(self, pred: Not) -> Sequence[object]:
+        return (pred.arg,)
 
-    @check_predicate.register
+    @check_predicate_node.register
     def check_boolean_connective_predicate(
         self, pred: _BooleanConnectivePredicate
-    ) -> None:
-        self.check_predicate(pred.left)
-        self.check_predicate(pred.right)
+    ) -> Sequence[object]:
+        return pred.left, pred.right
 
 
-class _BitMLFundsCheck:
+class _BitMLFundsCheck(Visitor["_BitMLFundsCheck._State", None]):
     @dataclasses.dataclass(frozen=True)
     class _State:
         current_contract_funds: Decimal
@@ -510,41 +530,58 @@ class _BitMLFundsCheck:
                 )
         return total_persistent_deposits, available_volatile_deposits
 
-    def check(self) -> None:
-        initial_state = _BitMLFundsCheck._State(
+    @property
+    def initial_state(self) -> _State:
+        return _BitMLFundsCheck._State(
             self._initial_contract_funds, self._initial_available_volatile_deposits
         )
-        self.check_funds(self._contract.contract_root, initial_state)
 
-    @singledispatchmethod
+    def check(self) -> None:
+        self.check_funds(self._contract.contract_root, self.initial_state)
+
     def check_funds(self, obj: object, state: _State) -> None:
+        """Check the funds of a contract expression, given the state of the funds before it, without recursion."""
+        self.visit(obj, state)
+
+    def enter(self, expr: BitMLExpression, state: _State) -> Children[_State]:
+        return self._check_funds_implementations(expr)(self, expr, state)  # type: ignore[no-any-return]
+
+    def exit(self, expr: BitMLExpression, state: _State, results: Sequence[None]) -> None:
+        return None
+
+    @singledispatchmethod
+    def check_funds_in_expr(self, obj: object, state: _State) -> Children[_State]:
+        """Check the funds of a contract expression; return its sub-expressions, with the states of their funds."""
         raise BitMLDispatchError(obj, "BitMLContract")
 
-    @check_funds.register
+    @check_funds_in_expr.register
     def check_funds_in_withdraw_expr(
         self, expr: BitMLWithdrawExpression, state: _State
-    ) -> None:
-        return
+    ) -> Children[_State]:
+        return ()
 
-    @check_funds.register
+    @check_funds_in_expr.register
     def check_funds_in_after_expr(
         self, expr: BitMLAfterExpression, state: _State
-    ) -> None:
-        self.check_funds(expr.branch, state)
+    ) -> Children[_State]:
+        return ((expr.branch, state),)
 
-    @check_funds.register
-    def check_funds_in_choice(self, expr: BitMLChoiceExpression, state: _State) -> None:
-        for choice in expr.choices:
-            self.check_funds(choice, state)
+    @check_funds_in_expr.register
+    def check_funds_in_choice(
+        self, expr: BitMLChoiceExpression, state: _State
+    ) -> Children[_State]:
+        return [(choice, state) for choice in expr.choices]
 
-    @check_funds.register
+    @check_funds_in_expr.register
     def check_funds_in_authorization(
         self, expr: BitMLAuthorizationExpression, state: _State
-    ) -> None:
-        self.check_funds(expr.branch, state)
+    ) -> Children[_State]:
+        return ((expr.branch, state),)
 
-    @check_funds.register
-    def check_funds_in_split(self, expr: BitMLSplitExpression, state: _State) -> None:
+    @check_funds_in_expr.register
+    def check_funds_in_split(
+        self, expr: BitMLSplitExpression, state: _State
+    ) -> Children[_State]:
         amount_branch_pairs = [
             (split_branch.amount, split_branch.branch) for split_branch in expr.branches
         ]
@@ -556,29 +593,39 @@ class _BitMLFundsCheck:
                 total_output_amounts, state.current_contract_funds
             )
 
-        for split_branch in expr.branches:
-            new_state = state.set_funds(split_branch.amount)
-            self.check_funds(split_branch.branch, new_state)
+        return [
+            (split_branch.branch, state.set_funds(split_branch.amount))
+            for split_branch in expr.branches
+        ]
 
-    @check_funds.register
-    def check_funds_in_puts(self, expr: BitMLPutExpression, state: _State) -> None:
-        self._check_put_expressions(expr.deposit_ids, expr.branch, state)
+    @check_funds_in_expr.register
+    def check_funds_in_puts(
+        self, expr: BitMLPutExpression, state: _State
+    ) -> Children[_State]:
+        return self._check_put_expressions(expr.deposit_ids, expr.branch, state)
 
-    @check_funds.register
+    @check_funds_in_expr.register
     def check_funds_in_put_reveal(
         self, expr: BitMLPutRevealExpression, state: _State
-    ) -> None:
-        self._check_put_expressions(expr.deposit_ids, expr.branch, state)
+    ) -> Children[_State]:
+        return self._check_put_expressions(expr.deposit_ids, expr.branch, state)
 
-    @check_funds.register
+    @check_funds_in_expr.register
     def check_funds_in_put_reveal_if(
         self, expr: BitMLPutRevealIfExpression, state: _State
-    ) -> None:
-        self._check_put_expressions(expr.deposit_ids, expr.branch, state)
+    ) -> Children[_State]:
+        return self._check_put_expressions(expr.deposit_ids, expr.branch, state)
 
     def _check_put_expressions(
         self, deposit_ids: Sequence[TermString], branch: BitMLExpression, state: _State
-    ) -> None:
+    ) -> Children[_State]:
+        new_state = self.spend_volatile_deposits(deposit_ids, state)
+        return ((branch, new_state),)
+
+    @classmethod
+    def spend_volatile_deposits(
+        cls, deposit_ids: Sequence[TermString], state: _State
+    ) -> _State:
         already_spent_deposits = set(deposit_ids) - set(
             state.available_volatile_deposits.keys()
         )
@@ -589,15 +636,18 @@ class _BitMLFundsCheck:
         new_state = state
         for deposit_id in deposit_ids:
             new_state = new_state.spend_volatile_deposit(deposit_id)
+        return new_state
 
-        self.check_funds(branch, new_state)
-
-    @check_funds.register
+    @check_funds_in_expr.register
     def check_funds_in_reveal_if(
         self, expr: BitMLRevealIfExpression, state: _State
-    ) -> None:
-        self.check_funds(expr.branch, state)
+    ) -> Children[_State]:
+        return ((expr.branch, state),)
+
+    @check_funds_in_expr.register
+    def check_funds_in_reveal(
+        self, expr: BitMLRevealExpression, state: _State
+    ) -> Children[_State]:
+        return ((expr.branch, state),)
 
-    @check_funds.register
-    def check_funds_in_reveal(self, expr: BitMLRevealExpression, state: _State) -> None:
-        self.check_funds(expr.branch, state)
+    _check_funds_implementations = DispatchCache(check_funds_in_expr)
@@ -0,0 +1,51 @@
+"""Command-line interface of bitml2mcmas."""
+
+import argparse
+import sys
+from collections.abc import Iterator, Sequence
+from pathlib import Path
+
+from bitml2mcmas.bitml.parser.batch import parse_many
+
+
+def _iter_contract_files(paths: Sequence[Path]) -> Iterator[Path]:
+    for path in paths:
+        if path.is_dir():
+            yield from sorted(path.rglob("*.rkt"))
+        else:
+            yield path
+
+
+def _parse_command(args: argparse.Namespace) -> int:
+    nb_ok = nb_errors = 0
+    for result in parse_many(_iter_contract_files(args.paths), jobs=args.jobs):
+        if result.ok:
+            nb_ok += 1
+            if not args.quiet:
+                print(f"OK {result.path}")
+        else:
+            nb_errors += 1
+            print(f"ERROR {result.path}: {result.error}")
+    print(f"{nb_ok} parsed, {nb_errors} failed", file=sys.stderr)
+    return 1 if nb_errors > 0 else 0
+
+
+def _make_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="bitml2mcmas", description=__doc__)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    parse_parser = subparsers.add_parser("parse", help="parse BitML contracts and report the errors")
+    parse_parser.add_argument("paths", nargs="+", type=Path, help="contract files, or directories of .rkt files")
+    parse_parser.add_argument(
+        "-j", "--jobs", type=int, default=None, help="number of worker processes (default: number of CPUs)"
+    )
+    parse_parser.add_argument("-q", "--quiet", action="store_true", help="only print the files that failed")
+    parse_parser.set_defaults(func=_parse_command)
+
+    return parser
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Run the command-line interface."""
+    args = _make_parser().parse_args(argv)
+    return args.func(args)
@@ -1,9 +1,10 @@
 """Graph representation of a BitML smart contract."""
 
+from array import array
 from collections.abc import Collection, Mapping, Sequence
 from decimal import Decimal
 from functools import cached_property, singledispatchmethod
-from typing import AbstractSet, Union, cast
+from typing import AbstractSet, Any, Generic, TypeVar, Union, cast
 
 from bitml2mcmas.bitml.ast import (
     BitMLAfterExpression,
@@ -20,7 +21,8 @@ from bitml2mcmas.bitml.ast import (
 )
 from bitml2mcmas.bitml.core import BitMLContract
 from bitml2mcmas.bitml.custom_types import KEYWORDS, NAME_PATTERN
-from bitml2mcmas.helpers.misc import assert_
+from bitml2mcmas.helpers.misc import CaseNotHandledError, assert_
+from bitml2mcmas.helpers.traversal import Children, DispatchCache, Visitor
 from bitml2mcmas.helpers.validation import NotInSet, StringConstraint, ValidationError
 
 NodeExpr = Union[
@@ -35,6 +37,10 @@ NodeExpr = Union[
 
 Guards = Union[BitMLAuthorizationExpression, BitMLAfterExpression]
 
+_T = TypeVar("_T")
+
+_EXPR_NAMES = ("withdraw", "choice", "put", "reveal", "putreveal", "split")
+
 
 def _get_expr_name(expr: NodeExpr):
     match expr:
@@ -55,37 +61,31 @@ def _get_expr_name(expr: NodeExpr):
 
 
 class BitMLNode:
-    def __init__(
-        self,
-        node_id: str,
-        expression: NodeExpr,
-        auths: Collection[str],
-        afters: Collection[int],
-        funds: Decimal,
-        children: Sequence["BitMLNode"] | None = None,
-        parent: Sequence["BitMLNode"] | None = None,
-    ) -> None:
-        assert_(
-            isinstance(expression, NodeExpr),
-            f"{expression!r} not a valid node expression",
-        )
-        self.__node_id = node_id
-        self.__expression = expression
-        self.__auths: AbstractSet[str] = self.__process_auths(auths)
-        self.__afters: AbstractSet[int] = self.__process_afters(afters)
-        self.__funds = funds
-        self.__children: Sequence[BitMLNode] | None = self.__process_children(children)
-        self.__parent: BitMLNode | None = parent
+    """
+    A view of a node of a contract graph.
+
+    The data of the nodes are stored by the graph, in columns indexed by the position of the node; a view is created
+    once per node, so two views of the same node are the same object.
+    """
 
-        self.__expr_name = _get_expr_name(self.__expression)
+    __slots__ = ("__graph", "__index")
+
+    def __init__(self, graph: "BitMLGraph", index: int) -> None:
+        self.__graph = graph
+        self.__index = index
+
+    @property
+    def index(self) -> int:
+        """The position of the node in the nodes of the graph."""
+        return self.__index
 
     @property
     def node_id(self) -> str:
-        return self.__node_id
+        return f"node_{self.__index}"
 
     @property
     def expr_name(self) -> str:
-        return self.__expr_name
+        return self.__graph._get_expr_name(self.__index)
 
     @property
     def full_node_id(self) -> str:
@@ -93,78 +93,214 @@ class BitMLNode:
 
     @property
     def expression(self) -> BitMLExpression:
-        return self.__expression
+        return self.__graph._get_expression(self.__index)
 
     @property
     def auths(self) -> AbstractSet[str]:
-        return self.__auths
+        return self.__graph._get_auths(self.__index)
 
     @property
     def afters(self) -> AbstractSet[int]:
-        return self.__afters
+        return self.__graph._get_afters(self.__index)
 
     @property
     def children(self) -> Sequence["BitMLNode"]:
         if self.is_leaf_node:
             raise ValueError("node is a leaf node, it does not have children")
-        return self.__children
+        return self.__graph._get_children(self.__index)
 
     @property
     def is_leaf_node(self) -> bool:
-        return self.__children is None
+        return self.__graph._is_leaf(self.__index)
 
     @property
-    def parent(self) -> "BitMLNode":
-        return self.__parent
-
-    @parent.setter
-    def parent(self, parent: "BitMLNode") -> None:
-        if self.__parent is not None:
-            raise ValueError("parent node already set")
-        self.__parent = parent
+    def parent(self) -> "BitMLNode | None":
+        return self.__graph._get_parent(self.__index)
 
     @property
     def funds(self) -> Decimal:
-        return self.__funds
+        return self.__graph._get_funds(self.__index)
+
+
+def _check_auths(auths: Collection[str]) -> None:
+    for participant_id in auths:
+        try:
+            (
+                StringConstraint(pattern=NAME_PATTERN),
+                NotInSet(KEYWORDS).process(participant_id),
+            )
+        except ValidationError:
+            raise ValueError(f"participant id {participant_id!r} is not valid")
+
+
+def _check_afters(afters: Collection[int]) -> None:
+    if any(i < 0 for i in afters):
+        raise ValueError("all timeouts must be non-negative")
+
+
+class _Interner(Generic[_T]):
+    """Assign a dense integer id to each distinct value."""
+
+    def __init__(self) -> None:
+        self.__values: list[_T] = []
+        self.__ids: dict[_T, int] = {}
+
+    def get_id(self, value: _T) -> int:
+        value_id = self.__ids.get(value)
+        if value_id is None:
+            value_id = self.__ids[value] = len(self.__values)
+            self.__values.append(value)
+        return value_id
+
+    def get_value(self, value_id: int) -> _T:
+        return self.__values[value_id]
 
-    def __process_auths(self, auths: Collection[str]) -> frozenset[str]:
-        for participant_id in auths:
-            try:
-                (
-                    StringConstraint(pattern=NAME_PATTERN),
-                    NotInSet(KEYWORDS).process(participant_id),
-                )
-            except ValidationError:
-                raise ValueError(f"participant id {participant_id!r} is not valid")
-
-        return frozenset(auths)
-
-    def __process_afters(self, afters: Collection[int]) -> frozenset[int]:
-        if any(i < 0 for i in afters):
-            raise ValueError("all timeouts must be non-negative")
-        return frozenset(afters)
-
-    def __process_children(
-        self, children: Sequence["BitMLNode"] | None
-    ) -> Sequence["BitMLNode"] | None:
-        if children is not None and len(children) == 0:
-            raise ValueError("got empty list of children")
-        return children
+
+# a chain of guards: the innermost guard, and the chain of the outer ones (None if there are no guards); the branches
+# share the chains of their ancestors, so adding a guard takes constant time, whatever the depth of the expression
+_Chain = Union[tuple[Any, "_Chain"], None]
+
+# the guards and the funds of the node of an expression: the authorizations, the timeouts, and the available funds
+_NodeContext = tuple[_Chain, _Chain, Decimal]
+
+
+def _to_chain(items: Sequence[Any]) -> _Chain:
+    chain: _Chain = None
+    for item in items:
+        chain = (item, chain)
+    return chain
+
+
+def _from_chain(chain: _Chain) -> tuple[Any, ...]:
+    """Get the guards of a chain, from the outermost."""
+    items = []
+    while chain is not None:
+        item, chain = chain
+        items.append(item)
+    items.reverse()
+    return tuple(items)
+
+
+_GUARD_CLASSES = (BitMLAuthorizationExpression, BitMLAfterExpression)
+
+
+class _BitMLGraphBuilder(Visitor[_NodeContext, int]):
+    """
+    Add the nodes of a contract expression to a graph, without recursion.
+
+    The guards of an expression are accumulated in the context passed to its branch; the node of an expression is
+    created when the expression is exited, after the nodes of its children, and the result is the position of the node.
+    """
+
+    def __init__(self, graph: "BitMLGraph") -> None:
+        self.__graph = graph
+
+    def enter(self, expr: BitMLExpression, context: _NodeContext) -> Children[_NodeContext]:
+        return self._enter_implementations(expr)(self, expr, context)  # type: ignore[no-any-return]
+
+    def exit(self, expr: BitMLExpression, context: _NodeContext, results: Sequence[int]) -> int:
+        if expr.__class__ in _GUARD_CLASSES:
+            # the guards do not have a node: the node is the one of the guarded branch
+            return results[0]
+        auths_chain, afters_chain, available_funds = context
+        children = None if expr.__class__ is BitMLWithdrawExpression else results
+        return self.__graph._create_node(
+            expr, _from_chain(auths_chain), _from_chain(afters_chain), available_funds, children=children
+        )
+
+    @singledispatchmethod
+    def enter_expression(self, obj: object, context: _NodeContext) -> Children[_NodeContext]:
+        raise CaseNotHandledError(BitMLGraph.build_contract_graph.__name__, obj)
+
+    @enter_expression.register
+    def enter_withdraw(self, expr: BitMLWithdrawExpression, context: _NodeContext) -> Children[_NodeContext]:
+        return ()
+
+    @enter_expression.register
+    def enter_auth(self, expr: BitMLAuthorizationExpression, context: _NodeContext) -> Children[_NodeContext]:
+        auths_chain, afters_chain, available_funds = context
+        return ((expr.branch, ((expr.participant_id, auths_chain), afters_chain, available_funds)),)
+
+    @enter_expression.register
+    def enter_after(self, expr: BitMLAfterExpression, context: _NodeContext) -> Children[_NodeContext]:
+        auths_chain, afters_chain, available_funds = context
+        return ((expr.branch, (auths_chain, (expr.timeout, afters_chain), available_funds)),)
+
+    @enter_expression.register
+    def enter_choice(self, expr: BitMLChoiceExpression, context: _NodeContext) -> Children[_NodeContext]:
+        auths_chain, afters_chain, available_funds = context
+        assert_(
+            auths_chain is None,
+            f"'authentication' guards were not expected for a choice expression, got {_from_chain(auths_chain)!r}",
+        )
+        assert_(
+            afters_chain is None,
+            f"'after' guards were not expected for a choice expression, got {_from_chain(afters_chain)!r}",
+        )
+        return [(choice, (None, None, available_funds)) for choice in expr.choices]
+
+    @enter_expression.register
+    def enter_split(self, expr: BitMLSplitExpression, context: _NodeContext) -> Children[_NodeContext]:
+        return [(split_branch.branch, (None, None, split_branch.amount)) for split_branch in expr.branches]
+
+    @enter_expression.register
+    def enter_reveal(self, expr: BitMLRevealExpression, context: _NodeContext) -> Children[_NodeContext]:
+        return ((expr.branch, (None, None, context[2])),)
+
+    @enter_expression.register(BitMLPutExpression)
+    @enter_expression.register(BitMLPutRevealExpression)
+    def enter_put_like_expr(
+        self, expr: BitMLPutExpression | BitMLPutRevealExpression, context: _NodeContext
+    ) -> Children[_NodeContext]:
+        new_funds = context[2]
+        for deposit_id in expr.deposit_ids:
+            new_funds += self.__graph.volatile_deposits_by_id[deposit_id]
+        return ((expr.branch, (None, None, new_funds)),)
+
+    _enter_implementations = DispatchCache(enter_expression)
 
 
 class BitMLGraph:
+    """
+    The graph of the nodes of a BitML contract, in a columnar form.
+
+    The nodes are numbered in order of creation (the children of a node come before it). For each node, the graph
+    stores its expression, the position of its parent, the range of its children in a flat array of positions, its
+    authorizations as a bitset over the interned participant ids, and the ids of its interned set of timeouts and of
+    its interned funds. BitMLNode objects are views over these columns.
+    """
+
     def __init__(self, bitml_contract: BitMLContract) -> None:
         self.__contract = bitml_contract
 
-        self.__nodes: list[BitMLNode] = []
+        self.__expressions: list[NodeExpr] = []
+        self.__expr_name_ids = bytearray()
+        self.__parents = array("q")
+        # the children of the node i are at the positions from self.__children_offsets[i] to
+        # self.__children_offsets[i + 1] (excluded) of self.__children; leaf nodes have no children
+        self.__children_offsets = array("q", [0])
+        self.__children = array("q")
+        self.__leaves = bytearray()
+        self.__auths_bitsets: list[int] = []
+        self.__afters_ids = array("q")
+        self.__funds_ids = array("q")
+
+        self.__participant_ids = _Interner[str]()
+        self.__afters = _Interner[frozenset[int]]()
+        self.__funds = _Interner[Decimal]()
+        self.__auths_by_bitset: dict[int, frozenset[str]] = {}
         self.__timeouts: set[int] = set()
 
-        self.__root_node = self.build_contract_graph(
+        root_index = self.build_contract_graph(
             bitml_contract.contract_root,
             tuple(),
             tuple(),
             self.total_persistent_deposits,
         )
+        self.__nodes = tuple(BitMLNode(self, index) for index in range(len(self.__expressions)))
+        self.__root_node = self.__nodes[root_index]
+        # the tuples of the children of the nodes, built on first access
+        self.__children_tuples: list[tuple[BitMLNode, ...] | None] = [None] * len(self.__nodes)
 
     @property
     def contract(self) -> BitMLContract:
@@ -172,7 +308,11 @@ class BitMLGraph:
 
     @property
     def nodes(self) -> tuple[BitMLNode, ...]:
-        return tuple(self.__nodes)
+        return self.__nodes
+
+    def get_node_index(self, node: BitMLNode) -> int:
+        """Get the position of a node in the nodes of the graph."""
+        return node.index
 
     @property
     def timeouts(self) -> AbstractSet[int]:
@@ -218,178 +358,94 @@ class BitMLGraph:
             if isinstance(vd, BitMLVolatileDepositPrecondition)
         }
 
-    def _create_node(
-        self,
-        expression: NodeExpr,
-        auths: Collection[str],
-        afters: Collection[int],
-        funds: Decimal,
-        children: Sequence["BitMLNode"] | None = None,
-        parent: BitMLNode | None = None,
-    ) -> BitMLNode:
-        new_id = len(self.__nodes)
-        node_id = f"node_{new_id}"
-        node = BitMLNode(node_id, expression, auths, afters, funds, children, parent)
-        self.__nodes.append(node)
-        self.__timeouts.update(afters)
-        return node
-
-    @singledispatchmethod
-    def build_contract_graph(
-        self,
-        obj: object,
-        current_auths: tuple[str],
-        current_afters: tuple[int],
-        available_funds: Decimal,
-    ) -> BitMLNode:
-        raise CaseNotHandledError(boolcond_to_string.__name__, obj)  # type: ignore[attr-defined]
+    def _get_expression(self, index: int) -> NodeExpr:
+        return self.__expressions[index]
 
-    @build_contract_graph.register
-    def build_contract_graph_withdraw(
-        self,
-        expr: BitMLWithdrawExpression,
-        current_auths: tuple[str],
-        current_afters: tuple[int],
-        available_funds: Decimal,
-    ) -> BitMLNode:
-        node = self._create_node(expr, current_auths, current_afters, available_funds)
-        return node
+    def _get_expr_name(self, index: int) -> str:
+        return _EXPR_NAMES[self.__expr_name_ids[index]]
 
-    @build_contract_graph.register
-    def build_contract_graph_auth(
-        self,
-        expr: BitMLAuthorizationExpression,
-        current_auths: tuple[str],
-        current_afters: tuple[int],
-        available_funds: Decimal,
-    ) -> BitMLNode:
-        new_auths = current_auths + tuple([expr.participant_id])
-        node = self.build_contract_graph(
-            expr.branch, new_auths, current_afters, available_funds
-        )
-        return node
-
-    @build_contract_graph.register
-    def build_contract_graph_after(
-        self,
-        expr: BitMLAfterExpression,
-        current_auths: tuple[str],
-        current_afters: tuple[int],
-        available_funds: Decimal,
-    ) -> BitMLNode:
-        new_afters = current_afters + tuple([expr.timeout])
-        node = self.build_contract_graph(
-            expr.branch, current_auths, new_afters, available_funds
-        )
-        return node
-
-    @build_contract_graph.register
-    def build_contract_graph_choice(
-        self,
-        expr: BitMLChoiceExpression,
-        current_auths: tuple[str],
-        current_afters: tuple[int],
-        available_funds: Decimal,
-    ) -> BitMLNode:
-        assert_(
-            len(current_auths) == 0,
-            f"'authentication' guards were not expected for a choice expression, got {current_auths!r}",
-        )
-        assert_(
-            len(current_afters) == 0,
-            f"'after' guards were not expected for a choice expression, got {current_auths!r}",
-        )
+    def _get_auths(self, index: int) -> AbstractSet[str]:
+        bitset = self.__auths_bitsets[index]
+        auths = self.__auths_by_bitset.get(bitset)
+        if auths is None:
+            auths = frozenset(
+                self.__participant_ids.get_value(participant_index)
+                for participant_index in range(bitset.bit_length())
+                if bitset >> participant_index & 1
+            )
+            self.__auths_by_bitset[bitset] = auths
+        return auths
 
-        children = [
-            self.build_contract_graph(choice, tuple(), tuple(), available_funds)
-            for choice in expr.choices
-        ]
-        node = self._create_node(
-            expr, current_auths, current_afters, available_funds, children=children
-        )
+    def _get_afters(self, index: int) -> AbstractSet[int]:
+        return self.__afters.get_value(self.__afters_ids[index])
 
-        for child in children:
-            child.parent = node
+    def _get_funds(self, index: int) -> Decimal:
+        return self.__funds.get_value(self.__funds_ids[index])
 
-        return node
+    def _is_leaf(self, index: int) -> bool:
+        return bool(self.__leaves[index])
 
-    @build_contract_graph.register
-    def build_contract_graph_split(
-        self,
-        expr: BitMLSplitExpression,
-        current_auths: tuple[str],
-        current_afters: tuple[int],
-        available_funds: Decimal,
-    ) -> BitMLNode:
-        children = [
-            self.build_contract_graph(
-                split_branch.branch, tuple(), tuple(), split_branch.amount
-            )
-            for split_branch in expr.branches
-        ]
-        node = self._create_node(
-            expr, current_auths, current_afters, available_funds, children=children
-        )
-
-        for child in children:
-            child.parent = node
-        return node
+    def _get_children(self, index: int) -> tuple[BitMLNode, ...]:
+        children = self.__children_tuples[index]
+        if children is None:
+            nodes = self.__nodes
+            start, end = self.__children_offsets[index], self.__children_offsets[index + 1]
+            children = tuple(nodes[child_index] for child_index in self.__children[start:end])
+            self.__children_tuples[index] = children
+        return children
 
-    @build_contract_graph.register
-    def build_contract_graph_put(
-        self,
-        expr: BitMLPutExpression,
-        current_auths: tuple[str],
-        current_afters: tuple[int],
-        available_funds: Decimal,
-    ) -> BitMLNode:
-        return self._build_contract_graph_put_like_expr(
-            expr, current_auths, current_afters, available_funds
-        )
+    def _get_parent(self, index: int) -> BitMLNode | None:
+        parent_index = self.__parents[index]
+        return self.__nodes[parent_index] if parent_index >= 0 else None
 
-    @build_contract_graph.register
-    def build_contract_graph_reveal(
+    def _create_node(
         self,
-        expr: BitMLRevealExpression,
-        current_auths: tuple[str],
-        current_afters: tuple[int],
-        available_funds: Decimal,
-    ) -> BitMLNode:
-        child_node = self.build_contract_graph(
-            expr.branch, tuple(), tuple(), available_funds
-        )
-        node = self._create_node(
-            expr, current_auths, current_afters, available_funds, children=[child_node]
-        )
-        child_node.parent = node
-        return node
+        expression: NodeExpr,
+        auths: Collection[str],
+        afters: Collection[int],
+        funds: Decimal,
+        children: Sequence[int] | None = None,
+    ) -> int:
+        """Add a node, and make it the parent of its children; return its position."""
+        if not isinstance(expression, NodeExpr):
+            # the message is built only on failure: the representation of an expression is as large as its subtree
+            raise AssertionError(f"{expression!r} not a valid node expression")
+        _check_auths(auths)
+        _check_afters(afters)
+        if children is not None and len(children) == 0:
+            raise ValueError("got empty list of children")
+        # the checks are done before any column is updated, so that a failure leaves the graph unchanged
+        if children is not None and (
+            len(set(children)) < len(children) or any(self.__parents[child_index] != -1 for child_index in children)
+        ):
+            raise ValueError("parent node already set")
 
-    @build_contract_graph.register
-    def build_contract_graph_put_reveal(
-        self,
-        expr: BitMLPutRevealExpression,
-        current_auths: tuple[str],
-        current_afters: tuple[int],
-        available_funds: Decimal,
-    ) -> BitMLNode:
-        return self._build_contract_graph_put_like_expr(
-            expr, current_auths, current_afters, available_funds
-        )
+        index = len(self.__expressions)
+        self.__expressions.append(expression)
+        self.__expr_name_ids.append(_EXPR_NAMES.index(_get_expr_name(expression)))
+        self.__parents.append(-1)
+        self.__leaves.append(children is None)
+        for child_index in children or ():
+            self.__parents[child_index] = index
+            self.__children.append(child_index)
+        self.__children_offsets.append(len(self.__children))
+
+        bitset = 0
+        for participant_id in auths:
+            bitset |= 1 << self.__participant_ids.get_id(participant_id)
+        self.__auths_bitsets.append(bitset)
+        self.__afters_ids.append(self.__afters.get_id(frozenset(afters)))
+        self.__funds_ids.append(self.__funds.get_id(funds))
+        self.__timeouts.update(afters)
+        return index
 
-    def _build_contract_graph_put_like_expr(
+    def build_contract_graph(
         self,
-        expr: BitMLPutRevealExpression | BitMLPutExpression,
-        current_auths: tuple[str],
-        current_afters: tuple[int],
+        expr: BitMLExpression,
+        current_auths: tuple[str, ...],
+        current_afters: tuple[int, ...],
         available_funds: Decimal,
-    ) -> BitMLNode:
-        new_funds = available_funds
-        for deposit_id in expr.deposit_ids:
-            new_funds += self.volatile_deposits_by_id[deposit_id]
-
-        child_node = self.build_contract_graph(expr.branch, tuple(), tuple(), new_funds)
-        node = self._create_node(
-            expr, current_auths, current_afters, available_funds, children=[child_node]
-        )
-        child_node.parent = node
-        return node
+    ) -> int:
+        """Add the nodes of a contract expression, given the guards and the funds of its node; return its position."""
+        context = (_to_chain(current_auths), _to_chain(current_afters), available_funds)
+        return _BitMLGraphBuilder(self).visit(expr, context)
@@ -1,4 +1,5 @@
 from collections.abc import Collection, Generator, Mapping, Sequence
+from functools import cached_property
 from typing import AbstractSet, Generic, TypeVar, cast
 
 from bitml2mcmas.bitml.ast import (
@@ -9,7 +10,7 @@ from bitml2mcmas.bitml.ast import (
 from bitml2mcmas.bitml.core import BitMLContract
 from bitml2mcmas.bitml.custom_types import Name
 from bitml2mcmas.compiler._private.contract_graph import BitMLGraph
-from bitml2mcmas.compiler._private.terms import TermNaming
+from bitml2mcmas.compiler._private.terms import ChoiceEncoding, TermNaming, TimeEncoding
 from bitml2mcmas.helpers.misc import assert_
 from bitml2mcmas.mcmas.ast import Protocol
 from bitml2mcmas.mcmas.custom_types import McmasId
@@ -23,8 +24,15 @@ _HasParticipantIdType = TypeVar("_HasParticipantIdType", bound=_HasParticipantId
 
 
 class ContractWrapper:
-    def __init__(self, contract: BitMLContract) -> None:
+    def __init__(
+        self,
+        contract: BitMLContract,
+        time_encoding: TimeEncoding = TimeEncoding.INTEGER,
+        choice_encoding: ChoiceEncoding = ChoiceEncoding.SIBLINGS,
+    ) -> None:
         self.__contract = contract
+        self.__time_encoding = time_encoding
+        self.__choice_encoding = choice_encoding
 
         self.__participant_ids = self._get_participant_ids()
         self.__participant_ids_with_prefix = self._get_participant_ids_with_prefix()
@@ -145,6 +153,34 @@ class ContractWrapper:
     def has_timeouts(self) -> bool:
         return len(self.graph.timeouts) > 0
 
+    @property
+    def time_encoding(self) -> TimeEncoding:
+        return self.__time_encoding
+
+    @property
+    def choice_encoding(self) -> ChoiceEncoding:
+        return self.__choice_encoding
+
+    @cached_property
+    def time_regions(self) -> Sequence[int]:
+        """Get the start of each time region: zero and the distinct timeouts, in increasing order."""
+        return tuple(sorted(self.graph.timeouts | {0}))
+
+    @cached_property
+    def time_region_by_timeout(self) -> Mapping[int, int]:
+        """Get the index of the time region that starts at each timeout."""
+        return {timeout: region for region, timeout in enumerate(self.time_regions)}
+
+    def get_time_value(self, timeout: int) -> int:
+        """Get the value of the time variable when the timeout expires."""
+        if self.__time_encoding == TimeEncoding.REGIONS:
+            return self.time_region_by_timeout[timeout]
+        return timeout
+
+    @property
+    def max_time_value(self) -> int:
+        return self.get_time_value(self.graph.max_timeout)
+
     @property
     def has_secrets(self) -> bool:
         return len(self.secrets) > 0
@@ -1,8 +1,7 @@
 """Class to handle the building of a MCMAS program from a BitML contract."""
 
-import operator
+import dataclasses
 from collections.abc import Collection, Sequence
-from functools import reduce
 from typing import AbstractSet
 
 from bitml2mcmas.mcmas.ast import (
@@ -17,11 +16,25 @@ from bitml2mcmas.mcmas.ast import (
     Semantics,
     VarDefinition,
 )
-from bitml2mcmas.mcmas.boolcond import BooleanCondition
+from bitml2mcmas.mcmas.boolcond import BooleanCondition, conjunction
 from bitml2mcmas.mcmas.custom_types import McmasId
 from bitml2mcmas.mcmas.formula import FormulaType
 
 
+@dataclasses.dataclass(frozen=True)
+class BuilderStatistics:
+    """The number of objects added to a MCMAS builder, summed over the environment and the agents."""
+
+    vars: int = 0
+    actions: int = 0
+    protocol_rules: int = 0
+    evolution_rules: int = 0
+    initial_state_conditions: int = 0
+    evaluation_rules: int = 0
+    groups: int = 0
+    formulae: int = 0
+
+
 class EnvBuilder:
     def __init__(self) -> None:
         self.__env_obs_var_definitions = []
@@ -262,7 +275,27 @@ class MCMASBuilder:
 
     @property
     def initial_states_boolean_condition(self) -> BooleanCondition:
-        return reduce(operator.and_, self.__initial_states_boolean_conditions)
+        return conjunction(self.__initial_states_boolean_conditions)
+
+    @property
+    def statistics(self) -> BuilderStatistics:
+        """Count the objects added so far; the protocol rules do not include the 'Other' rules."""
+        env = self.__env_builder
+        agents = self.__agent_builders_by_name.values()
+        return BuilderStatistics(
+            vars=len(env.env_obs_var_definitions)
+            + len(env.env_var_definitions)
+            + sum(len(agent.agent_var_definitions) for agent in agents),
+            actions=len(env.env_actions) + sum(len(agent.agent_actions) for agent in agents),
+            protocol_rules=len(env.env_protocol_rules or ())
+            + sum(len(agent.agent_protocol_rules) for agent in agents),
+            evolution_rules=len(env.env_evolution_definition)
+            + sum(len(agent.agent_evolution_definition) for agent in agents),
+            initial_state_conditions=len(self.__initial_states_boolean_conditions),
+            evaluation_rules=len(self.__evaluation_rules),
+            groups=len(self.__groups),
+            formulae=len(self.__formulae),
+        )
 
     @property
     def evaluation_rules(self) -> Sequence[EvaluationRule]:
@@ -1,6 +1,5 @@
-import operator
-from functools import reduce
-from typing import cast
+from functools import cached_property
+from typing import AbstractSet, Callable, Hashable
 
 from bitml2mcmas.bitml.ast import BitMLSecretPrecondition
 from bitml2mcmas.compiler._private.contract_wrapper import ContractWrapper
@@ -22,14 +21,33 @@ from bitml2mcmas.mcmas.boolcond import (
     EqualTo,
     FalseBoolValue,
     IdAtom,
-    TrueBoolValue, OrBooleanCondition,
+    TrueBoolValue,
+    conjunction,
+    disjunction,
 )
 from bitml2mcmas.mcmas.custom_types import McmasId
 
 
 class McmasObjects:
+    """
+    The MCMAS objects used by many transformers, built once per compilation.
+
+    The results are memoized, so the same condition is the same object wherever it is used; an instance is meant to
+    be shared by all the transformers of a compilation, and the caches do not outlive it.
+    """
+
     def __init__(self, wrapper: ContractWrapper) -> None:
         self.__wrapper = wrapper
+        # the memoized conditions, by method name and argument (participant id, secret or action), since many transformers
+        # build them
+        self.__conditions: dict[tuple[str, Hashable], BooleanCondition] = {}
+
+    def __memo(self, key: tuple[str, Hashable], build: Callable[[], BooleanCondition]) -> BooleanCondition:
+        condition = self.__conditions.get(key)
+        if condition is None:
+            condition = build()
+            self.__conditions[key] = condition
+        return condition
 
     @property
     def wrapper(self):
@@ -38,159 +56,193 @@ class McmasObjects:
     def get_scheduling_action_for_agent(self, participant_id: str) -> McmasId:
         return TermNaming.scheduling_action_from_participant_id(participant_id)
 
-    @property
-    def scheduling_actions(self) -> set[McmasId]:
-        return set(
+    @cached_property
+    def scheduling_actions(self) -> AbstractSet[McmasId]:
+        return frozenset(
             TermNaming.scheduling_action_from_participant_id(participant_id)
             for participant_id in self.wrapper.participant_ids
         )
 
     def get_is_agent_scheduled_condition(self, participant_id: str) -> BooleanCondition:
-        scheduling_action_for_agent = self.get_scheduling_action_for_agent(
-            participant_id
-        )
-        is_agent_scheduled = EnvironmentActionEqualToConstraint(
-            scheduling_action_for_agent
-        )
-        return is_agent_scheduled
+        def build() -> BooleanCondition:
+            scheduling_action_for_agent = self.get_scheduling_action_for_agent(
+                participant_id
+            )
+            return EnvironmentActionEqualToConstraint(
+                scheduling_action_for_agent
+            )
+
+        return self.__memo(("get_is_agent_scheduled_condition", participant_id), build)
 
     def get_is_agent_scheduled_condition_for_env(
         self, participant_id: str
     ) -> BooleanCondition:
-        scheduling_action_for_agent = self.get_scheduling_action_for_agent(
-            participant_id
-        )
-        is_agent_scheduled = ActionEqualToConstraint(scheduling_action_for_agent)
-        return is_agent_scheduled
+        def build() -> BooleanCondition:
+            scheduling_action_for_agent = self.get_scheduling_action_for_agent(
+                participant_id
+            )
+            return ActionEqualToConstraint(scheduling_action_for_agent)
+
+        return self.__memo(("get_is_agent_scheduled_condition_for_env", participant_id), build)
 
     def get_agent_done_varname(self, participant_id: str) -> str:
         return TermNaming.agent_done_varname(participant_id)
 
     def get_agent_done_is_false_with_env(self, participant_id: str) -> BooleanCondition:
-        return EqualTo(
-            EnvironmentIdAtom(self.get_agent_done_varname(participant_id)), FalseBoolValue()
+        return self.__memo(
+            ("get_agent_done_is_false_with_env", participant_id),
+            lambda: EqualTo(
+                EnvironmentIdAtom(self.get_agent_done_varname(participant_id)), FalseBoolValue()
+            ),
         )
 
     def get_agent_done_is_false(self, participant_id: str) -> BooleanCondition:
-        return EqualTo(
-            IdAtom(self.get_agent_done_varname(participant_id)), FalseBoolValue()
+        return self.__memo(
+            ("get_agent_done_is_false", participant_id),
+            lambda: EqualTo(
+                IdAtom(self.get_agent_done_varname(participant_id)), FalseBoolValue()
+            ),
         )
 
     def get_agent_done_is_true(self, participant_id: str) -> BooleanCondition:
-        return EqualTo(
-            IdAtom(self.get_agent_done_varname(participant_id)), TrueBoolValue()
+        return self.__memo(
+            ("get_agent_done_is_true", participant_id),
+            lambda: EqualTo(
+                IdAtom(self.get_agent_done_varname(participant_id)), TrueBoolValue()
+            ),
         )
 
-    @property
+    @cached_property
     def all_agent_done_are_false(self) -> BooleanCondition:
         clauses = []
         for participant_id in self.wrapper.participant_ids:
             clauses.append(self.get_agent_done_is_false_with_env(participant_id))
-        return reduce(operator.and_, clauses)
+        return conjunction(clauses)
 
-    @property
+    @cached_property
     def all_agent_done_are_true(self) -> BooleanCondition:
         clauses = []
         for participant_id in self.wrapper.participant_ids:
             clauses.append(self.get_agent_done_is_true(participant_id))
-        return reduce(operator.and_, clauses)
+        return conjunction(clauses)
 
-    @property
+    @cached_property
     def contract_initialized_to_false_for_env(self) -> BooleanCondition:
         return EqualTo(IdAtom(CONTRACT_INITIALIZED), FalseBoolValue())
 
-    @property
+    @cached_property
     def contract_initialized_to_false(self):
         return EqualTo(EnvironmentIdAtom(CONTRACT_INITIALIZED), FalseBoolValue())
 
-    @property
+    @cached_property
     def contract_initialized_to_true_for_env(self) -> BooleanCondition:
         return EqualTo(IdAtom(CONTRACT_INITIALIZED), TrueBoolValue())
 
-    @property
+    @cached_property
     def contract_initialized_to_true(self) -> BooleanCondition:
         return EqualTo(EnvironmentIdAtom(CONTRACT_INITIALIZED), TrueBoolValue())
 
     def get_is_public_secret_committed(
         self, secret: BitMLSecretPrecondition
     ) -> BooleanCondition:
-        return EqualTo(
-            EnvironmentIdAtom(
-                TermNaming.secret_name_with_prefix_public(secret.secret_id)
+        return self.__memo(
+            ("get_is_public_secret_committed", secret),
+            lambda: EqualTo(
+                EnvironmentIdAtom(
+                    TermNaming.secret_name_with_prefix_public(secret.secret_id)
+                ),
+                IdAtom(PublicSecretValues.COMMITTED.value),
             ),
-            IdAtom(PublicSecretValues.COMMITTED.value),
         )
 
     def get_is_public_secret_revealed(self, secret: BitMLSecretPrecondition):
-        return EqualTo(
-            EnvironmentIdAtom(
-                TermNaming.secret_name_with_prefix_public(secret.secret_id)
+        return self.__memo(
+            ("get_is_public_secret_revealed", secret),
+            lambda: EqualTo(
+                EnvironmentIdAtom(
+                    TermNaming.secret_name_with_prefix_public(secret.secret_id)
+                ),
+                IdAtom(PublicSecretValues.VALID.value),
             ),
-            IdAtom(PublicSecretValues.VALID.value),
         )
 
     def get_is_public_secret_committed_for_env(
         self, secret: BitMLSecretPrecondition
     ) -> BooleanCondition:
-        return EqualTo(
-            IdAtom(TermNaming.secret_name_with_prefix_public(secret.secret_id)),
-            IdAtom(PublicSecretValues.COMMITTED.value),
+        return self.__memo(
+            ("get_is_public_secret_committed_for_env", secret),
+            lambda: EqualTo(
+                IdAtom(TermNaming.secret_name_with_prefix_public(secret.secret_id)),
+                IdAtom(PublicSecretValues.COMMITTED.value),
+            ),
         )
 
     def get_is_public_secret_not_committed(
         self, secret: BitMLSecretPrecondition
     ) -> BooleanCondition:
-        return EqualTo(
-            IdAtom(TermNaming.secret_name_with_prefix_public(secret.secret_id)),
-            IdAtom(PublicSecretValues.NOT_COMMITTED.value),
+        return self.__memo(
+            ("get_is_public_secret_not_committed", secret),
+            lambda: EqualTo(
+                IdAtom(TermNaming.secret_name_with_prefix_public(secret.secret_id)),
+                IdAtom(PublicSecretValues.NOT_COMMITTED.value),
+            ),
         )
 
-    @property
+    @cached_property
     def secret_all_committed_or_revealed_condition(self) -> BooleanCondition:
         if len(self.wrapper.secrets) == 0:
             raise ValueError("the contract does not have secrets")
 
         conditions = [
-            OrBooleanCondition(self.get_is_public_secret_committed(secret), self.get_is_public_secret_revealed(secret))
+            self.get_is_public_secret_committed(secret) | self.get_is_public_secret_revealed(secret)
             for secret in self.wrapper.secrets
         ]
-        return cast(BooleanCondition, reduce(operator.and_, conditions))
+        return conjunction(conditions)
 
-    @property
+    @cached_property
     def secret_all_committed_or_revealed_condition_for_env(self) -> BooleanCondition:
         if len(self.wrapper.secrets) == 0:
             raise ValueError("the contract does not have secrets")
 
         conditions = [
-            OrBooleanCondition(self.get_is_public_secret_committed_for_env(secret), self.get_is_public_secret_revealed_for_env(secret))
+            self.get_is_public_secret_committed_for_env(secret) | self.get_is_public_secret_revealed_for_env(secret)
             for secret in self.wrapper.secrets
         ]
-        return cast(BooleanCondition, reduce(operator.and_, conditions))
+        return conjunction(conditions)
 
     def get_is_private_secret_valid(
         self, secret: BitMLSecretPrecondition
     ) -> BooleanCondition:
-        return EqualTo(
-            IdAtom(TermNaming.secret_name_with_prefix_private(secret.secret_id)),
-            IdAtom(PrivateSecretValues.VALID.value),
+        return self.__memo(
+            ("get_is_private_secret_valid", secret),
+            lambda: EqualTo(
+                IdAtom(TermNaming.secret_name_with_prefix_private(secret.secret_id)),
+                IdAtom(PrivateSecretValues.VALID.value),
+            ),
         )
 
     def get_is_private_secret_invalid(
         self, secret: BitMLSecretPrecondition
     ) -> BooleanCondition:
-        return EqualTo(
-            IdAtom(TermNaming.secret_name_with_prefix_private(secret.secret_id)),
-            IdAtom(PrivateSecretValues.INVALID.value),
+        return self.__memo(
+            ("get_is_private_secret_invalid", secret),
+            lambda: EqualTo(
+                IdAtom(TermNaming.secret_name_with_prefix_private(secret.secret_id)),
+                IdAtom(PrivateSecretValues.INVALID.value),
+            ),
         )
 
     def get_is_private_secret_committed(
         self, secret: BitMLSecretPrecondition
     ) -> BooleanCondition:
-        return self.get_is_private_secret_valid(
-            secret
-        ) & self.get_is_private_secret_invalid(secret)
+        return self.__memo(
+            ("get_is_private_secret_committed", secret),
+            lambda: self.get_is_private_secret_valid(
+                secret
+            ) & self.get_is_private_secret_invalid(secret),
+        )
 
-    @property
+    @cached_property
     def last_action_equal_to_delay(self) -> BooleanCondition:
         return EqualTo(
             EnvironmentIdAtom(LAST_ACTION),
@@ -200,15 +252,18 @@ class McmasObjects:
     def get_some_scheduled_agent_calls_action_condition(
         self, action: str
     ) -> BooleanCondition:
-        clauses = []
-        for participant_id in self.wrapper.participant_ids:
-            agent_name = TermNaming.agent_name_from_participant_name(participant_id)
-            is_scheduled = self.get_is_agent_scheduled_condition_for_env(participant_id)
-            is_action_taken = AgentActionEqualToConstraint(agent_name, action)
-            clauses.append(is_scheduled & is_action_taken)
-        return reduce(operator.or_, clauses)
-
-    @property
+        def build() -> BooleanCondition:
+            clauses = []
+            for participant_id in self.wrapper.participant_ids:
+                agent_name = TermNaming.agent_name_from_participant_name(participant_id)
+                is_scheduled = self.get_is_agent_scheduled_condition_for_env(participant_id)
+                is_action_taken = AgentActionEqualToConstraint(agent_name, action)
+                clauses.append(is_scheduled & is_action_taken)
+            return disjunction(clauses)
+
+        return self.__memo(("get_some_scheduled_agent_calls_action_condition", action), build)
+
+    @cached_property
     def initialized_now_or_already_initialized(self) -> BooleanCondition:
         initialized_now = self.get_some_scheduled_agent_calls_action_condition(
             INITIALIZE_CONTRACT
@@ -217,7 +272,10 @@ class McmasObjects:
         return initialized_now | already_initialized
 
     def get_is_public_secret_revealed_for_env(self, secret):
-        return EqualTo(
-            IdAtom(TermNaming.secret_name_with_prefix_public(secret.secret_id)),
-            IdAtom(PublicSecretValues.VALID.value),
+        return self.__memo(
+            ("get_is_public_secret_revealed_for_env", secret),
+            lambda: EqualTo(
+                IdAtom(TermNaming.secret_name_with_prefix_public(secret.secret_id)),
+                IdAtom(PublicSecretValues.VALID.value),
+            ),
         )
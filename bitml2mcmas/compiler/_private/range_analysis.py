@@ -0,0 +1,163 @@
+"""Static analysis of the values that the funds variables can take."""
+
+import dataclasses
+from collections.abc import Callable, Iterable, Mapping
+from typing import AbstractSet
+
+from bitml2mcmas.bitml.ast import (
+    BitMLChoiceExpression,
+    BitMLPutExpression,
+    BitMLPutRevealExpression,
+    BitMLWithdrawExpression,
+)
+from bitml2mcmas.compiler._private.contract_graph import BitMLNode
+from bitml2mcmas.compiler._private.contract_wrapper import ContractWrapper
+from bitml2mcmas.compiler._private.terms import CONTRACT_FUNDS, TermNaming
+from bitml2mcmas.helpers.traversal import iter_nodes
+from bitml2mcmas.mcmas.ast import IntegerRangeVarType, InterpretedSystem, VarDefinition
+from bitml2mcmas.mcmas.boolcond import EnvironmentIdAtom, IntAtom, _BinaryBoolCondition
+from bitml2mcmas.mcmas.custom_types import McmasId
+
+
+def _sumset(sets: Iterable[AbstractSet[int]]) -> frozenset[int]:
+    result = frozenset([0])
+    for values in sets:
+        result = frozenset(left + right for left in result for right in values)
+    return result
+
+
+def get_nb_bits(var_type: IntegerRangeVarType) -> int:
+    """Get the number of bits needed to encode the values of an integer range."""
+    return (var_type.upper - var_type.lower).bit_length()
+
+
+def get_range(values: AbstractSet[int]) -> IntegerRangeVarType:
+    """Get the smallest integer range that contains the values (with at least two values, as ISPL requires)."""
+    lower, upper = min(values), max(values)
+    return IntegerRangeVarType(lower, max(upper, lower + 1))
+
+
+class FundsAnalysis:
+    """
+    Compute the values that the funds of the contract and the total deposits of the participants can take.
+
+    The funds move only when a node is executed: a withdraw moves its funds from the contract to a participant, and a
+    put (or a put-reveal) moves its volatile deposits from their owners to the contract. Every node is executed at most
+    once, after its parent; the children of a split can be executed independently, while at most one child of a choice
+    is executed. Hence, the changes of a variable caused by a subtree are computed bottom-up over the contract graph.
+    The computed values over-approximate the reachable ones (e.g. a volatile deposit put by two branches of a split is
+    counted twice), so they can be used to tighten the declared ranges.
+    """
+
+    def __init__(self, wrapper: ContractWrapper) -> None:
+        self.__wrapper = wrapper
+
+    def get_contract_funds_values(self) -> frozenset[int]:
+        initial_value = self.__wrapper.total_persistent_deposit_amount
+        return frozenset(initial_value + change for change in self.__get_changes(self.__get_contract_funds_change))
+
+    def get_participant_total_deposits_values(self, participant_id: str) -> frozenset[int]:
+        volatile_deposits = self.__wrapper.volatile_deposits_by_participant_id.get(participant_id, [])
+        initial_value = sum(int(deposit.amount) for deposit in volatile_deposits)
+
+        def get_change(node: BitMLNode) -> int:
+            return self.__get_participant_total_deposits_change(node, participant_id)
+
+        return frozenset(initial_value + change for change in self.__get_changes(get_change))
+
+    def __get_changes(self, get_change: Callable[[BitMLNode], int]) -> frozenset[int]:
+        """Get the possible changes of a variable, given the change caused by the execution of each node."""
+        changes_by_node: list[frozenset[int]] = []
+        graph = self.__wrapper.graph
+        # the children of a node are always created before it
+        for node in graph.nodes:
+            children_changes = (
+                [] if node.is_leaf_node else [changes_by_node[child.index] for child in node.children]
+            )
+            if isinstance(node.expression, BitMLChoiceExpression):
+                # a choice is never executed: at most one of its children is
+                changes = frozenset().union(*children_changes)
+            else:
+                change = get_change(node)
+                changes = frozenset([0]).union(change + value for value in _sumset(children_changes))
+            changes_by_node.append(changes)
+        return changes_by_node[graph.root_node.index]
+
+    def __get_contract_funds_change(self, node: BitMLNode) -> int:
+        expression = node.expression
+        if isinstance(expression, BitMLWithdrawExpression):
+            return -int(node.funds)
+        if isinstance(expression, (BitMLPutExpression, BitMLPutRevealExpression)):
+            return sum(
+                int(self.__wrapper.volatile_deposits_by_id[deposit_id].amount)
+                for deposit_id in expression.deposit_ids
+            )
+        return 0
+
+    def __get_participant_total_deposits_change(self, node: BitMLNode, participant_id: str) -> int:
+        expression = node.expression
+        if isinstance(expression, BitMLWithdrawExpression):
+            return int(node.funds) if expression.participant_id == participant_id else 0
+        if isinstance(expression, (BitMLPutExpression, BitMLPutRevealExpression)):
+            return -sum(
+                int(deposit.amount)
+                for deposit in (
+                    self.__wrapper.volatile_deposits_by_id[deposit_id] for deposit_id in expression.deposit_ids
+                )
+                if deposit.participant_id == participant_id
+            )
+        return 0
+
+
+def _get_compared_constants(system: InterpretedSystem) -> dict[McmasId, set[int]]:
+    """Get, for each environment variable, the integers in the comparisons of the evaluation rules that read it."""
+    result: dict[McmasId, set[int]] = {}
+    for node in iter_nodes(rule.condition for rule in system.evaluation_rules):
+        if not isinstance(node, _BinaryBoolCondition):
+            continue
+        operand_nodes = list(iter_nodes([node.left, node.right]))
+        constants = {operand.value for operand in operand_nodes if operand.__class__ is IntAtom}
+        for operand in operand_nodes:
+            if operand.__class__ is EnvironmentIdAtom:
+                result.setdefault(operand.attribute, set()).update(constants)
+    return result
+
+
+def _tighten_var_definitions(
+    var_definitions: Iterable[VarDefinition], values_by_varname: Mapping[McmasId, AbstractSet[int]]
+) -> list[VarDefinition]:
+    result = []
+    for var_definition in var_definitions:
+        values = values_by_varname.get(var_definition.varname)
+        if values is not None and isinstance(var_definition.vartype, IntegerRangeVarType):
+            var_definition = dataclasses.replace(var_definition, vartype=get_range(values))
+        result.append(var_definition)
+    return result
+
+
+def tighten_funds_ranges(system: InterpretedSystem, wrapper: ContractWrapper) -> InterpretedSystem:
+    """
+    Declare the funds of the contract and the total deposits of the participants with the smallest ranges.
+
+    MCMAS rejects the comparisons with integers out of the range of a variable: the ranges also contain the integers
+    compared with the variables in the evaluation rules.
+
+    :param system: the compiled interpreted system
+    :param wrapper: the wrapper of the compiled contract
+    :return: the interpreted system with the tightened ranges
+    """
+    analysis = FundsAnalysis(wrapper)
+    values_by_varname: dict[McmasId, set[int]] = {CONTRACT_FUNDS: set(analysis.get_contract_funds_values())}
+    for participant_id in wrapper.participant_ids:
+        varname = TermNaming.participant_total_deposits(participant_id)
+        values_by_varname[varname] = set(analysis.get_participant_total_deposits_values(participant_id))
+    for varname, constants in _get_compared_constants(system).items():
+        if varname in values_by_varname:
+            values_by_varname[varname].update(constants)
+
+    environment = system.environment
+    environment = dataclasses.replace(
+        environment,
+        obs_var_definitions=_tighten_var_definitions(environment.obs_var_definitions, values_by_varname),
+    )
+    return dataclasses.replace(system, environment=environment)
@@ -39,6 +39,22 @@ class BitMLExprStatus(ExtendedEnum):
     EXECUTED = "executed"
 
 
+# encodings of the time variable
+class TimeEncoding(ExtendedEnum):
+    # the time is the number of elapsed time units, from zero to the maximum timeout
+    INTEGER = "integer"
+    # the time is the index of the region between two consecutive distinct timeouts
+    REGIONS = "regions"
+
+
+# encodings of the mutual exclusion of the branches of a choice
+class ChoiceEncoding(ExtendedEnum):
+    # each branch checks that none of the other branches is executed
+    SIBLINGS = "siblings"
+    # each choice has a variable with the executed branch, if any, that the branches check
+    CHOSEN_BRANCH = "chosen_branch"
+
+
 # env vars
 PREVIOUS_SCHEDULED_AGENT = "previous_scheduled_agent"
 CONTRACT_FUNDS = "contract_funds"
@@ -146,6 +162,10 @@ class TermNaming:
     def expression_node_id_status(full_node_id: str) -> str:
         return f"status_{full_node_id}"
 
+    @staticmethod
+    def choice_chosen_branch_variable(full_node_id: str) -> str:
+        return f"chosen_{full_node_id}"
+
     @staticmethod
     def authorized_by_variable(full_node_id: str, participant_id: str) -> str:
         part_name = TermNaming.participant_name_with_prefix(participant_id)
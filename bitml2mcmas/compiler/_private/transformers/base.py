@@ -12,11 +12,14 @@ from bitml2mcmas.compiler._private.terms import TermNaming
 
 
 class Transformer(ABC):
-    def __init__(self, wrapper: ContractWrapper, builder: MCMASBuilder) -> None:
+    def __init__(
+        self, wrapper: ContractWrapper, builder: MCMASBuilder, objects: McmasObjects | None = None
+    ) -> None:
         self.__wrapper = wrapper
         self.__builder = builder
 
-        self.__obj = McmasObjects(self.wrapper)
+        # the objects are shared by the transformers of a compilation, so that they are built only once
+        self.__obj = objects if objects is not None else McmasObjects(self.wrapper)
 
     @property
     def wrapper(self) -> ContractWrapper:
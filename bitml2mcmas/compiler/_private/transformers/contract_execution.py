@@ -1,8 +1,7 @@
-import operator
 from abc import ABC, abstractmethod
 from collections import deque
 from collections.abc import Sequence
-from functools import reduce
+from functools import cached_property
 
 from bitml2mcmas.bitml.ast import (
     BitMLChoiceExpression,
@@ -19,9 +18,11 @@ from bitml2mcmas.compiler._private.mcmas_objects import McmasObjects
 from bitml2mcmas.compiler._private.terms import (
     CONTRACT_FUNDS,
     DELAY,
+    NONE,
     NOP,
     TIME,
     BitMLExprStatus,
+    ChoiceEncoding,
     PublicSecretValues,
     TermNaming,
 )
@@ -47,16 +48,30 @@ from bitml2mcmas.mcmas.boolcond import (
     IntAtom,
     SubtractExpr,
     TrueBoolValue,
+    conjunction,
+    disjunction,
 )
 
 
 class _AbstractBitMLNodeWrapper(ABC):
+    """
+    The MCMAS objects for the execution of a node.
+
+    The conditions are built once, when they are first needed; the wrappers of the other nodes (the parent and the
+    siblings) are taken from the index of the wrappers, if any, so that their conditions are shared too.
+    """
+
     def __init__(
-        self, node: BitMLNode, wrapper: ContractWrapper, objects: McmasObjects
+        self,
+        node: BitMLNode,
+        wrapper: ContractWrapper,
+        objects: McmasObjects,
+        node_wrappers: "BitMLNodeWrappers | None" = None,
     ):
         self.__node = node
         self.__wrapper = wrapper
         self.__objects = objects
+        self.__node_wrappers = node_wrappers
 
     @property
     def node(self):
@@ -70,7 +85,36 @@ class _AbstractBitMLNodeWrapper(ABC):
     def objects(self):
         return self.__objects
 
+    def _wrap(self, node: BitMLNode) -> "_AbstractBitMLNodeWrapper":
+        if self.__node_wrappers is not None:
+            return self.__node_wrappers.get(node)
+        return wrap(node, self.wrapper, self.objects)
+
+    @property
+    def is_choice_branch(self) -> bool:
+        return self.node.parent is not None and isinstance(self.node.parent.expression, BitMLChoiceExpression)
+
+    @property
+    def uses_chosen_branch(self) -> bool:
+        """Whether the node is a branch of a choice, and the branches of the choices check the chosen branch."""
+        return self.is_choice_branch and self.wrapper.choice_encoding == ChoiceEncoding.CHOSEN_BRANCH
+
     @property
+    def parent_chosen_branch_varname(self) -> str:
+        return TermNaming.choice_chosen_branch_variable(self.node.parent.full_node_id)
+
+    @cached_property
+    def is_no_branch_chosen(self) -> BooleanCondition:
+        """Whether no branch of the parent choice is chosen, for the protocols and the evaluation rules."""
+        return EqualTo(EnvironmentIdAtom(self.parent_chosen_branch_varname), IdAtom(NONE))
+
+    @cached_property
+    def is_other_branch_chosen(self) -> BooleanCondition:
+        """Whether another branch of the parent choice is chosen, for the protocols and the evaluation rules."""
+        chosen_branch = EnvironmentIdAtom(self.parent_chosen_branch_varname)
+        return ~EqualTo(chosen_branch, IdAtom(NONE)) & ~EqualTo(chosen_branch, IdAtom(self.node.full_node_id))
+
+    @cached_property
     def enabled_condition(self) -> BooleanCondition:
         condition = self.is_parent_executed_condition & self.is_disabled
         return self._apply_auth_and_after_conditions(condition)
@@ -124,7 +168,7 @@ class _AbstractBitMLNodeWrapper(ABC):
 
         return result
 
-    @property
+    @cached_property
     def auth_condition(self) -> BooleanCondition | None:
         if len(self.node.auths) == 0:
             return None
@@ -142,15 +186,15 @@ class _AbstractBitMLNodeWrapper(ABC):
             authorized_now = AgentActionEqualToConstraint(authorizer, authorize_action) & self.objects.get_is_agent_scheduled_condition_for_env(auth)
             conditions.append(already_authorized | authorized_now)
 
-        return reduce(operator.and_, conditions)
+        return conjunction(conditions)
 
-    @property
+    @cached_property
     def after_condition(self) -> BooleanCondition | None:
         if len(self.node.afters) == 0:
             return None
 
         # get maximum timeout of node
-        max_timeout = max(self.node.afters)
+        max_timeout = self.wrapper.get_time_value(max(self.node.afters))
         previous_t = max_timeout - 1
         time_greater_than_t = GreaterThanOrEqual(IdAtom(TIME), IntAtom(max_timeout))
         previous_time_and_delay = EqualTo(
@@ -172,38 +216,39 @@ class _AbstractBitMLNodeWrapper(ABC):
         return condition
 
     def _check_at_least_one_other_choice_children_executed(self) -> BooleanCondition | None:
-        assert self.node.parent is not None and type(self.node.parent.expression) == BitMLChoiceExpression
+        assert self.is_choice_branch
 
         # check if at least one operand of the parent's node choice expression has been executed.
         or_clauses = []
         for branch_node in self.node.parent.children:
             if branch_node == self.node:
                 continue
-            wrapped_branch = wrap(branch_node, self.wrapper, self.objects)
-            is_executed = wrapped_branch.is_executed_now_or_earlier
-            or_clauses.append(is_executed)
+            or_clauses.append(self._wrap(branch_node).is_executed_now_or_earlier)
 
-        disable_condition = reduce(operator.or_, or_clauses)
+        disable_condition = disjunction(or_clauses)
         return disable_condition
 
     def _check_all_other_choice_children_not_executed(self, condition: BooleanCondition) -> BooleanCondition:
-        if self.node.parent is None or type(self.node.parent.expression) != BitMLChoiceExpression:
+        if not self.is_choice_branch:
             # do nothing
             return condition
 
+        if self.uses_chosen_branch:
+            # the chosen branch variable is not checked: once another branch is chosen, this branch is disabled whatever
+            # its status variable
+            return condition
+
         # check if at least one operand of the parent's node choice expression has been executed.
         or_clauses = []
         for branch_node in self.node.parent.children:
             if branch_node == self.node:
                 continue
-            wrapped_branch = wrap(branch_node, self.wrapper, self.objects)
-            is_executed = wrapped_branch.is_executed_now_or_earlier
-            or_clauses.append(~is_executed)
+            or_clauses.append(self._wrap(branch_node).is_not_executed_now_or_earlier)
 
-        enable_condition = reduce(operator.and_, or_clauses)
+        enable_condition = conjunction(or_clauses)
         return condition & enable_condition
 
-    @property
+    @cached_property
     def is_disabled(self) -> BooleanCondition:
         return EqualTo(
             IdAtom(self.status_varname), IdAtom(BitMLExprStatus.DISABLED.value)
@@ -217,17 +262,17 @@ class _AbstractBitMLNodeWrapper(ABC):
     def exec_action_name(self) -> str:
         return TermNaming.exec_expression_node_id(self.node.full_node_id)
 
-    @property
+    @cached_property
     def is_already_executed(self) -> BooleanCondition:
         return EqualTo(
             IdAtom(self.status_varname), IdAtom(BitMLExprStatus.EXECUTED.value)
         )
 
-    @property
+    @cached_property
     def is_not_executed(self) -> BooleanCondition:
         return ~EqualTo(IdAtom(self.status_varname), IdAtom(BitMLExprStatus.EXECUTED.value))
 
-    @property
+    @cached_property
     def is_exec_action_called_from_any_participant(self) -> BooleanCondition:
         # any participant can append transaction on the blockchain
         clauses = []
@@ -243,22 +288,31 @@ class _AbstractBitMLNodeWrapper(ABC):
                 exec_parent_action_condition
                 & self.objects.get_is_agent_scheduled_condition_for_env(participant_id)
             )
-        return reduce(operator.or_, clauses)
+        return disjunction(clauses)
 
-    @property
+    @cached_property
     def is_executed_now_or_earlier(self):
         return (
             self.is_already_executed | self.is_exec_action_called_from_any_participant
         )
 
-    @property
+    @cached_property
+    def is_not_executed_now_or_earlier(self):
+        return ~self.is_executed_now_or_earlier
+
+    @cached_property
     def is_enabled(self):
         return EqualTo(
             EnvironmentIdAtom(self.status_varname),
             IdAtom(BitMLExprStatus.ENABLED.value),
         )
 
-    @property
+    @cached_property
+    def is_executable(self) -> BooleanCondition:
+        """The condition for the agents to execute the node."""
+        return self._get_has_status_condition(BitMLExprStatus.ENABLED)
+
+    @cached_property
     def is_parent_executed_condition(self) -> BooleanCondition:
         if self.node.parent is None:
             return self.objects.initialized_now_or_already_initialized
@@ -273,8 +327,7 @@ class _AbstractBitMLNodeWrapper(ABC):
         else:
             parent = self.node.parent
 
-        parent = wrap(parent, self.wrapper, self.objects)
-        is_executed_cond = parent.is_executed_now_or_earlier
+        is_executed_cond = self._wrap(parent).is_executed_now_or_earlier
         return is_executed_cond
 
     @property
@@ -289,14 +342,16 @@ class _AbstractBitMLNodeWrapper(ABC):
 
     @property
     def evolution_rules_is_disabled(self) -> Sequence[EvolutionRule]:
-        if self.node.parent is None or type(self.node.parent.expression) != BitMLChoiceExpression:
+        # with the chosen branch encoding, the status of the branches that lose the choice is not updated: the chosen
+        # branch variable disables them, in the same transition as it is set
+        if not self.is_choice_branch or self.uses_chosen_branch:
             return []
 
         effect = Effect(self.status_varname, IdAtom(BitMLExprStatus.DISABLED.value))
         condition = self._check_at_least_one_other_choice_children_executed()
         return [EvolutionRule([effect], condition)]
 
-    @property
+    @cached_property
     def get_exec_action_from_any_participant(self) -> BooleanCondition:
         clauses = []
         for participant_id in self.wrapper.participant_ids:
@@ -307,7 +362,7 @@ class _AbstractBitMLNodeWrapper(ABC):
             exec_action = self.exec_action_name
             is_exec_action = AgentActionEqualToConstraint(agent_name, exec_action)
             clauses.append(is_scheduled & is_exec_action)
-        condition = reduce(operator.or_, clauses)
+        condition = disjunction(clauses)
         return condition
 
     @property
@@ -326,20 +381,29 @@ class _AbstractBitMLNodeWrapper(ABC):
             result.append(EvolutionRule([effect], authorized_now & is_scheduled))
         return result
 
-    @property
+    @cached_property
     def evolution_rule_is_executed(self) -> EvolutionRule:
         effect = Effect(self.status_varname, IdAtom(BitMLExprStatus.EXECUTED.value))
         return EvolutionRule([effect], self.is_exec_action_called_from_any_participant)
 
+    def _get_has_status_condition(self, status: BitMLExprStatus) -> BooleanCondition:
+        condition = EqualTo(EnvironmentIdAtom(self.status_varname), IdAtom(status.value))
+        if not self.uses_chosen_branch or status == BitMLExprStatus.EXECUTED:
+            return condition
+
+        # the node is disabled as soon as another branch is chosen, whatever its status variable
+        if status == BitMLExprStatus.ENABLED:
+            return condition & self.is_no_branch_chosen
+        return condition | self.is_other_branch_chosen
+
     @property
     def evaluation_rules(self) -> Sequence[EvaluationRule]:
         result = []
 
         for status in BitMLExprStatus:
-            status_varname = TermNaming.expression_node_id_status(self.node.full_node_id)
             evaluation_rule = EvaluationRule(
                 f"{self.node.full_node_id}_is_{status.value}",
-                EqualTo(EnvironmentIdAtom(status_varname), IdAtom(status.value))
+                self._get_has_status_condition(status),
             )
             result.append(evaluation_rule)
 
@@ -392,20 +456,38 @@ class BitMLWithdrawNodeWrapper(_AbstractBitMLNodeWrapper):
     @property
     def evolution_rules_is_enabled(self) -> Sequence[EvolutionRule]:
         effect = Effect(self.status_varname, IdAtom(BitMLExprStatus.ENABLED.value))
-        condition = self.is_parent_executed_condition & self.is_disabled
-        condition = self._apply_auth_and_after_conditions(condition)
-        condition = self._check_all_other_choice_children_not_executed(condition)
+        condition = self._check_all_other_choice_children_not_executed(self.enabled_condition)
         return [EvolutionRule([effect], condition)]
 
 
 class BitMLChoiceNodeWrapper(_AbstractBitMLNodeWrapper):
+    @property
+    def uses_chosen_branch_variable(self) -> bool:
+        return self.wrapper.choice_encoding == ChoiceEncoding.CHOSEN_BRANCH
+
+    @property
+    def chosen_branch_varname(self) -> str:
+        return TermNaming.choice_chosen_branch_variable(self.node.full_node_id)
+
     @property
     def vardefs(self) -> list[VarDefinition]:
-        return []
+        if not self.uses_chosen_branch_variable:
+            return []
+        values = {NONE, *(branch_node.full_node_id for branch_node in self.node.children)}
+        return [VarDefinition(self.chosen_branch_varname, EnumVarType(values))]
 
     @property
     def evolution_rules_exec_action(self) -> Sequence[EvolutionRule]:
-        return []
+        if not self.uses_chosen_branch_variable:
+            return []
+        # the branch executed first is the chosen one
+        return [
+            EvolutionRule(
+                [Effect(self.chosen_branch_varname, IdAtom(branch_node.full_node_id))],
+                self._wrap(branch_node).is_exec_action_called_from_any_participant,
+            )
+            for branch_node in self.node.children
+        ]
 
     @property
     def evolution_rules_is_enabled(self) -> Sequence[EvolutionRule]:
@@ -417,7 +499,9 @@ class BitMLChoiceNodeWrapper(_AbstractBitMLNodeWrapper):
 
     @property
     def initial_conditions(self) -> Sequence[BooleanCondition]:
-        return []
+        if not self.uses_chosen_branch_variable:
+            return []
+        return [EqualTo(EnvironmentIdAtom(self.chosen_branch_varname), IdAtom(NONE))]
 
 
 class BitMLSplitNodeWrapper(_AbstractBitMLNodeWrapper):
@@ -428,9 +512,7 @@ class BitMLSplitNodeWrapper(_AbstractBitMLNodeWrapper):
     @property
     def evolution_rules_is_enabled(self) -> Sequence[EvolutionRule]:
         effect = Effect(self.status_varname, IdAtom(BitMLExprStatus.ENABLED.value))
-        condition = self.is_parent_executed_condition & self.is_disabled
-        condition = self._apply_auth_and_after_conditions(condition)
-        condition = self._check_all_other_choice_children_not_executed(condition)
+        condition = self._check_all_other_choice_children_not_executed(self.enabled_condition)
         return [EvolutionRule([effect], condition)]
 
 
@@ -484,16 +566,22 @@ class _AbstractBitMLPutRevealNodeWrapper(_AbstractBitMLNodeWrapper):
             for deposit_id in self.node.expression.deposit_ids
         )
 
-    @property
+    @cached_property
     def are_volatile_deposits_unspent(self) -> BooleanCondition:
         clauses = []
         for deposit_id in self.node.expression.deposit_ids:
             deposit_spent_var = TermNaming.deposit_spent_var_from_id(deposit_id)
             clauses.append(EqualTo(IdAtom(deposit_spent_var), FalseBoolValue()))
 
-        return reduce(operator.and_, clauses)
+        return conjunction(clauses)
 
-    @property
+    def _check_volatile_deposits_unspent(self, condition: BooleanCondition) -> BooleanCondition:
+        if not self.node.expression.deposit_ids:
+            # e.g. a putrevealif with no deposits: there is nothing to check
+            return condition
+        return condition & self.are_volatile_deposits_unspent
+
+    @cached_property
     def are_secrets_revealed(self) -> BooleanCondition:
         clauses = []
         for secret_id in self.node.expression.secret_ids:
@@ -514,7 +602,7 @@ class _AbstractBitMLPutRevealNodeWrapper(_AbstractBitMLNodeWrapper):
             )
             clauses.append(already_revealed | revealed_now)
 
-        return reduce(operator.and_, clauses)
+        return conjunction(clauses)
 
 
 class BitMLPutNodeWrapper(_AbstractBitMLPutRevealNodeWrapper):
@@ -525,10 +613,8 @@ class BitMLPutNodeWrapper(_AbstractBitMLPutRevealNodeWrapper):
     @property
     def evolution_rules_is_enabled(self) -> Sequence[EvolutionRule]:
         effect = Effect(self.status_varname, IdAtom(BitMLExprStatus.ENABLED.value))
-        condition = (
-            self.is_parent_executed_condition
-            & self.is_disabled
-            & self.are_volatile_deposits_unspent
+        condition = self._check_volatile_deposits_unspent(
+            self.is_parent_executed_condition & self.is_disabled
         )
         condition = self._apply_auth_and_after_conditions(condition)
         condition = self._check_all_other_choice_children_not_executed(condition)
@@ -561,11 +647,10 @@ class BitMLPutRevealNodeWrapper(_AbstractBitMLPutRevealNodeWrapper):
     @property
     def evolution_rules_is_enabled(self) -> Sequence[EvolutionRule]:
         effect = Effect(self.status_varname, IdAtom(BitMLExprStatus.ENABLED.value))
-        condition = (
+        condition = self._check_volatile_deposits_unspent(
             self.is_parent_executed_condition
             & self.is_disabled
             & self.are_secrets_revealed
-            & self.are_volatile_deposits_unspent
         )
         condition = self._apply_auth_and_after_conditions(condition)
         condition = self._check_all_other_choice_children_not_executed(condition)
@@ -573,32 +658,52 @@ class BitMLPutRevealNodeWrapper(_AbstractBitMLPutRevealNodeWrapper):
 
 
 def wrap(
-    node: BitMLNode, wrapper: ContractWrapper, objects: McmasObjects
+    node: BitMLNode,
+    wrapper: ContractWrapper,
+    objects: McmasObjects,
+    node_wrappers: "BitMLNodeWrappers | None" = None,
 ) -> _AbstractBitMLNodeWrapper:
     match node.expression:
         case BitMLWithdrawExpression():
-            return BitMLWithdrawNodeWrapper(node, wrapper, objects)
+            return BitMLWithdrawNodeWrapper(node, wrapper, objects, node_wrappers)
         case BitMLChoiceExpression():
-            return BitMLChoiceNodeWrapper(node, wrapper, objects)
+            return BitMLChoiceNodeWrapper(node, wrapper, objects, node_wrappers)
         case BitMLPutExpression():
-            return BitMLPutNodeWrapper(node, wrapper, objects)
+            return BitMLPutNodeWrapper(node, wrapper, objects, node_wrappers)
         case BitMLRevealExpression():
-            return BitMLRevealNodeWrapper(node, wrapper, objects)
+            return BitMLRevealNodeWrapper(node, wrapper, objects, node_wrappers)
         case BitMLPutRevealExpression():
-            return BitMLPutRevealNodeWrapper(node, wrapper, objects)
+            return BitMLPutRevealNodeWrapper(node, wrapper, objects, node_wrappers)
         case BitMLSplitExpression():
-            return BitMLSplitNodeWrapper(node, wrapper, objects)
+            return BitMLSplitNodeWrapper(node, wrapper, objects, node_wrappers)
         case _:
             raise ValueError(f"case {node.expression!r} not handled")
 
 
+class BitMLNodeWrappers:
+    """The wrappers of the nodes of the contract graph, indexed by node and created once, when first requested."""
+
+    def __init__(self, wrapper: ContractWrapper, objects: McmasObjects) -> None:
+        self.__wrapper = wrapper
+        self.__objects = objects
+        self.__wrappers: list[_AbstractBitMLNodeWrapper | None] = [None] * len(wrapper.graph.nodes)
+
+    def get(self, node: BitMLNode) -> _AbstractBitMLNodeWrapper:
+        index = self.__wrapper.graph.get_node_index(node)
+        wrapped = self.__wrappers[index]
+        if wrapped is None:
+            wrapped = wrap(node, self.__wrapper, self.__objects, self)
+            self.__wrappers[index] = wrapped
+        return wrapped
+
+
 class AddContractExecution(Transformer):
     def apply(self) -> None:
+        node_wrappers = BitMLNodeWrappers(self.wrapper, self.objects)
         for node in self.wrapper.graph.nodes:
-            self._handle_node(node)
+            self._handle_node(node_wrappers.get(node))
 
-    def _handle_node(self, node: BitMLNode):
-        wrapped = wrap(node, self.wrapper, self.objects)
+    def _handle_node(self, wrapped: _AbstractBitMLNodeWrapper):
 
         self.env.add_env_obs_vars(wrapped.vardefs)
         self.env.add_evolution_rules(wrapped.evolution_rules_exec_action)
@@ -641,7 +746,7 @@ class AddContractExecution(Transformer):
 
         ag_builder.add_action(wrapped_node.exec_action_name)
 
-        condition = wrapped_node.is_enabled
+        condition = wrapped_node.is_executable
 
         if self.wrapper.has_timeouts:
             condition &= self.objects.get_agent_done_is_false_with_env(participant_id)
@@ -1,6 +1,4 @@
-import operator
 from collections.abc import Sequence
-from functools import reduce
 
 
 from bitml2mcmas.compiler._private.terms import DELAY, LAST_ACTION, NOP, TermNaming, UNSET_ACTION
@@ -14,6 +12,7 @@ from bitml2mcmas.mcmas.boolcond import (
     EnvironmentIdAtom,
     EqualTo,
     IdAtom,
+    disjunction,
 )
 
 
@@ -106,7 +105,7 @@ class AddLastAction(Transformer):
             clauses.append(
                 self.objects.get_is_agent_scheduled_condition(other_participant_id)
             )
-        condition = reduce(operator.or_, clauses)
+        condition = disjunction(clauses)
 
         # ... or, if the agent is scheduled and the action is NOP...
         condition |= self.objects.get_is_agent_scheduled_condition(
@@ -1,7 +1,4 @@
-import operator
 from collections.abc import Sequence
-from functools import reduce
-from typing import cast
 
 from bitml2mcmas.bitml.ast import BitMLSecretPrecondition
 from bitml2mcmas.compiler._private.terms import (
@@ -27,6 +24,7 @@ from bitml2mcmas.mcmas.boolcond import (
     EnvironmentIdAtom,
     EqualTo,
     IdAtom,
+    conjunction,
 )
 from bitml2mcmas.mcmas.formula import AtomicFormula, OrFormula
 
@@ -157,7 +155,7 @@ class AddSecrets(Transformer):
             self.get_is_public_secret_committed(secret)
             for secret in self.wrapper.secrets
         ]
-        return cast(BooleanCondition, reduce(operator.and_, conditions))
+        return conjunction(conditions)
 
     def get_public_secret_initial_state_condition(
         self, secret: BitMLSecretPrecondition
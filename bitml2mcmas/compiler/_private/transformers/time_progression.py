@@ -1,6 +1,4 @@
-import operator
 from collections.abc import Sequence
-from functools import reduce
 
 from bitml2mcmas.compiler._private.terms import (
     DELAY,
@@ -34,6 +32,7 @@ from bitml2mcmas.mcmas.boolcond import (
     IntAtom,
     LessThan,
     TrueBoolValue, GreaterThanOrEqual,
+    conjunction,
 )
 from bitml2mcmas.mcmas.formula import AtomicFormula, FormulaType
 
@@ -77,7 +76,7 @@ class AddTimeProgression(Transformer):
     @property
     def time_vardef(self) -> VarDefinition:
         return VarDefinition(
-            TIME, IntegerRangeVarType(0, self.wrapper.graph.max_timeout)
+            TIME, IntegerRangeVarType(0, self.wrapper.max_time_value)
         )
 
     @property
@@ -86,20 +85,20 @@ class AddTimeProgression(Transformer):
 
     @property
     def time_less_than_max_timeout(self) -> BooleanCondition:
-        max_timeout = self.wrapper.graph.max_timeout
-        return LessThan(IdAtom(TIME), IntAtom(max_timeout))
+        max_time_value = self.wrapper.max_time_value
+        return LessThan(IdAtom(TIME), IntAtom(max_time_value))
 
     @property
     def time_less_than_max_timeout_with_env(self) -> BooleanCondition:
-        max_timeout = self.wrapper.graph.max_timeout
-        return LessThan(EnvironmentIdAtom(TIME), IntAtom(max_timeout))
+        max_time_value = self.wrapper.max_time_value
+        return LessThan(EnvironmentIdAtom(TIME), IntAtom(max_time_value))
 
     @property
     def time_equal_to_max(self) -> BooleanCondition:
-        return EqualTo(EnvironmentIdAtom(TIME), IntAtom(self.wrapper.graph.max_timeout))
+        return EqualTo(EnvironmentIdAtom(TIME), IntAtom(self.wrapper.max_time_value))
 
     def get_time_greater_than_x(self, timeout: int):
-        return GreaterThanOrEqual(EnvironmentIdAtom(TIME), IntAtom(timeout))
+        return GreaterThanOrEqual(EnvironmentIdAtom(TIME), IntAtom(self.wrapper.get_time_value(timeout)))
 
     @property
     def agent_done_vardefs(self) -> Sequence[VarDefinition]:
@@ -133,7 +132,7 @@ class AddTimeProgression(Transformer):
         time_less_than_max_timeout = self.time_less_than_max_timeout
         condition_clauses.append(time_less_than_max_timeout)
 
-        condition = reduce(operator.and_, condition_clauses)
+        condition = conjunction(condition_clauses)
         enabled_actions = {DELAY}
         return ProtocolRule(condition, enabled_actions)
 
@@ -141,6 +140,7 @@ class AddTimeProgression(Transformer):
     def evolution_rules_increase_time(self) -> Sequence[EvolutionRule]:
         result = []
 
+        # with the time regions, a delay jumps to the next region
         increase_time_condition = ActionEqualToConstraint(DELAY) & self.objects.all_agent_done_are_true & self.time_less_than_max_timeout
         effect = Effect(TIME, AddExpr(IdAtom(TIME), IntAtom(1)))
         result.append(EvolutionRule([effect], increase_time_condition))
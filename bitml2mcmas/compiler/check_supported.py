@@ -1,5 +1,6 @@
 """Check a BitML contract is supported by our compiler."""
 
+from collections.abc import Sequence
 from functools import singledispatch
 
 from bitml2mcmas.bitml.ast import (
@@ -21,96 +22,124 @@ from bitml2mcmas.bitml.ast import (
 from bitml2mcmas.bitml.core import BitMLContract
 from bitml2mcmas.bitml.exceptions import BitMLExpressionNotSupportedByCompilerError
 from bitml2mcmas.helpers.misc import CaseNotHandledError
+from bitml2mcmas.helpers.traversal import DispatchCache, visit_preorder
 
 
 @singledispatch
 def check_supported(obj: object) -> None:
-    raise CaseNotHandledError(boolcond_to_string.__name__, obj)  # type: ignore[attr-defined]
+    """
+    Check that a contract, a precondition or a contract expression is supported by the compiler.
+
+    The check does not recurse, so it works on arbitrarily deep contracts. A node whose class has an implementation
+    registered by another module is checked by it, as a whole.
+
+    :param obj: the contract, the precondition or the contract expression
+    :raises BitMLExpressionNotSupportedByCompilerError: if an expression or a precondition is not supported
+    """
+    visit_preorder(obj, _check_supported_children)
+
+
+def _check_supported_children(node: object) -> Sequence[object]:
+    """Check a node, without its sub-expressions; return the sub-expressions to check."""
+    implementation = check_supported.dispatch(node.__class__)
+    if implementation is not _CHECK_SUPPORTED_ITERATIVELY:
+        implementation(node)
+        return ()
+    return _CHECK_SUPPORTED_IMPLEMENTATIONS(node)(node)
+
+
+_CHECK_SUPPORTED_ITERATIVELY = check_supported.registry[object]
+
+
+@singledispatch
+def _check_supported_node(obj: object) -> Sequence[object]:
+    """Check an object, without its sub-expressions; return the sub-expressions."""
+    raise CaseNotHandledError(check_supported.__name__, obj)
+
+
+_CHECK_SUPPORTED_IMPLEMENTATIONS = DispatchCache(_check_supported_node)
 
 
 def _raise_not_supported(cls: type) -> None:
     raise BitMLExpressionNotSupportedByCompilerError(cls)
 
 
-@check_supported.register
-def _check_supported_contract(contract: BitMLContract) -> None:
-    for precondition in contract.preconditions:
-        check_supported(precondition)
-
-    check_supported(contract.contract_root)
+@_check_supported_node.register
+def _check_supported_contract(contract: BitMLContract) -> Sequence[object]:
+    return [*contract.preconditions, contract.contract_root]
 
 
-@check_supported.register
+@_check_supported_node.register
 def _check_supported_deposit_precondition(
     precondition: BitMLDepositPrecondition,
-) -> None:
-    pass
+) -> Sequence[object]:
+    return ()
 
 
-@check_supported.register
+@_check_supported_node.register
 def _check_supported_volatile_deposit_precondition(
     precondition: BitMLVolatileDepositPrecondition,
-) -> None:
-    pass
+) -> Sequence[object]:
+    return ()
 
 
-@check_supported.register
-def _check_supported_fee_precondition(precondition: BitMLFeePrecondition) -> None:
+@_check_supported_node.register
+def _check_supported_fee_precondition(precondition: BitMLFeePrecondition) -> Sequence[object]:
     raise BitMLExpressionNotSupportedByCompilerError(precondition)
 
 
-@check_supported.register
-def _check_secret_precondition(precondition: BitMLSecretPrecondition) -> None:
-    pass
+@_check_supported_node.register
+def _check_secret_precondition(precondition: BitMLSecretPrecondition) -> Sequence[object]:
+    return ()
 
 
-@check_supported.register
-def _check_bitml_withdraw_expression(expr: BitMLWithdrawExpression) -> None:
-    pass
+@_check_supported_node.register
+def _check_bitml_withdraw_expression(expr: BitMLWithdrawExpression) -> Sequence[object]:
+    return ()
 
 
-@check_supported.register
-def _check_bitml_after_expression(expr: BitMLAfterExpression) -> None:
-    check_supported(expr.branch)
+@_check_supported_node.register
+def _check_bitml_after_expression(expr: BitMLAfterExpression) -> Sequence[object]:
+    return (expr.branch,)
 
 
-@check_supported.register
-def _check_bitml_choice_expression(expr: BitMLChoiceExpression) -> None:
-    for choice in expr.choices:
-        check_supported(choice)
+@_check_supported_node.register
+def _check_bitml_choice_expression(expr: BitMLChoiceExpression) -> Sequence[object]:
+    return expr.choices
 
 
-@check_supported.register
-def _check_bitml_authorization_expression(expr: BitMLAuthorizationExpression) -> None:
-    check_supported(expr.branch)
+@_check_supported_node.register
+def _check_bitml_authorization_expression(expr: BitMLAuthorizationExpression) -> Sequence[object]:
+    return (expr.branch,)
 
 
-@check_supported.register
-def _check_bitml_split_expression(expr: BitMLSplitExpression) -> None:
-    for split_branch in expr.branches:
-        check_supported(split_branch.branch)
+@_check_supported_node.register
+def _check_bitml_split_expression(expr: BitMLSplitExpression) -> Sequence[object]:
+    return [split_branch.branch for split_branch in expr.branches]
 
 
-@check_supported.register
-def _check_bitml_put_expression(expr: BitMLPutExpression) -> None:
-    check_supported(expr.branch)
+@_check_supported_node.register
+def _check_bitml_put_expression(expr: BitMLPutExpression) -> Sequence[object]:
+    return (expr.branch,)
 
 
-@check_supported.register
-def _check_bitml_putreveal_expression(expr: BitMLPutRevealExpression) -> None:
-    check_supported(expr.branch)
+@_check_supported_node.register
+def _check_bitml_putreveal_expression(expr: BitMLPutRevealExpression) -> Sequence[object]:
+    return (expr.branch,)
 
 
-@check_supported.register
-def _check_bitml_putrevealif_expression(expr: BitMLPutRevealIfExpression) -> None:
+@_check_supported_node.register
+def _check_bitml_putrevealif_expression(expr: BitMLPutRevealIfExpression) -> Sequence[object]:
     _raise_not_supported(type(expr))
+    return ()
 
 
-@check_supported.register
-def _check_bitml_revealif_expression(expr: BitMLRevealIfExpression) -> None:
+@_check_supported_node.register
+def _check_bitml_revealif_expression(expr: BitMLRevealIfExpression) -> Sequence[object]:
     _raise_not_supported(type(expr))
+    return ()
 
 
-@check_supported.register
-def _check_bitml_reveal_expression(expr: BitMLRevealExpression) -> None:
-    check_supported(expr.branch)
+@_check_supported_node.register
+def _check_bitml_reveal_expression(expr: BitMLRevealExpression) -> Sequence[object]:
+    return (expr.branch,)
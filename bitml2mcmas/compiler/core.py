@@ -1,12 +1,22 @@
 """Compile a BitML contract into a MCMAS program."""
 
+import contextlib
+import dataclasses
 import itertools
 from collections.abc import Sequence
 
 from bitml2mcmas.bitml.core import BitMLContract
 from bitml2mcmas.compiler._private.contract_wrapper import ContractWrapper
 from bitml2mcmas.compiler._private.mcmas_builder import MCMASBuilder
-from bitml2mcmas.compiler._private.terms import PARTICIPANTS_GROUP, ENV_GROUP, PARTICIPANTS_AND_ENV_GROUP
+from bitml2mcmas.compiler._private.mcmas_objects import McmasObjects
+from bitml2mcmas.compiler._private.range_analysis import tighten_funds_ranges
+from bitml2mcmas.compiler._private.terms import (
+    ENV_GROUP,
+    PARTICIPANTS_AND_ENV_GROUP,
+    PARTICIPANTS_GROUP,
+    ChoiceEncoding,
+    TimeEncoding,
+)
 from bitml2mcmas.compiler._private.transformers.base import Transformer
 from bitml2mcmas.compiler._private.transformers.contract_execution import (
     AddContractExecution,
@@ -22,13 +32,28 @@ from bitml2mcmas.compiler._private.transformers.time_progression import (
     AddTimeProgression,
 )
 from bitml2mcmas.compiler.check_supported import check_supported
+from bitml2mcmas.compiler.profiling import CompilationProfile, CompilationProfiler
+from bitml2mcmas.helpers.traversal import iter_nodes
+from bitml2mcmas.helpers.validation import trusted_construction, validate_dataclass_tree
 from bitml2mcmas.mcmas.ast import EvaluationRule, Group, InterpretedSystem, VarDefinition, BooleanVarType, \
     EvolutionRule, Effect
 from bitml2mcmas.mcmas.boolcond import AttributeIdAtom, FalseBoolValue, EqualTo, TrueBoolValue, IdAtom
+from bitml2mcmas.mcmas.cone_of_influence import reduce_to_cone_of_influence
 from bitml2mcmas.mcmas.custom_types import ENVIRONMENT, McmasId
-from bitml2mcmas.mcmas.formula import FormulaType
+from bitml2mcmas.mcmas.formula import (
+    DiamondAlwaysFormula,
+    DiamondEventuallyFormula,
+    DiamondNextFormula,
+    DiamondUntilFormula,
+    FormulaType,
+)
+from bitml2mcmas.mcmas.interning import NodeInterner
+from bitml2mcmas.mcmas.simplification import simplify_interpreted_system
 from typing import AbstractSet
 
+# the formulae that refer to a group
+_GROUP_FORMULA_CLASSES = (DiamondNextFormula, DiamondEventuallyFormula, DiamondAlwaysFormula, DiamondUntilFormula)
+
 
 class Compiler:
     def __init__(
@@ -37,17 +62,80 @@ class Compiler:
         formulae: Sequence[FormulaType],
         evaluation_rules: Sequence[EvaluationRule] | None = None,
         groups: set[Group] | None = None,
+        trusted_construction: bool = False,
+        validate_output: bool = False,
+        intern_nodes: bool = False,
+        optimize: bool = False,
+        cone_of_influence: bool = False,
+        uniform_cone_of_influence: bool = False,
+        tight_ranges: bool = False,
+        time_encoding: TimeEncoding = TimeEncoding.INTEGER,
+        choice_encoding: ChoiceEncoding = ChoiceEncoding.SIBLINGS,
+        all_coalitions: bool = False,
+        profile: bool = False,
     ) -> None:
+        """
+        Initialize the compiler.
+
+        :param contract: the BitML contract
+        :param formulae: the formulae to verify
+        :param evaluation_rules: the evaluation rules for the atomic propositions used in the formulae
+        :param groups: the groups used in the formulae
+        :param trusted_construction: if True, the MCMAS objects built during the compilation are not validated
+        :param validate_output: if True, the compiled interpreted system is validated with a single pass at the end
+        :param intern_nodes: if True, the structurally equal conditions and formulae of the compiled interpreted system
+            are the same object
+        :param optimize: if True, the boolean conditions of the compiled interpreted system are simplified (constant
+            folding, removal of duplicate and subsumed operands, merge of the equalities on the same variable)
+        :param cone_of_influence: if True, the variables that cannot influence the formulae are removed from the
+            compiled interpreted system, with their evolution rules, and so are the evaluation rules of the atomic
+            propositions that the formulae do not use; the reduced system is equivalent under the perfect information
+            semantics of MCMAS (the default one)
+        :param uniform_cone_of_influence: if True, the cone-of-influence reduction removes only the private variables of
+            the environment that no agent observes, so the reduced system is equivalent under the uniform semantics too
+            (MCMAS option -uniform); ignored if cone_of_influence is False
+        :param tight_ranges: if True, the funds of the contract and the total deposits of the participants are declared
+            with the smallest integer ranges that contain the values they can take, instead of the range from zero to
+            the total amount of the deposits (and the integers compared with them in the evaluation rules)
+        :param time_encoding: the encoding of the time variable; with TimeEncoding.REGIONS, the time is the index of
+            the region between two consecutive distinct timeouts, and a delay jumps to the next region, so the number of
+            time values is the number of distinct timeouts plus one, instead of the maximum timeout plus one. The
+            verification results do not change, but for the formulae that count the steps (e.g. with the next operator)
+            and for the evaluation rules that compare the time with integers
+        :param choice_encoding: the encoding of the mutual exclusion of the branches of a choice; with
+            ChoiceEncoding.SIBLINGS, each branch checks that none of the other branches is executed, so the conditions
+            of a choice with k branches have size O(k^2); with ChoiceEncoding.CHOSEN_BRANCH, each choice has a variable
+            with the executed branch, if any, that the branches check, so the size is O(k). The verification results
+            and the atomic propositions on the status of the nodes do not change
+        :param all_coalitions: if True, a group is defined for each proper subset of the participants (2^n - 2 groups
+            for n participants); otherwise, only the coalitions used by the formulae are. The coalition of the agents
+            A_1, ..., A_k is named after their sorted names, joined by '__' (e.g. 'Agent_A__Agent_B')
+        :param profile: if True, each compilation records the wall time, the allocated memory blocks and the number of
+            objects added to the MCMAS program by each transformer and compilation step; the profile of the last
+            compilation is available in the profile_report property
+        """
         self.__contract = contract
         self.__formulae = formulae
         self.__evaluation_rules = evaluation_rules
         self.__groups = groups
+        self.__trusted_construction = trusted_construction
+        self.__validate_output = validate_output
+        self.__intern_nodes = intern_nodes
+        self.__optimize = optimize
+        self.__cone_of_influence = cone_of_influence
+        self.__uniform_cone_of_influence = uniform_cone_of_influence
+        self.__tight_ranges = tight_ranges
+        self.__all_coalitions = all_coalitions
+        self.__profile = profile
 
         check_supported(self.__contract)
         self._check_nb_formulae()
 
-        self.__wrapper = ContractWrapper(self.__contract)
+        self.__wrapper = ContractWrapper(self.__contract, time_encoding, choice_encoding)
+        self.__objects: McmasObjects | None = None
         self.__builder: MCMASBuilder | None = None
+        self.__profiler: CompilationProfiler | None = None
+        self.__profile_report: CompilationProfile | None = None
 
     @property
     def evaluation_rules(self) -> tuple[EvaluationRule]:
@@ -61,12 +149,49 @@ class Compiler:
             self.__groups if self.__groups is not None else set()
         )
 
+    @property
+    def profile_report(self) -> CompilationProfile | None:
+        """The profile of the last compilation, or None if the profiling is disabled or nothing was compiled yet."""
+        return self.__profile_report
+
     def _check_nb_formulae(self) -> None:
         if len(self.__formulae) == 0:
             raise ValueError("required at least one formula for the compilation")
 
     def compile(self) -> InterpretedSystem:
+        self.__profiler = CompilationProfiler() if self.__profile else None
+        try:
+            return self._compile_and_transform()
+        finally:
+            # the profile of a failed compilation is reported too, up to the stage that raised
+            if self.__profiler is not None:
+                self.__profile_report = self.__profiler.get_profile()
+
+    def _compile_and_transform(self) -> InterpretedSystem:
+        context = trusted_construction() if self.__trusted_construction else contextlib.nullcontext()
+        with context:
+            system = self._compile()
+            if self.__tight_ranges:
+                with self._stage("tight_ranges"):
+                    system = tighten_funds_ranges(system, self.__wrapper)
+            if self.__optimize:
+                with self._stage("optimize"):
+                    system = simplify_interpreted_system(system)
+            if self.__cone_of_influence:
+                with self._stage("cone_of_influence"):
+                    system = reduce_to_cone_of_influence(system, uniform=self.__uniform_cone_of_influence)
+        if self.__intern_nodes:
+            with self._stage("intern_nodes"):
+                system = NodeInterner().intern(system)
+        if self.__validate_output:
+            with self._stage("validate_output"):
+                validate_dataclass_tree(system)
+        return system
+
+    def _compile(self) -> InterpretedSystem:
         self.__builder = MCMASBuilder()
+        # the objects shared by the transformers, and their caches, belong to a single compilation
+        self.__objects = McmasObjects(self.__wrapper)
 
         self._apply(AddSchedulingActions)
         self._apply(AddTimeProgression)
@@ -77,15 +202,26 @@ class Compiler:
 
         # this must be the last transformation since it requires the actions to be already defined
         self._apply(AddLastAction)
+        self.__objects = None
 
-        self._add_groups()
-        self._add_formulae()
-        self._add_evaluation_rules()
-        self._add_dummy_agent_vars()
-        return self.__builder.compile()
+        with self._stage("finalization", count_added=True):
+            self._add_groups()
+            self._add_formulae()
+            self._add_evaluation_rules()
+            self._add_dummy_agent_vars()
+        with self._stage("build"):
+            return self.__builder.compile()
 
     def _apply(self, cls: type[Transformer]):
-        cls(self.__wrapper, self.__builder).apply()
+        with self._stage(cls.__name__, count_added=True):
+            cls(self.__wrapper, self.__builder, self.__objects).apply()
+
+    def _stage(self, name: str, count_added: bool = False) -> contextlib.AbstractContextManager:
+        """Profile a stage of the compilation, if the profiling is enabled."""
+        if self.__profiler is None:
+            return contextlib.nullcontext()
+        get_counts = (lambda: dataclasses.asdict(self.__builder.statistics)) if count_added else None
+        return self.__profiler.stage(name, get_counts)
 
     def _add_groups(self):
         agent_names = set(self.__builder.agent_names)
@@ -93,14 +229,37 @@ class Compiler:
         self.__builder.add_group(Group(ENV_GROUP, {ENVIRONMENT}))
         self.__builder.add_group(Group(PARTICIPANTS_AND_ENV_GROUP, agent_names.union({ENVIRONMENT})))
 
-        # add all combinations of participants and environment
-        for k in range(1, len(agent_names)):
-            for comb in itertools.combinations(agent_names, k):
-                group_name = "__".join(sorted(comb))
-                self.__builder.add_group(Group(group_name, set(comb)))
+        if self.__all_coalitions:
+            # add all combinations of participants and environment
+            for k in range(1, len(agent_names)):
+                for comb in itertools.combinations(agent_names, k):
+                    group_name = "__".join(sorted(comb))
+                    self.__builder.add_group(Group(group_name, set(comb)))
+        else:
+            self._add_used_coalitions(agent_names)
 
         self.__builder.add_groups(self.groups)
 
+    def _add_used_coalitions(self, agent_names: AbstractSet[McmasId]) -> None:
+        """Add the groups of participants used by the formulae, and not defined otherwise."""
+        defined_group_names = {PARTICIPANTS_GROUP, ENV_GROUP, PARTICIPANTS_AND_ENV_GROUP}
+        defined_group_names.update(group.group_name for group in self.groups)
+        for group_name in self._get_used_group_names():
+            members = group_name.split("__")
+            if group_name in defined_group_names or not (set(members) < agent_names):
+                continue
+            if "__".join(sorted(set(members))) != group_name:
+                continue
+            self.__builder.add_group(Group(group_name, set(members)))
+            defined_group_names.add(group_name)
+
+    def _get_used_group_names(self) -> list[McmasId]:
+        """Get the names of the groups used by the formulae, without duplicates."""
+        result: dict[McmasId, None] = {}
+        for node in iter_nodes(self.__formulae):
+            if isinstance(node, _GROUP_FORMULA_CLASSES):
+                result.setdefault(node.group_id, None)
+        return list(result)
 
     def _add_formulae(self):
         self.__builder.add_formulae(self.__formulae)
@@ -0,0 +1,113 @@
+"""Profiling of the stages of the compilation of a BitML contract."""
+
+import contextlib
+import dataclasses
+import json
+import sys
+import time
+from collections.abc import Callable, Iterator, Mapping, Sequence
+from typing import Any
+
+
+@dataclasses.dataclass(frozen=True)
+class StageProfile:
+    """
+    The cost of a stage of the compilation.
+
+    :param name: the name of the stage (the name of the transformer, or of the compilation step)
+    :param start: the start time of the stage, in seconds since the start of the compilation
+    :param wall_time: the wall time of the stage, in seconds
+    :param allocated_blocks: the net number of memory blocks allocated by the interpreter during the stage (it
+        approximates the number of objects that the stage created and that are still alive at its end)
+    :param added: the number of objects added to the MCMAS program by the stage (vars, actions, protocol rules,
+        evolution rules, ...), or None for the stages that transform the compiled interpreted system
+    """
+
+    name: str
+    start: float
+    wall_time: float
+    allocated_blocks: int
+    added: Mapping[str, int] | None = None
+
+
+@dataclasses.dataclass(frozen=True)
+class CompilationProfile:
+    """The profile of a compilation, with a stage profile for each stage, in order of execution."""
+
+    stages: Sequence[StageProfile]
+    total_time: float
+
+    def get_stage(self, name: str) -> StageProfile:
+        for stage in self.stages:
+            if stage.name == name:
+                return stage
+        raise KeyError(name)
+
+    def to_dict(self) -> dict[str, Any]:
+        return dict(
+            total_time=self.total_time,
+            stages=[dataclasses.asdict(stage) | dict(added=_to_dict(stage.added)) for stage in self.stages],
+        )
+
+    def to_json(self, indent: int | None = 2) -> str:
+        return json.dumps(self.to_dict(), indent=indent)
+
+    def to_chrome_trace(self, indent: int | None = None) -> str:
+        """Export the profile in the Chrome trace event format, readable by chrome://tracing and Perfetto."""
+        events = [_complete_event("compile", 0.0, self.total_time, dict())]
+        for stage in self.stages:
+            args = dict(allocated_blocks=stage.allocated_blocks)
+            args.update(stage.added or dict())
+            events.append(_complete_event(stage.name, stage.start, stage.wall_time, args))
+        return json.dumps(dict(traceEvents=events, displayTimeUnit="ms"), indent=indent)
+
+    def __str__(self) -> str:
+        lines = [f"{'stage':<28}{'time (ms)':>12}{'blocks':>10}  added"]
+        for stage in self.stages:
+            added = ", ".join(f"{key}={value}" for key, value in (stage.added or dict()).items() if value != 0)
+            lines.append(f"{stage.name:<28}{stage.wall_time * 1000:>12.3f}{stage.allocated_blocks:>10}  {added}")
+        lines.append(f"{'total':<28}{self.total_time * 1000:>12.3f}")
+        return "\n".join(lines)
+
+
+def _to_dict(added: Mapping[str, int] | None) -> dict[str, int] | None:
+    return dict(added) if added is not None else None
+
+
+def _complete_event(name: str, start: float, duration: float, args: dict[str, int]) -> dict[str, Any]:
+    return dict(name=name, ph="X", ts=start * 1e6, dur=duration * 1e6, pid=1, tid=1, args=args)
+
+
+class CompilationProfiler:
+    """Record the stage profiles of a compilation."""
+
+    def __init__(self) -> None:
+        self.__stages: list[StageProfile] = []
+        self.__start = time.perf_counter()
+
+    @contextlib.contextmanager
+    def stage(self, name: str, get_counts: Callable[[], Mapping[str, int]] | None = None) -> Iterator[None]:
+        """
+        Profile the stage executed in the context.
+
+        :param name: the name of the stage
+        :param get_counts: if set, a function that counts the objects of the MCMAS program built so far; the profile
+            of the stage reports the difference between the counts at its end and at its start
+        """
+        counts_before = get_counts() if get_counts is not None else None
+        blocks_before = sys.getallocatedblocks()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            # a stage that raises is recorded too, so that the profile shows where the compilation failed
+            wall_time = time.perf_counter() - start
+            allocated_blocks = sys.getallocatedblocks() - blocks_before
+            added = None
+            if counts_before is not None:
+                counts_after = get_counts()  # type: ignore[misc]
+                added = {key: counts_after[key] - value for key, value in counts_before.items()}
+            self.__stages.append(StageProfile(name, start - self.__start, wall_time, allocated_blocks, added))
+
+    def get_profile(self) -> CompilationProfile:
+        return CompilationProfile(tuple(self.__stages), time.perf_counter() - self.__start)
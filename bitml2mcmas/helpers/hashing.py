@@ -0,0 +1,106 @@
+"""Hashing of immutable trees."""
+
+import dataclasses
+from collections.abc import Callable
+from operator import attrgetter
+from typing import Any
+
+# for each class, the function that gets the values of the compared fields of an instance, as a tuple
+_FIELD_GETTERS_BY_CLASS: dict[type, Callable[[Any], tuple[Any, ...]]] = {}
+
+
+def _get_field_getter(cls: type) -> Callable[[Any], tuple[Any, ...]]:
+    field_getter = _FIELD_GETTERS_BY_CLASS.get(cls)
+    if field_getter is None:
+        field_names = tuple(field.name for field in dataclasses.fields(cls) if field.compare)
+        if len(field_names) == 1:
+            single_getter = attrgetter(field_names[0])
+
+            def field_getter(obj: Any) -> tuple[Any, ...]:
+                return (single_getter(obj),)
+
+        elif len(field_names) == 0:
+
+            def field_getter(obj: Any) -> tuple[Any, ...]:
+                return ()
+
+        else:
+            field_getter = attrgetter(*field_names)
+        _FIELD_GETTERS_BY_CLASS[cls] = field_getter
+    return field_getter
+
+
+def _compute_hashes(root: "_CachedHash") -> int:
+    """Compute and store the hash of a node, and of all its descendants that do not have one yet, without recursion."""
+    stack: list[tuple[_CachedHash, bool]] = [(root, False)]
+    while stack:
+        node, children_done = stack.pop()
+        if "_hash" in node.__dict__:
+            continue
+        values = _get_field_getter(node.__class__)(node)
+        if children_done:
+            object.__setattr__(node, "_hash", hash((node.__class__, values)))
+            continue
+        stack.append((node, True))
+        for value in values:
+            if isinstance(value, _CachedHash):
+                stack.append((value, False))
+            elif value.__class__ is tuple:
+                # e.g. the operands of n-ary nodes
+                stack.extend((item, False) for item in value if isinstance(item, _CachedHash))
+    return root._hash  # type: ignore[attr-defined,no-any-return]
+
+
+class _CachedHash:
+    """
+    Mixin for frozen dataclasses that are nodes of (possibly deep) trees.
+
+    The hash of a node is computed once, the first time it is needed, from the cached hashes of its fields, and stored
+    in the node: hashing a node again takes constant time, instead of time linear in the size of its subtree. Neither
+    hashing nor equality recurse, so they work on arbitrarily deep trees; equality short-circuits on identity and on
+    hash mismatch.
+
+    The subclasses must be decorated with dataclass(eq=False), otherwise the generated __eq__ and __hash__ override
+    the ones of the mixin.
+    """
+
+    def __hash__(self) -> int:
+        try:
+            return self._hash  # type: ignore[attr-defined,no-any-return]
+        except AttributeError:
+            return _compute_hashes(self)
+
+    def __eq__(self, other: object) -> bool:
+        if self is other:
+            return True
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+
+        stack: list[tuple[Any, Any]] = [(self, other)]
+        while stack:
+            left, right = stack.pop()
+            if left is right:
+                continue
+            if left.__class__ is tuple:
+                if right.__class__ is not tuple or len(left) != len(right):
+                    return False
+                stack.extend(zip(left, right))
+                continue
+            if not isinstance(left, _CachedHash):
+                if left != right:
+                    return False
+                continue
+            if left.__class__ is not right.__class__ or hash(left) != hash(right):
+                return False
+            field_getter = _get_field_getter(left.__class__)
+            stack.extend(zip(field_getter(left), field_getter(right), strict=True))
+        return True
+
+    def __getstate__(self) -> dict[str, Any]:
+        # hashes of strings change across processes: never store the cached hash
+        state = dict(self.__dict__)
+        state.pop("_hash", None)
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
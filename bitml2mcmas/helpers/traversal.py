@@ -0,0 +1,118 @@
+"""Depth-first traversals of trees with an explicit stack, for trees deeper than the recursion limit."""
+
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from typing import Any, Generic, TypeVar
+
+from bitml2mcmas.helpers.hashing import _CachedHash, _get_field_getter
+
+_S = TypeVar("_S")
+_R = TypeVar("_R")
+
+# the children of a node to visit, each with the state it receives from the node
+Children = Sequence[tuple[Any, _S]]
+
+
+class DispatchCache:
+    """
+    Cache of the implementations of a single-dispatch function, by exact class of the argument.
+
+    Calling a single-dispatch function (or method) looks up the implementation at each call, through a weak-key
+    dictionary and a wrapper; the cache looks it up once per class, and then with a plain dictionary lookup.
+    """
+
+    def __init__(self, function: Any) -> None:
+        """
+        Initialize the cache.
+
+        :param function: the single-dispatch function, or method; for a method, the cache is created in the class body,
+            and the implementations are the unbound functions, to be called with the instance as first argument
+        """
+        dispatcher = getattr(function, "dispatcher", function)
+        self.__dispatch: Callable[[type], Callable[..., Any]] = dispatcher.dispatch
+        self.__implementations: dict[type, Callable[..., Any]] = {}
+
+    def __call__(self, obj: object) -> Callable[..., Any]:
+        """Get the implementation for the class of an object."""
+        obj_class = obj.__class__
+        implementation = self.__implementations.get(obj_class)
+        if implementation is None:
+            implementation = self.__implementations[obj_class] = self.__dispatch(obj_class)
+        return implementation
+
+
+def iter_nodes(roots: Iterable[Any]) -> Iterator[Any]:
+    """
+    Yield once each node reachable from the roots, with an explicit stack instead of recursion.
+
+    The nodes are the instances of the dataclasses with cached hashes (the conditions, expressions and formulae of
+    MCMAS), and their children are the values of their fields, or the items of their tuple fields, that are nodes too.
+    A node shared by several parents is yielded once.
+
+    :param roots: the root nodes
+    :return: an iterator over the nodes
+    """
+    seen: set[int] = set()
+    stack = list(roots)
+    while stack:
+        node = stack.pop()
+        if id(node) in seen:
+            continue
+        seen.add(id(node))
+        yield node
+        for value in _get_field_getter(node.__class__)(node):
+            if isinstance(value, _CachedHash):
+                stack.append(value)
+            elif value.__class__ is tuple:
+                stack.extend(item for item in value if isinstance(item, _CachedHash))
+
+
+def visit_preorder(root: Any, enter: Callable[[Any], Sequence[Any]]) -> None:
+    """
+    Enter each node of a tree in pre-order, with an explicit stack instead of recursion.
+
+    :param root: the root node
+    :param enter: the function that processes a node, and returns its children to visit
+    """
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        stack.extend(reversed(enter(node)))
+
+
+class Visitor(ABC, Generic[_S, _R]):
+    """
+    A depth-first traversal of a tree, with an explicit stack instead of recursion.
+
+    Each node receives a state from its parent, and returns a result to it: the traversal enters a node, which gives
+    its children and their states, visits the children in order, and then exits the node with the results of its
+    children. The nodes are entered (and exited) in the same order as by a recursive traversal, so the checks done when
+    entering the nodes raise the same first error.
+    """
+
+    @abstractmethod
+    def enter(self, node: Any, state: _S) -> Children[_S]:
+        """Process a node before its children; return the children to visit, each with its state."""
+
+    @abstractmethod
+    def exit(self, node: Any, state: _S, results: Sequence[_R]) -> _R:
+        """Process a node after its children, given their results in order; return the result of the node."""
+
+    def visit(self, root: Any, state: _S) -> _R:
+        """Visit the tree from its root, with the initial state; return the result of the root."""
+        results: list[_R] = []
+        # the stack items are (node, state, number of children) triples; the number of children is -1 until the node is
+        # entered, and then the node is pushed again, to be exited after its children
+        stack: list[tuple[Any, _S, int]] = [(root, state, -1)]
+        while stack:
+            node, node_state, nb_children = stack.pop()
+            if nb_children < 0:
+                children = self.enter(node, node_state)
+                stack.append((node, node_state, len(children)))
+                stack.extend((child, child_state, -1) for child, child_state in reversed(children))
+                continue
+            start = len(results) - nb_children
+            children_results = results[start:]
+            del results[start:]
+            results.append(self.exit(node, node_state, children_results))
+        return results[0]
@@ -1,10 +1,12 @@
 """Data validation."""
 
 import collections
+import contextlib
 import dataclasses
 import re
 from abc import ABC, abstractmethod
-from collections.abc import Callable, Collection, Sequence
+from collections.abc import Callable, Collection, Iterator, Sequence
+from contextvars import ContextVar
 from decimal import Decimal
 from numbers import Number
 from typing import (
@@ -29,6 +31,10 @@ class _Processor(ABC):
     def process(self, value: Any) -> Any:
         raise NotImplementedError
 
+    def normalize(self, value: Any) -> Any:
+        """Apply only the conversions of the processor (e.g. list to tuple), without any check."""
+        return value
+
 
 def flatten_union(allowed_types: Sequence[type]) -> Sequence[type]:
     new_allowed_types: list[type] = []
@@ -129,9 +135,8 @@ class InstanceOf(_Processor):
         object.__setattr__(self, "allowed_types", tuple(allowed_types))
 
     def process(self, value: Any) -> Any:
-        allowed_types = tuple(self.allowed_types)
-        if not isinstance(value, allowed_types):
-            raise NotOfTypeError(value, allowed_types)
+        if not isinstance(value, self.allowed_types):
+            raise NotOfTypeError(value, self.allowed_types)
         return value
 
 
@@ -148,6 +153,8 @@ class StringConstraint(_Processor):
             raise ValueError("max_length must be non-negative")
         if self.pattern is not None and not _is_valid_regex_pattern(self.pattern):
             raise ValueError(f"'{self.pattern}' is not a valid regex pattern")
+        regex = re.compile(self.pattern) if self.pattern is not None else None
+        object.__setattr__(self, "_regex", regex)
 
     def process(self, value: str) -> Any:
         self._check_min_length(value)
@@ -164,10 +171,9 @@ class StringConstraint(_Processor):
             raise StringMaxLengthError(value, self.max_length)
 
     def _check_pattern(self, value: str) -> None:
-        if self.pattern is not None:
-            regex = re.compile(self.pattern)
-            if re.fullmatch(self.pattern, value) is None:
-                raise ViolatedRegexConstraintError(value, regex)
+        regex = self._regex  # type: ignore[attr-defined]
+        if regex is not None and regex.fullmatch(value) is None:
+            raise ViolatedRegexConstraintError(value, regex)
 
 
 def _is_valid_regex_pattern(pattern: str) -> bool:
@@ -185,16 +191,22 @@ class SequenceConstraint(_Processor):
     unique_items: bool | None = None
     item_type: type | None = None
 
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "_item_processors", _get_item_processors(self.item_type))
+
     def process(self, value: Any) -> Any:
         value = self._validate_sequence(value)
         self._check_min_length(value)
         self._check_max_length(value)
         self._check_unique_items(value)
-        value = self._process_item_type(value)
+        # the processed items are already collected in a tuple
+        return self._process_item_type(value)
+
+    def normalize(self, value: Any) -> Any:
         return tuple(value)
 
     def _validate_sequence(self, value: Any) -> Sequence:
-        return InstanceOf(list, tuple).process(value)
+        return _SEQUENCE_TYPE_CHECK.process(value)
 
     def _check_min_length(self, value: Sequence) -> None:
         if self.min_items is not None and not (len(value) >= self.min_items):
@@ -205,7 +217,9 @@ class SequenceConstraint(_Processor):
             raise SequenceMaxLengthError(value, self.max_items)
 
     def _process_item_type(self, seq: Sequence) -> Sequence:
-        return _process_item_type(seq, collection_init=tuple, item_type=self.item_type)
+        return _process_item_type(
+            seq, collection_init=tuple, item_processors=self._item_processors  # type: ignore[attr-defined]
+        )
 
     def _check_unique_items(self, seq: Sequence) -> None:
         if self.unique_items:
@@ -222,6 +236,9 @@ class SetConstraint(_Processor):
     max_items: int | None = None
     item_type: type | None = None
 
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "_item_processors", _get_item_processors(self.item_type))
+
     def process(self, value: Any) -> Any:
         value = self._validate_set(value)
         self._check_min_length(value)
@@ -229,8 +246,11 @@ class SetConstraint(_Processor):
         value = self._process_item_type(value)
         return frozenset(value)
 
+    def normalize(self, value: Any) -> Any:
+        return frozenset(value)
+
     def _validate_set(self, value: Any) -> AbstractSet:
-        return InstanceOf(set, frozenset).process(value)
+        return _SET_TYPE_CHECK.process(value)
 
     def _check_min_length(self, value: AbstractSet) -> None:
         if self.min_items is not None and not (len(value) >= self.min_items):
@@ -242,7 +262,7 @@ class SetConstraint(_Processor):
 
     def _process_item_type(self, seq: AbstractSet) -> AbstractSet:
         return _process_item_type(
-            seq, collection_init=frozenset, item_type=self.item_type
+            seq, collection_init=frozenset, item_processors=self._item_processors  # type: ignore[attr-defined]
         )
 
 
@@ -255,6 +275,11 @@ class AllowNone(_Processor):
             return value
         return self.arg.process(value)
 
+    def normalize(self, value: Any) -> Any:
+        if value is None:
+            return value
+        return self.arg.normalize(value)
+
 
 class ValidationError(Exception):
     pass
@@ -398,61 +423,170 @@ class DataClassFieldValidationError(Exception):
         super().__init__(msg)
 
 
-class _BaseDataClass:
-    def __post_init__(self) -> None:
-        if hasattr(self, "__annotations__"):
-            for name, annotation in self.__annotations__.items():
-                if get_origin(annotation) is not Annotated:
-                    continue
-                self.__process_field(name, annotation)
+_trusted_construction: ContextVar[bool] = ContextVar("trusted_construction", default=False)
 
-    def __force_set(self, field_name: str, value: Any) -> None:
-        object.__setattr__(self, field_name, value)
 
-    def _get_cls_name(self) -> str:
-        return self.__class__.__name__
+@contextlib.contextmanager
+def trusted_construction() -> Iterator[None]:
+    """
+    Skip the validation of the fields of the dataclasses built in this context.
+
+    The conversions of the processors (e.g. list to tuple) are still applied, so the built objects are the same as
+    the validated ones; only the checks are skipped. Use validate_dataclass_tree to validate the result afterward.
+    """
+    token = _trusted_construction.set(True)
+    try:
+        yield
+    finally:
+        _trusted_construction.reset(token)
+
+
+# the validated fields of a class, each with the processors of its annotation
+_FieldProcessors = tuple[tuple[str, tuple[_Processor, ...]], ...]
+_FIELD_PROCESSORS_BY_CLASS: dict[type, _FieldProcessors] = {}
+_FIELD_NORMALIZERS_BY_CLASS: dict[type, _FieldProcessors] = {}
+
 
-    def __process_field(self, field_name: str, annotated: Annotated[Any, Any]) -> None:
-        # discard first element, used for static type checking
-        annotations = get_args(annotated)[1:]
+def _get_processors(annotated: Any) -> tuple[_Processor, ...]:
+    # discard first element, used for static type checking
+    return tuple(arg for arg in get_args(annotated)[1:] if isinstance(arg, _Processor))
 
-        value = getattr(self, field_name)
-        for annotation in annotations:
-            if not isinstance(annotation, _Processor):
-                continue
 
+def _get_class_annotations(cls: type) -> dict[str, Any]:
+    # the annotations of the closest class in the MRO that defines them, as in 'self.__annotations__'
+    for klass in cls.__mro__:
+        annotations = klass.__dict__.get("__annotations__")
+        if annotations is not None:
+            return annotations
+    return {}
+
+
+def _get_field_processors(cls: type) -> _FieldProcessors:
+    """Get the processors of each validated field of a class; they are resolved once, on first use."""
+    field_processors = _FIELD_PROCESSORS_BY_CLASS.get(cls)
+    if field_processors is None:
+        field_processors = tuple(
+            (name, processors)
+            for name, annotation in _get_class_annotations(cls).items()
+            if get_origin(annotation) is Annotated and len(processors := _get_processors(annotation)) > 0
+        )
+        _FIELD_PROCESSORS_BY_CLASS[cls] = field_processors
+    return field_processors
+
+
+def _get_field_normalizers(cls: type) -> _FieldProcessors:
+    """Get the processors of each field of a class that convert the value, i.e. that override normalize()."""
+    field_normalizers = _FIELD_NORMALIZERS_BY_CLASS.get(cls)
+    if field_normalizers is None:
+        normalizers_list = []
+        for name, processors in _get_field_processors(cls):
+            normalizers = tuple(p for p in processors if type(p).normalize is not _Processor.normalize)
+            if len(normalizers) > 0:
+                normalizers_list.append((name, normalizers))
+        field_normalizers = tuple(normalizers_list)
+        _FIELD_NORMALIZERS_BY_CLASS[cls] = field_normalizers
+    return field_normalizers
+
+
+class _BaseDataClass:
+    def __post_init__(self) -> None:
+        if _trusted_construction.get():
+            self._normalize_fields()
+        else:
+            self._process_fields(set_values=True)
+
+    def _normalize_fields(self) -> None:
+        for field_name, normalizers in _get_field_normalizers(self.__class__):
+            value = getattr(self, field_name)
+            for normalizer in normalizers:
+                value = normalizer.normalize(value)
+            object.__setattr__(self, field_name, value)
+
+    def _process_fields(self, set_values: bool) -> None:
+        for field_name, processors in _get_field_processors(self.__class__):
+            value = getattr(self, field_name)
             try:
-                value = annotation.process(value)
+                for processor in processors:
+                    value = processor.process(value)
             except ValidationError as e:
                 raise DataClassFieldValidationError(
                     field_name, self._get_cls_name(), str(e)
                 ) from e
+            if set_values:
+                object.__setattr__(self, field_name, value)
 
-        self.__force_set(field_name, value)
+    def _get_cls_name(self) -> str:
+        return self.__class__.__name__
+
+
+_SEQUENCE_TYPE_CHECK = InstanceOf(list, tuple)
+_SET_TYPE_CHECK = InstanceOf(set, frozenset)
+
+
+def _get_item_processors(item_type: type | None) -> tuple[_Processor, ...] | None:
+    if item_type is None:
+        return None
+    if get_origin(item_type) is Annotated:
+        return _get_processors(item_type)
+    return (InstanceOf(item_type),)
 
 
 def _process_item_type(
-    collection: Collection, collection_init: Callable[[Any], T], item_type: type | None
+    collection: Collection,
+    collection_init: Callable[[Any], T],
+    item_processors: tuple[_Processor, ...] | None,
 ) -> T:
     assert_(sequence_like(collection))
 
-    if item_type is None:
+    if item_processors is None:
         return collection_init(collection)
 
-    new_sequence = []
-    origin = get_origin(item_type)
-    if origin is Annotated:
-        annotations = get_args(item_type)
-        _type_hint, other_annotations = annotations[0], annotations[1:]
-        processors = filter(lambda t: isinstance(t, _Processor), other_annotations)
-        for value in collection:
-            for processor in processors:
-                value = processor.process(value)
-            new_sequence.append(value)
-        return collection_init(new_sequence)
+    if len(item_processors) == 1:
+        process = item_processors[0].process
+        return collection_init([process(value) for value in collection])
 
+    new_sequence = []
     for value in collection:
-        value = InstanceOf(item_type).process(value)
+        for processor in item_processors:
+            value = processor.process(value)
         new_sequence.append(value)
-
     return collection_init(new_sequence)
+
+
+_DATACLASS_FIELD_NAMES_BY_CLASS: dict[type, tuple[str, ...]] = {}
+_COLLECTION_TYPES = (list, tuple, set, frozenset)
+
+
+def _get_dataclass_field_names(cls: type) -> tuple[str, ...]:
+    field_names = _DATACLASS_FIELD_NAMES_BY_CLASS.get(cls)
+    if field_names is None:
+        is_dataclass = dataclasses.is_dataclass(cls)
+        field_names = tuple(field.name for field in dataclasses.fields(cls)) if is_dataclass else ()
+        _DATACLASS_FIELD_NAMES_BY_CLASS[cls] = field_names
+    return field_names
+
+
+def validate_dataclass_tree(root: Any) -> None:
+    """
+    Validate the fields of all the dataclasses reachable from an object, e.g. after a trusted construction.
+
+    Objects shared by several parents are validated once.
+
+    :param root: the root object
+    :raises DataClassFieldValidationError: if the field of a dataclass is not valid
+    """
+    visited: set[int] = set()
+    stack = [root]
+    while stack:
+        obj = stack.pop()
+        if isinstance(obj, _COLLECTION_TYPES):
+            stack.extend(obj)
+            continue
+        field_names = _get_dataclass_field_names(type(obj))
+        if len(field_names) == 0 or id(obj) in visited:
+            continue
+        visited.add(id(obj))
+
+        if isinstance(obj, _BaseDataClass):
+            obj._process_fields(set_values=False)
+        stack.extend(getattr(obj, field_name) for field_name in field_names)
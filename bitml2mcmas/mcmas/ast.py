@@ -95,6 +95,9 @@ class _UniqueVarDefinitions(_Processor):
         SequenceConstraint(unique_items=True).process(all_varnames_list)
         return value
 
+    def normalize(self, value: Any) -> Any:
+        return tuple(value)
+
 
 @dataclasses.dataclass(frozen=True)
 class AgentActions(_BaseDataClass):
@@ -155,6 +158,9 @@ class _UniqueEvaluationRuleDefinitions(_Processor):
         SequenceConstraint(unique_items=True).process(all_proposition_list)
         return value
 
+    def normalize(self, value: Any) -> Any:
+        return tuple(value)
+
 
 @dataclasses.dataclass(frozen=True)
 class Group(_BaseDataClass):
@@ -2,14 +2,16 @@
 
 import dataclasses
 from abc import ABC
+from collections.abc import Iterable, Sequence
 from typing import Annotated, Any, Generic, Literal, TypeVar, Union, cast
 
-from bitml2mcmas.helpers.validation import InstanceOf, TypeIs, _BaseDataClass
+from bitml2mcmas.helpers.hashing import _CachedHash
+from bitml2mcmas.helpers.validation import InstanceOf, SequenceConstraint, TypeIs, _BaseDataClass
 from bitml2mcmas.mcmas.custom_types import McmasId
 from bitml2mcmas.mcmas.exceptions import McmasException
 
 
-class _BaseExpression(ABC):
+class _BaseExpression(_CachedHash, ABC):
     @classmethod
     def __check_operation_is_valid(
         cls, arg: Any, operation: Literal["+", "-", "*", "/", "&", "|", "^", "~"]
@@ -59,7 +61,7 @@ class _BaseExpression(ABC):
         return BitNot(cast(Expression, self))
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, eq=False)
 class TrueBoolValue(_BaseExpression, _BaseDataClass):
     def __eq__(self, other: object) -> bool:
         return isinstance(other, TrueBoolValue)
@@ -68,7 +70,7 @@ class TrueBoolValue(_BaseExpression, _BaseDataClass):
         return hash(TrueBoolValue)
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, eq=False)
 class FalseBoolValue(_BaseExpression, _BaseDataClass):
     def __eq__(self, other: object) -> bool:
         return isinstance(other, FalseBoolValue)
@@ -77,71 +79,71 @@ class FalseBoolValue(_BaseExpression, _BaseDataClass):
         return hash(FalseBoolValue)
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, eq=False)
 class IntAtom(_BaseExpression):
     value: Annotated[int, TypeIs(int)]
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, eq=False)
 class IdAtom(_BaseExpression, _BaseDataClass):
     value: McmasId
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, eq=False)
 class EnvironmentIdAtom(_BaseExpression, _BaseDataClass):
     attribute: McmasId
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, eq=False)
 class AttributeIdAtom(_BaseExpression, _BaseDataClass):
     mcmas_object: McmasId
     attribute: McmasId
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, eq=False)
 class _BaseBinaryExpr(_BaseExpression, _BaseDataClass):
     left: Annotated["Expression", InstanceOf(_BaseExpression)]
     right: Annotated["Expression", InstanceOf(_BaseExpression)]
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, eq=False)
 class SubtractExpr(_BaseBinaryExpr, _BaseDataClass):
     pass
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, eq=False)
 class AddExpr(_BaseBinaryExpr, _BaseDataClass):
     pass
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, eq=False)
 class MultiplyExpr(_BaseBinaryExpr, _BaseDataClass):
     pass
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, eq=False)
 class DivideExpr(_BaseBinaryExpr, _BaseDataClass):
     pass
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, eq=False)
 class BitOr(_BaseBinaryExpr, _BaseDataClass):
     pass
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, eq=False)
 class BitXor(_BaseBinaryExpr, _BaseDataClass):
     pass
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, eq=False)
 class BitAnd(_BaseBinaryExpr, _BaseDataClass):
     pass
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, eq=False)
 class BitNot(_BaseExpression, _BaseDataClass):
-    arg: Annotated["Expression", TypeIs(_BaseExpression)]
+    arg: Annotated["Expression", InstanceOf(_BaseExpression)]
 
 
 Expression = Union[
@@ -162,7 +164,7 @@ Expression = Union[
 ]
 
 
-class _BaseBoolCondition(ABC):
+class _BaseBoolCondition(_CachedHash, ABC):
     @classmethod
     def __check_operation_is_valid(
         cls, arg: Any, operation: Literal["&", "|", "~"]
@@ -174,65 +176,65 @@ class _BaseBoolCondition(ABC):
 
     def __and__(self, other: "BooleanCondition") -> "BooleanCondition":
         self.__check_operation_is_valid(other, "&")
-        return AndBooleanCondition(cast(BooleanCondition, self), other)
+        return AndBooleanCondition((cast(BooleanCondition, self), other))
 
     def __or__(self, other: "BooleanCondition") -> "BooleanCondition":
-        self.__check_operation_is_valid(other, "&")
-        return OrBooleanCondition(cast(BooleanCondition, self), other)
+        self.__check_operation_is_valid(other, "|")
+        return OrBooleanCondition((cast(BooleanCondition, self), other))
 
     def __invert__(self) -> "BooleanCondition":
         self.__check_operation_is_valid(self, "~")
         return NotBooleanCondition(cast(BooleanCondition, self))
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, eq=False)
 class _BinaryBoolCondition(_BaseBoolCondition, _BaseDataClass):
     left: Annotated[Expression, TypeIs(Expression)]
     right: Annotated[Expression, TypeIs(Expression)]
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, eq=False)
 class EqualTo(_BinaryBoolCondition, _BaseDataClass):
     pass
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, eq=False)
 class NotEqualTo(_BinaryBoolCondition, _BaseDataClass):
     pass
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, eq=False)
 class LessThan(_BinaryBoolCondition, _BaseDataClass):
     pass
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, eq=False)
 class LessThanOrEqual(_BinaryBoolCondition, _BaseDataClass):
     pass
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, eq=False)
 class GreaterThan(_BinaryBoolCondition, _BaseDataClass):
     pass
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, eq=False)
 class GreaterThanOrEqual(_BinaryBoolCondition, _BaseDataClass):
     pass
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, eq=False)
 class ActionEqualToConstraint(_BaseBoolCondition, _BaseDataClass):
     action_value: McmasId
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, eq=False)
 class AgentActionEqualToConstraint(_BaseBoolCondition, _BaseDataClass):
     agent: McmasId
     action_value: McmasId
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, eq=False)
 class EnvironmentActionEqualToConstraint(_BaseBoolCondition, _BaseDataClass):
     action_value: McmasId
 
@@ -244,7 +246,7 @@ class _BaseConnectiveBooleanCondition(_BaseBoolCondition):
 OperandType = TypeVar("OperandType", bound="BooleanCondition")
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, eq=False)
 class NotBooleanCondition(
     _BaseConnectiveBooleanCondition, _BaseDataClass, Generic[OperandType]
 ):
@@ -254,31 +256,47 @@ class NotBooleanCondition(
     ]
 
 
-@dataclasses.dataclass(frozen=True)
-class AndBooleanCondition(
-    _BaseConnectiveBooleanCondition, _BaseDataClass, Generic[OperandType]
-):
-    left: Annotated[
-        OperandType,
-        InstanceOf(_BaseBoolCondition),
-    ]
-    right: Annotated[
-        OperandType,
-        InstanceOf(_BaseBoolCondition),
-    ]
+class _NaryBoolCondition(_BaseConnectiveBooleanCondition, _BaseDataClass):
+    """
+    Base class of the n-ary connectives.
 
+    The operands that are conditions of the same class are replaced by their own operands, so nested conjunctions
+    (resp. disjunctions) are always flattened into a single one.
+    """
 
-@dataclasses.dataclass(frozen=True)
-class OrBooleanCondition(
-    _BaseConnectiveBooleanCondition, _BaseDataClass, Generic[OperandType]
-):
-    left: Annotated[
-        "BooleanCondition",
-        InstanceOf(_BaseBoolCondition),
+    operands: Sequence["BooleanCondition"]
+
+    def __post_init__(self) -> None:
+        super().__post_init__()
+        node_class = self.__class__
+        for operand in self.operands:
+            if operand.__class__ is node_class:
+                break
+        else:
+            return
+
+        flat_operands: list[BooleanCondition] = []
+        for operand in self.operands:
+            if operand.__class__ is node_class:
+                flat_operands.extend(cast(_NaryBoolCondition, operand).operands)
+            else:
+                flat_operands.append(operand)
+        object.__setattr__(self, "operands", tuple(flat_operands))
+
+
+@dataclasses.dataclass(frozen=True, eq=False)
+class AndBooleanCondition(_NaryBoolCondition, Generic[OperandType]):
+    operands: Annotated[
+        Sequence[OperandType],
+        SequenceConstraint(min_items=2, item_type=_BaseBoolCondition),
     ]
-    right: Annotated[
-        "BooleanCondition",
-        InstanceOf(_BaseBoolCondition),
+
+
+@dataclasses.dataclass(frozen=True, eq=False)
+class OrBooleanCondition(_NaryBoolCondition, Generic[OperandType]):
+    operands: Annotated[
+        Sequence["BooleanCondition"],
+        SequenceConstraint(min_items=2, item_type=_BaseBoolCondition),
     ]
 
 
@@ -296,3 +314,33 @@ BooleanCondition = Union[
     AndBooleanCondition,
     OrBooleanCondition,
 ]
+
+
+def conjunction(operands: Iterable[BooleanCondition]) -> BooleanCondition:
+    """
+    Build the conjunction of boolean conditions, in a single n-ary node.
+
+    :param operands: the conditions; there must be at least one
+    :return: the conjunction of the conditions, or the condition itself if there is only one
+    """
+    operands = tuple(operands)
+    if len(operands) == 0:
+        raise McmasException("conjunction expected at least one condition, got none")
+    if len(operands) == 1:
+        return operands[0]
+    return AndBooleanCondition(operands)
+
+
+def disjunction(operands: Iterable[BooleanCondition]) -> BooleanCondition:
+    """
+    Build the disjunction of boolean conditions, in a single n-ary node.
+
+    :param operands: the conditions; there must be at least one
+    :return: the disjunction of the conditions, or the condition itself if there is only one
+    """
+    operands = tuple(operands)
+    if len(operands) == 0:
+        raise McmasException("disjunction expected at least one condition, got none")
+    if len(operands) == 1:
+        return operands[0]
+    return OrBooleanCondition(operands)
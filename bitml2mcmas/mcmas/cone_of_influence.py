@@ -0,0 +1,349 @@
+"""Cone-of-influence reduction of interpreted systems."""
+
+import dataclasses
+from collections.abc import Iterable, Sequence
+from typing import AbstractSet, Any
+
+from bitml2mcmas.helpers.traversal import iter_nodes
+from bitml2mcmas.mcmas.ast import Agent, Environment, EvaluationRule, EvolutionRule, InterpretedSystem, VarDefinition
+from bitml2mcmas.mcmas.boolcond import (
+    ActionEqualToConstraint,
+    AgentActionEqualToConstraint,
+    AndBooleanCondition,
+    AttributeIdAtom,
+    BooleanCondition,
+    EnvironmentActionEqualToConstraint,
+    EnvironmentIdAtom,
+    EqualTo,
+    Expression,
+    FalseBoolValue,
+    IdAtom,
+    IntAtom,
+    OrBooleanCondition,
+    TrueBoolValue,
+    conjunction,
+)
+from bitml2mcmas.mcmas.custom_types import ENVIRONMENT, McmasId
+from bitml2mcmas.mcmas.formula import AtomicFormula, FormulaType
+
+# a variable, identified by its owner (the environment, or an agent name) and its name
+_Variable = tuple[McmasId, McmasId]
+
+
+def _get_read_variables(
+    roots: Iterable[Any], owner: McmasId | None, local_varnames: AbstractSet[McmasId]
+) -> set[_Variable]:
+    """Get the variables read by conditions or expressions of a context; the owner is None for global contexts."""
+    result: set[_Variable] = set()
+    for node in iter_nodes(roots):
+        node_class = node.__class__
+        if node_class is IdAtom:
+            # enumeration values are IdAtoms too: only the names of the local variables are variables
+            if owner is not None and node.value in local_varnames:
+                result.add((owner, node.value))
+        elif node_class is EnvironmentIdAtom:
+            result.add((ENVIRONMENT, node.attribute))
+        elif node_class is AttributeIdAtom:
+            result.add((node.mcmas_object, node.attribute))
+    return result
+
+
+def _get_atomic_propositions(formulae: Iterable[FormulaType]) -> set[McmasId]:
+    return {node.id for node in iter_nodes(formulae) if node.__class__ is AtomicFormula}
+
+
+def _get_conjuncts(condition: BooleanCondition) -> Sequence[BooleanCondition]:
+    if condition.__class__ is AndBooleanCondition:
+        return condition.operands
+    return (condition,)
+
+
+def _get_disjuncts(condition: BooleanCondition) -> Sequence[BooleanCondition]:
+    if condition.__class__ is OrBooleanCondition:
+        return condition.operands
+    return (condition,)
+
+
+def _get_fixed_values(condition: BooleanCondition, local_varnames: AbstractSet[McmasId]) -> dict[Any, Any]:
+    """Get the actions and the variables that a conjunction sets to a constant, with their constants."""
+    result: dict[Any, Any] = {}
+    for conjunct in _get_conjuncts(condition):
+        conjunct_class = conjunct.__class__
+        if conjunct_class is ActionEqualToConstraint or conjunct_class is EnvironmentActionEqualToConstraint:
+            result[conjunct_class] = conjunct.action_value
+        elif conjunct_class is AgentActionEqualToConstraint:
+            result[(conjunct_class, conjunct.agent)] = conjunct.action_value
+        elif (
+            conjunct_class is EqualTo
+            and _is_variable(conjunct.left, local_varnames)
+            and _is_constant(conjunct.right, local_varnames)
+        ):
+            result[conjunct.left] = conjunct.right
+    return result
+
+
+def _is_variable(expression: Expression, local_varnames: AbstractSet[McmasId]) -> bool:
+    expression_class = expression.__class__
+    if expression_class is IdAtom:
+        return expression.value in local_varnames
+    return expression_class is EnvironmentIdAtom or expression_class is AttributeIdAtom
+
+
+def _is_constant(expression: Expression, local_varnames: AbstractSet[McmasId]) -> bool:
+    expression_class = expression.__class__
+    if expression_class is IdAtom:
+        # an enumeration value
+        return expression.value not in local_varnames
+    return expression_class is IntAtom or expression_class is TrueBoolValue or expression_class is FalseBoolValue
+
+
+def _may_assign_different_values(
+    assignments: Sequence[tuple[Expression, BooleanCondition]], local_varnames: AbstractSet[McmasId]
+) -> bool:
+    """
+    Tell whether two evolution rules that assign different values to a variable may be enabled at the same time.
+
+    Two rules cannot be enabled at the same time if each disjunct of the condition of one of them, and each disjunct of
+    the condition of the other one, set an action or a variable to different constants; otherwise, they are assumed
+    to be enabled at the same time.
+    """
+    if len({value for value, _ in assignments}) < 2:
+        return False
+    fixed_values = [
+        (value, [_get_fixed_values(disjunct, local_varnames) for disjunct in _get_disjuncts(condition)])
+        for value, condition in assignments
+    ]
+    for index, (first_value, first_disjuncts) in enumerate(fixed_values):
+        for second_value, second_disjuncts in fixed_values[index + 1 :]:
+            if first_value == second_value:
+                continue
+            for first in first_disjuncts:
+                for second in second_disjuncts:
+                    if all(first.get(key, constant) == constant for key, constant in second.items()):
+                        return True
+    return False
+
+
+def _remove_effects(
+    rules: Sequence[EvolutionRule], owner: McmasId, removed: AbstractSet[_Variable]
+) -> list[EvolutionRule]:
+    result = []
+    for rule in rules:
+        effects = [effect for effect in rule.effects if (owner, effect.varname) not in removed]
+        if len(effects) == len(rule.effects):
+            result.append(rule)
+        elif len(effects) > 0:
+            result.append(dataclasses.replace(rule, effects=effects))
+    return result
+
+
+def _remove_var_definitions(
+    var_definitions: Sequence[VarDefinition] | None, owner: McmasId, removed: AbstractSet[_Variable]
+) -> list[VarDefinition] | None:
+    if var_definitions is None:
+        return None
+    return [var_definition for var_definition in var_definitions if (owner, var_definition.varname) not in removed]
+
+
+def _get_environment_var_definitions(environment: Environment | None) -> list[VarDefinition]:
+    if environment is None:
+        return []
+    return [*(environment.obs_var_definitions or ()), *(environment.env_var_definitions or ())]
+
+
+class _ConeOfInfluence:
+    """The dependencies between the variables of an interpreted system, and the variables relevant for its formulae."""
+
+    def __init__(self, system: InterpretedSystem, candidates: AbstractSet[_Variable]) -> None:
+        self.__system = system
+        self.__candidates = candidates
+        # for each variable, the variables read by the evolution rules that assign it
+        self.__dependencies: dict[_Variable, set[_Variable]] = {}
+        self.__roots: set[_Variable] = set()
+
+        used_propositions = _get_atomic_propositions([*system.formulae, *system.fair_formulae])
+        self.evaluation_rules: list[EvaluationRule] = [
+            rule for rule in system.evaluation_rules if rule.prop_id in used_propositions
+        ]
+        if len(self.evaluation_rules) == 0 and len(system.evaluation_rules) > 0:
+            # ISPL requires at least one evaluation rule
+            self.evaluation_rules.append(system.evaluation_rules[0])
+        self.__roots |= _get_read_variables([rule.condition for rule in self.evaluation_rules], None, frozenset())
+
+        environment = system.environment
+        if environment is not None:
+            self.__add_context(
+                ENVIRONMENT,
+                _get_environment_var_definitions(environment),
+                environment.env_protocol_definition.rules,
+                environment.env_red_definitions,
+                environment.env_evolution_definition,
+            )
+        for agent in system.agents:
+            self.__add_context(
+                agent.name,
+                agent.agent_var_definitions,
+                agent.agent_protocol_definition.rules,
+                agent.agent_red_definitions,
+                agent.agent_evolution_definition,
+            )
+
+        self.__init_conjuncts = _get_conjuncts(system.initial_states_boolean_condition)
+        self.__init_conjuncts_reads = [
+            _get_read_variables([conjunct], None, frozenset()) for conjunct in self.__init_conjuncts
+        ]
+        self.relevant = self.__compute_relevant_variables()
+
+    def __add_context(
+        self,
+        owner: McmasId,
+        var_definitions: Sequence[VarDefinition],
+        protocol_rules: Sequence[Any] | None,
+        red_definitions: BooleanCondition | None,
+        evolution_rules: Sequence[EvolutionRule],
+    ) -> None:
+        local_varnames = frozenset(var_definition.varname for var_definition in var_definitions)
+        # the variables that cannot be removed are relevant by definition
+        self.__roots.update(
+            variable
+            for variable in ((owner, varname) for varname in local_varnames)
+            if variable not in self.__candidates
+        )
+        # the protocols and the red states are part of the semantics of the strategies and of the formulae
+        roots = [rule.condition for rule in protocol_rules or ()]
+        if red_definitions is not None:
+            roots.append(red_definitions)
+        self.__roots |= _get_read_variables(roots, owner, local_varnames)
+
+        # the values assigned to each variable that may be removed, with the conditions of the assignments
+        assignments: dict[McmasId, list[tuple[Expression, BooleanCondition]]] = {}
+        for rule in evolution_rules:
+            condition_reads = _get_read_variables([rule.condition], owner, local_varnames)
+            for effect in rule.effects:
+                variable = (owner, effect.varname)
+                dependencies = self.__dependencies.setdefault(variable, set())
+                dependencies |= condition_reads
+                dependencies |= _get_read_variables([effect.value], owner, local_varnames)
+                if variable in self.__candidates:
+                    assignments.setdefault(effect.varname, []).append((effect.value, rule.condition))
+        # two rules enabled at the same time that assign different values to a variable block the transition: removing
+        # the variable would unblock it, so such a variable is relevant
+        self.__roots.update(
+            (owner, varname)
+            for varname, var_assignments in assignments.items()
+            if _may_assign_different_values(var_assignments, local_varnames)
+        )
+
+    def __compute_relevant_variables(self) -> set[_Variable]:
+        relevant: set[_Variable] = set()
+        pending = list(self.__roots)
+        while True:
+            while pending:
+                variable = pending.pop()
+                if variable in relevant:
+                    continue
+                relevant.add(variable)
+                pending.extend(self.__dependencies.get(variable, set()) - relevant)
+
+            # a conjunct of the initial states condition relates the initial values of all its variables
+            touched = False
+            for conjunct_reads in self.__init_conjuncts_reads:
+                if not conjunct_reads.isdisjoint(relevant):
+                    touched = True
+                    pending.extend(conjunct_reads - relevant)
+            if not touched and len(self.__init_conjuncts_reads) > 0:
+                # the initial states condition cannot be empty
+                pending.extend(self.__init_conjuncts_reads[0] - relevant)
+            if not pending:
+                return relevant
+
+    def get_initial_states_condition(self, removed: AbstractSet[_Variable]) -> BooleanCondition:
+        kept = [
+            conjunct
+            for conjunct, conjunct_reads in zip(self.__init_conjuncts, self.__init_conjuncts_reads, strict=True)
+            if len(conjunct_reads) == 0 or not conjunct_reads <= removed
+        ]
+        if len(kept) == len(self.__init_conjuncts):
+            return self.__system.initial_states_boolean_condition
+        return conjunction(kept)
+
+
+def _get_candidates(system: InterpretedSystem, uniform: bool) -> set[_Variable]:
+    """Get the variables that may be removed."""
+    environment = system.environment
+    candidates: set[_Variable] = set()
+    if uniform:
+        if environment is not None:
+            observed = {varname for agent in system.agents for varname in agent.lobs_var_definitions or ()}
+            candidates.update(
+                (ENVIRONMENT, var_definition.varname)
+                for var_definition in environment.env_var_definitions or ()
+                if var_definition.varname not in observed
+            )
+        return candidates
+
+    candidates.update(
+        (ENVIRONMENT, var_definition.varname) for var_definition in _get_environment_var_definitions(environment)
+    )
+    for agent in system.agents:
+        # ISPL requires at least one variable per agent
+        candidates.update((agent.name, var_definition.varname) for var_definition in agent.agent_var_definitions[1:])
+    return candidates
+
+
+def _reduce_environment(environment: Environment, removed: AbstractSet[_Variable]) -> Environment:
+    return dataclasses.replace(
+        environment,
+        obs_var_definitions=_remove_var_definitions(environment.obs_var_definitions, ENVIRONMENT, removed),
+        env_var_definitions=_remove_var_definitions(environment.env_var_definitions, ENVIRONMENT, removed),
+        env_evolution_definition=_remove_effects(environment.env_evolution_definition, ENVIRONMENT, removed),
+    )
+
+
+def _reduce_agent(agent: Agent, removed: AbstractSet[_Variable]) -> Agent:
+    lobs_var_definitions = agent.lobs_var_definitions
+    if lobs_var_definitions is not None:
+        lobs_var_definitions = [varname for varname in lobs_var_definitions if (ENVIRONMENT, varname) not in removed]
+    return dataclasses.replace(
+        agent,
+        lobs_var_definitions=lobs_var_definitions,
+        agent_var_definitions=_remove_var_definitions(agent.agent_var_definitions, agent.name, removed),
+        agent_evolution_definition=_remove_effects(agent.agent_evolution_definition, agent.name, removed),
+    )
+
+
+def reduce_to_cone_of_influence(system: InterpretedSystem, uniform: bool = False) -> InterpretedSystem:
+    """
+    Remove the variables of an interpreted system that cannot influence its formulae.
+
+    The relevant variables are those read by the evaluation rules of the atomic propositions of the formulae (and of
+    the fairness formulae), by the protocols and the red states, by the evolution rules of relevant variables, and
+    those related to a relevant variable by a conjunct of the initial states condition. The other variables are
+    removed, together with their evolution effects (and the evolution rules left without effects) and their initial
+    states conjuncts; the evaluation rules of unused propositions are removed too. The actions are kept, since they
+    define the strategies of the agents.
+
+    A variable that two evolution rules enabled at the same time may assign different values is relevant too, since
+    such rules block the transition; the rules are known not to be enabled at the same time only if their conditions
+    set an action, or a variable, to different constants. The input system is not modified.
+
+    :param system: the interpreted system
+    :param uniform: if False, any variable can be removed (but one per agent, since ISPL requires it): this is sound
+        under the perfect information semantics, the default of MCMAS. If True, only the private variables of the
+        environment that no agent observes can be removed, so the local states of the agents (other than the
+        environment) are unchanged, as required by the uniform semantics (MCMAS option -uniform)
+    :return: the reduced interpreted system
+    """
+    candidates = _get_candidates(system, uniform)
+    cone = _ConeOfInfluence(system, candidates)
+    removed = candidates - cone.relevant
+    if len(removed) == 0 and len(cone.evaluation_rules) == len(system.evaluation_rules):
+        return system
+
+    return dataclasses.replace(
+        system,
+        environment=_reduce_environment(system.environment, removed) if system.environment is not None else None,
+        agents=[_reduce_agent(agent, removed) for agent in system.agents],
+        evaluation_rules=cone.evaluation_rules,
+        initial_states_boolean_condition=cone.get_initial_states_condition(removed),
+    )
@@ -4,11 +4,12 @@ import dataclasses
 from abc import ABC
 from typing import Annotated, Union, cast
 
+from bitml2mcmas.helpers.hashing import _CachedHash
 from bitml2mcmas.helpers.validation import InstanceOf, _BaseDataClass
 from bitml2mcmas.mcmas.custom_types import McmasId
 
 
-class _BaseFormula(ABC):
+class _BaseFormula(_CachedHash, ABC):
 
     def __invert__(self: "FormulaType"):
         return NotFormula(self)
@@ -25,126 +26,126 @@ class _BaseAtomicFormula(_BaseFormula):
     pass
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, eq=False)
 class AtomicFormula(_BaseAtomicFormula, _BaseDataClass):
     id: McmasId
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, eq=False)
 class GreenStatesAtomicFormula(_BaseAtomicFormula, _BaseDataClass):
     id: McmasId
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, eq=False)
 class RedStatesAtomicFormula(_BaseAtomicFormula, _BaseDataClass):
     id: McmasId
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, eq=False)
 class EnvGreenStatesAtomicFormula(_BaseAtomicFormula, _BaseDataClass):
     pass
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, eq=False)
 class EnvRedStatesAtomicFormula(_BaseAtomicFormula, _BaseDataClass):
     pass
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, eq=False)
 class _BaseDiamondFormula(_BaseFormula, _BaseDataClass):
     group_id: McmasId
     arg: Annotated["FormulaType", InstanceOf(_BaseFormula)]
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, eq=False)
 class DiamondNextFormula(_BaseDiamondFormula):
     pass
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, eq=False)
 class DiamondEventuallyFormula(_BaseDiamondFormula):
     pass
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, eq=False)
 class DiamondAlwaysFormula(_BaseDiamondFormula):
     pass
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, eq=False)
 class DiamondUntilFormula(_BaseFormula):
     group_id: McmasId
     left: Annotated["FormulaType", InstanceOf(_BaseFormula)]
     right: Annotated["FormulaType", InstanceOf(_BaseFormula)]
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, eq=False)
 class _BaseUnaryFormula(_BaseFormula, _BaseDataClass, ABC):
     arg: Annotated["FormulaType", InstanceOf(_BaseFormula)]
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, eq=False)
 class _BaseBinaryFormula(_BaseFormula, _BaseDataClass, ABC):
     left: Annotated["FormulaType", InstanceOf(_BaseFormula)]
     right: Annotated["FormulaType", InstanceOf(_BaseFormula)]
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, eq=False)
 class AGFormula(_BaseUnaryFormula):
     pass
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, eq=False)
 class EGFormula(_BaseUnaryFormula):
     pass
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, eq=False)
 class AXFormula(_BaseUnaryFormula):
     pass
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, eq=False)
 class EXFormula(_BaseUnaryFormula):
     pass
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, eq=False)
 class AFFormula(_BaseUnaryFormula):
     pass
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, eq=False)
 class EFFormula(_BaseUnaryFormula):
     pass
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, eq=False)
 class AUntilFormula(_BaseBinaryFormula, _BaseDataClass):
     pass
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, eq=False)
 class EUntilFormula(_BaseBinaryFormula, _BaseDataClass):
     pass
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, eq=False)
 class NotFormula(_BaseUnaryFormula, _BaseDataClass):
     pass
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, eq=False)
 class AndFormula(_BaseBinaryFormula, _BaseDataClass):
     pass
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, eq=False)
 class OrFormula(_BaseBinaryFormula, _BaseDataClass):
     pass
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, eq=False)
 class ImpliesFormula(_BaseBinaryFormula, _BaseDataClass):
     pass
 
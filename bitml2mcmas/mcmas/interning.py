@@ -0,0 +1,117 @@
+"""Interning (hash-consing) of boolean conditions and formulae."""
+
+import dataclasses
+from enum import Enum
+from typing import Any, TypeVar
+
+from bitml2mcmas.helpers.validation import trusted_construction
+from bitml2mcmas.mcmas.boolcond import _BaseBoolCondition, _BaseExpression
+from bitml2mcmas.mcmas.formula import _BaseFormula
+
+T = TypeVar("T")
+
+_INTERNED_TYPES = (_BaseExpression, _BaseBoolCondition, _BaseFormula)
+_COLLECTION_TYPES = (list, tuple, set, frozenset)
+_ATOMIC_TYPES = (str, int, float, bool, type(None), Enum)
+
+_INIT_FIELD_NAMES_BY_CLASS: dict[type, tuple[str, ...]] = {}
+
+
+def _get_init_field_names(cls: type) -> tuple[str, ...] | None:
+    """Get the names of the init fields of a dataclass, or None if the class is not a dataclass."""
+    field_names = _INIT_FIELD_NAMES_BY_CLASS.get(cls)
+    if field_names is None:
+        if not dataclasses.is_dataclass(cls):
+            return None
+        field_names = tuple(field.name for field in dataclasses.fields(cls) if field.init)
+        _INIT_FIELD_NAMES_BY_CLASS[cls] = field_names
+    return field_names
+
+
+def _get_children(obj: Any) -> list[Any] | None:
+    """Get the children of a dataclass or of a collection, or None if the object is a leaf."""
+    if isinstance(obj, _COLLECTION_TYPES):
+        return list(obj)
+    field_names = _get_init_field_names(type(obj))
+    if field_names is None:
+        return None
+    return [getattr(obj, field_name) for field_name in field_names]
+
+
+class NodeInterner:
+    """
+    Factory of canonical boolean conditions, expressions and formulae.
+
+    Structurally equal nodes interned by the same interner are the same object, so they can be compared by identity,
+    and the results cached on a node (e.g. by the validators) are shared by all its occurrences. The interner keeps the
+    canonical nodes alive for its whole lifetime.
+    """
+
+    def __init__(self) -> None:
+        self.__nodes: dict[tuple, Any] = {}
+        self.__hits = 0
+
+    def __len__(self) -> int:
+        return len(self.__nodes)
+
+    @property
+    def hits(self) -> int:
+        """The number of interned nodes that were replaced by an existing canonical node."""
+        return self.__hits
+
+    def intern(self, obj: T) -> T:
+        """
+        Intern all the boolean conditions, expressions and formulae reachable from an object.
+
+        The nodes that (transitively) contain an interned node are rebuilt with the canonical children; objects that
+        are not conditions or formulae (e.g. evolution rules) are rebuilt too, but not interned. The input object is
+        not modified. The rebuilt objects are not validated again, since they are equal to valid objects.
+
+        :param obj: the object; e.g. a boolean condition, or a whole interpreted system
+        :return: the object with canonical nodes
+        """
+        # for each visited object, the rebuilt object and the key that identifies it in the keys of its parents
+        results: dict[int, tuple[Any, Any]] = {}
+        stack: list[tuple[Any, list[Any] | None]] = [(obj, None)]
+        with trusted_construction():
+            while stack:
+                current, children = stack.pop()
+                if children is not None:
+                    results[id(current)] = self.__rebuild(current, children, [results[id(child)] for child in children])
+                    continue
+                if id(current) in results:
+                    continue
+                if isinstance(current, _ATOMIC_TYPES):
+                    results[id(current)] = (current, (type(current), current))
+                    continue
+                children = _get_children(current)
+                if children is None:
+                    results[id(current)] = (current, id(current))
+                    continue
+                stack.append((current, children))
+                stack.extend((child, None) for child in children if id(child) not in results)
+        return results[id(obj)][0]
+
+    def __rebuild(self, obj: Any, children: list[Any], children_results: list[tuple[Any, Any]]) -> tuple[Any, Any]:
+        new_children = [new_child for new_child, _ in children_results]
+        children_keys = tuple(key for _, key in children_results)
+        changed = any(new_child is not child for new_child, child in zip(new_children, children, strict=True))
+
+        if isinstance(obj, _COLLECTION_TYPES):
+            new_obj = type(obj)(new_children) if changed else obj
+            key = (type(obj), frozenset(children_keys) if isinstance(obj, (set, frozenset)) else children_keys)
+            return new_obj, key
+
+        # the children are the init fields, in order
+        new_obj = type(obj)(*new_children) if changed else obj
+        if not isinstance(new_obj, _INTERNED_TYPES):
+            return new_obj, id(new_obj)
+
+        node_key = (type(new_obj), children_keys)
+        canonical = self.__nodes.get(node_key)
+        if canonical is None:
+            self.__nodes[node_key] = new_obj
+            canonical = new_obj
+        else:
+            self.__hits += 1
+        return canonical, id(canonical)
@@ -0,0 +1,513 @@
+"""Simplification of the boolean conditions of interpreted systems."""
+
+import dataclasses
+import operator
+from collections.abc import Callable, Iterable, Mapping, Sequence
+from typing import Any, Union
+
+from bitml2mcmas.mcmas.ast import (
+    Agent,
+    BooleanVarType,
+    EnumVarType,
+    Environment,
+    EvaluationRule,
+    EvolutionRule,
+    InterpretedSystem,
+    Protocol,
+    VarDefinition,
+    VarType,
+)
+from bitml2mcmas.mcmas.boolcond import (
+    ActionEqualToConstraint,
+    AgentActionEqualToConstraint,
+    AndBooleanCondition,
+    AttributeIdAtom,
+    BooleanCondition,
+    EnvironmentActionEqualToConstraint,
+    EnvironmentIdAtom,
+    EqualTo,
+    FalseBoolValue,
+    GreaterThan,
+    GreaterThanOrEqual,
+    IdAtom,
+    IntAtom,
+    LessThan,
+    LessThanOrEqual,
+    NotBooleanCondition,
+    NotEqualTo,
+    OrBooleanCondition,
+    TrueBoolValue,
+    conjunction,
+    disjunction,
+)
+from bitml2mcmas.mcmas.custom_types import ENVIRONMENT, McmasId
+
+# a simplified condition: either a boolean condition, or a constant truth value
+Simplified = Union[BooleanCondition, bool]
+
+# the possible values of the variables (or actions) of a context, in a fixed order; dicts are used as ordered sets
+_Domains = Mapping[Any, dict[Any, None]]
+
+_NEGATED_COMPARISONS: dict[type, type] = {
+    EqualTo: NotEqualTo,
+    NotEqualTo: EqualTo,
+    LessThan: GreaterThanOrEqual,
+    GreaterThanOrEqual: LessThan,
+    GreaterThan: LessThanOrEqual,
+    LessThanOrEqual: GreaterThan,
+}
+
+_INT_COMPARISONS: dict[type, Callable[[int, int], bool]] = {
+    EqualTo: operator.eq,
+    NotEqualTo: operator.ne,
+    LessThan: operator.lt,
+    GreaterThanOrEqual: operator.ge,
+    GreaterThan: operator.gt,
+    LessThanOrEqual: operator.le,
+}
+
+# the comparisons that hold when the two sides are the same expression
+_REFLEXIVE_COMPARISONS = frozenset({EqualTo, GreaterThanOrEqual, LessThanOrEqual})
+
+_BOOL_VALUE_TYPES = (TrueBoolValue, FalseBoolValue)
+_LITERAL_TYPES = (IntAtom, TrueBoolValue, FalseBoolValue)
+
+
+@dataclasses.dataclass(frozen=True)
+class _ActionOf:
+    """The action performed by an agent (or by the environment); None is the owner of the simplified condition."""
+
+    owner: McmasId | None
+
+
+def _is_constant(value: Simplified) -> bool:
+    return value is True or value is False
+
+
+class _ConditionSimplifier:
+    """
+    Simplifier of the boolean conditions of a single context (e.g. the protocol of an agent).
+
+    The conditions are simplified bottom-up, without recursion, and the result of each node is cached by identity, so
+    the shared subterms are simplified once. The equalities between a variable and one of its values are handled as
+    membership constraints: the constraints on the same variable in a conjunction (resp. disjunction) are merged into
+    the smallest equivalent set of equalities or disequalities.
+    """
+
+    def __init__(self, domains: _Domains, use_not_equal: bool = True) -> None:
+        """
+        Initialize the simplifier.
+
+        :param domains: the values of the variables and of the actions of the context, by variable expression (or
+            by action owner)
+        :param use_not_equal: if False, the negated equalities are never rewritten to disequalities
+        """
+        self.__domains = domains
+        self.__use_not_equal = use_not_equal
+        # for each simplified node, the node itself (to keep it alive) and its simplification
+        self.__results: dict[int, tuple[BooleanCondition, Simplified]] = {}
+
+    def simplify(self, root: BooleanCondition) -> Simplified:
+        results = self.__results
+        stack: list[tuple[BooleanCondition, bool]] = [(root, False)]
+        while stack:
+            node, children_done = stack.pop()
+            if id(node) in results:
+                continue
+            node_class = node.__class__
+            if node_class is AndBooleanCondition or node_class is OrBooleanCondition:
+                children = node.operands
+            elif node_class is NotBooleanCondition:
+                children = (node.arg,)
+            elif node_class in _NEGATED_COMPARISONS:
+                results[id(node)] = (node, self.__simplify_comparison(node))
+                continue
+            else:
+                results[id(node)] = (node, node)
+                continue
+
+            if not children_done:
+                stack.append((node, True))
+                stack.extend((child, False) for child in children if id(child) not in results)
+            elif node_class is NotBooleanCondition:
+                results[id(node)] = (node, self.__simplify_not(node, results[id(node.arg)][1]))
+            else:
+                simplified_children = [results[id(child)][1] for child in children]
+                results[id(node)] = (node, self.__simplify_connective(node, simplified_children))
+        return results[id(root)][1]
+
+    def __simplify_comparison(self, node: Any) -> Simplified:
+        left, right = node.left, node.right
+        if left == right:
+            return node.__class__ in _REFLEXIVE_COMPARISONS
+        if left.__class__ is IntAtom and right.__class__ is IntAtom:
+            return _INT_COMPARISONS[node.__class__](left.value, right.value)
+        if isinstance(left, _BOOL_VALUE_TYPES) and isinstance(right, _BOOL_VALUE_TYPES):
+            # the two values are different
+            if node.__class__ is EqualTo:
+                return False
+            if node.__class__ is NotEqualTo:
+                return True
+        return node
+
+    def __simplify_not(self, node: NotBooleanCondition, arg: Simplified) -> Simplified:
+        if _is_constant(arg):
+            return not arg
+        if arg.__class__ is NotBooleanCondition:
+            return arg.arg
+        if self.__use_not_equal:
+            negated_class = _NEGATED_COMPARISONS.get(arg.__class__)
+            if negated_class is not None:
+                return negated_class(arg.left, arg.right)
+        return node if arg is node.arg else NotBooleanCondition(arg)
+
+    def __simplify_connective(self, node: Any, operands: Sequence[Simplified]) -> Simplified:
+        node_class = node.__class__
+        is_and = node_class is AndBooleanCondition
+        # the constant that decides the whole connective, e.g. false for conjunctions
+        absorbing = not is_and
+
+        # drop the neutral constants and the duplicates, keeping the order of the first occurrences
+        unique: dict[BooleanCondition, None] = {}
+        for operand in operands:
+            if _is_constant(operand):
+                if operand is absorbing:
+                    return absorbing
+                continue
+            if operand.__class__ is node_class:
+                unique.update(dict.fromkeys(operand.operands))
+            else:
+                unique[operand] = None
+
+        merged = self.__merge_memberships(unique, node_class)
+        if _is_constant(merged):
+            return merged
+        if self.__has_complementary_operands(merged):
+            return absorbing
+        result = self.__remove_subsumed_operands(list(merged), node_class)
+
+        if len(result) == 0:
+            return not absorbing
+        if len(result) == 1:
+            return result[0]
+        if len(result) == len(node.operands) and all(
+            new_operand is old_operand for new_operand, old_operand in zip(result, node.operands)
+        ):
+            return node
+        return node_class(tuple(result))
+
+    def __merge_memberships(
+        self, operands: dict[BooleanCondition, None], node_class: type
+    ) -> dict[BooleanCondition, None] | bool:
+        """Merge the membership constraints on the same variable; the merged constraint replaces the first one."""
+        is_and = node_class is AndBooleanCondition
+        groups: dict[Any, list[tuple[BooleanCondition, Any, bool]]] = {}
+        for operand in operands:
+            membership = self.__get_membership(operand)
+            if membership is not None:
+                key, value, positive = membership
+                groups.setdefault(key, []).append((operand, value, positive))
+
+        replacements: dict[BooleanCondition, BooleanCondition | None] = {}
+        for key, members in groups.items():
+            if len(members) < 2:
+                continue
+            merged = self.__merge_group(key, [(value, positive) for _, value, positive in members], is_and)
+            if merged is (not is_and):
+                return merged
+            replacements[members[0][0]] = None if _is_constant(merged) else merged
+            for operand, _, _ in members[1:]:
+                replacements[operand] = None
+        if not replacements:
+            return operands
+
+        result: dict[BooleanCondition, None] = {}
+        for operand in operands:
+            if operand not in replacements:
+                result[operand] = None
+                continue
+            replacement = replacements[operand]
+            if replacement is None:
+                continue
+            if replacement.__class__ is node_class:
+                result.update(dict.fromkeys(replacement.operands))
+            else:
+                result[replacement] = None
+        return result
+
+    def __merge_group(self, key: Any, members: list[tuple[Any, bool]], is_and: bool) -> Simplified:
+        # the merged constraint is 'key in values' if positive, else 'key not in values'
+        first_value, first_positive = members[0]
+        positive, values = first_positive, {first_value: None}
+        for value, member_positive in members[1:]:
+            # by De Morgan, a disjunction is the negated conjunction of the negated constraints
+            left_positive, right_positive = positive, member_positive
+            if not is_and:
+                left_positive, right_positive = not left_positive, not right_positive
+            if left_positive and right_positive:
+                values = {v: None for v in values if v == value}
+            elif left_positive:
+                values = {v: None for v in values if v != value}
+            elif right_positive:
+                values = {value: None} if value not in values else {}
+            else:
+                values = values | {value: None}
+            positive = left_positive or right_positive
+            if not is_and:
+                positive = not positive
+
+        domain = self.__domains.get(key)
+        if domain is None:
+            if len(values) == 0:
+                return not positive
+            return self.__build_constraint(key, values, positive)
+
+        allowed = values if positive else {v: None for v in domain if v not in values}
+        if len(allowed) == 0:
+            return False
+        if len(allowed) == len(domain):
+            return True
+        if len(domain) - len(allowed) < len(allowed):
+            return self.__build_constraint(key, {v: None for v in domain if v not in allowed}, False)
+        return self.__build_constraint(key, allowed, True)
+
+    def __build_constraint(self, key: Any, values: Iterable[Any], positive: bool) -> BooleanCondition:
+        atoms = [self.__build_membership(key, value, positive) for value in values]
+        return disjunction(atoms) if positive else conjunction(atoms)
+
+    def __build_membership(self, key: Any, value: Any, positive: bool) -> BooleanCondition:
+        atom: BooleanCondition
+        if key.__class__ is _ActionOf:
+            if key.owner is None:
+                atom = ActionEqualToConstraint(value)
+            elif key.owner == ENVIRONMENT:
+                atom = EnvironmentActionEqualToConstraint(value)
+            else:
+                atom = AgentActionEqualToConstraint(key.owner, value)
+            return atom if positive else NotBooleanCondition(atom)
+        if positive:
+            return EqualTo(key, value)
+        if self.__use_not_equal:
+            return NotEqualTo(key, value)
+        return NotBooleanCondition(EqualTo(key, value))
+
+    def __get_membership(self, condition: BooleanCondition) -> tuple[Any, Any, bool] | None:
+        """Decompose a (possibly negated) membership constraint into the key, the value and the polarity."""
+        positive = True
+        if condition.__class__ is NotBooleanCondition:
+            condition = condition.arg
+            positive = False
+
+        condition_class = condition.__class__
+        if condition_class is EqualTo or condition_class is NotEqualTo:
+            if condition_class is NotEqualTo:
+                positive = not positive
+            left, right = condition.left, condition.right
+            if self.__is_value_of(right, left):
+                return left, right, positive
+            if self.__is_value_of(left, right):
+                return right, left, positive
+            return None
+        if condition_class is ActionEqualToConstraint:
+            return _ActionOf(None), condition.action_value, positive
+        if condition_class is AgentActionEqualToConstraint:
+            return _ActionOf(condition.agent), condition.action_value, positive
+        if condition_class is EnvironmentActionEqualToConstraint:
+            return _ActionOf(ENVIRONMENT), condition.action_value, positive
+        return None
+
+    def __is_value_of(self, value: Any, variable: Any) -> bool:
+        domain = self.__domains.get(variable)
+        if domain is not None:
+            return value in domain
+        return isinstance(value, _LITERAL_TYPES) and not isinstance(variable, _LITERAL_TYPES)
+
+    def __has_complementary_operands(self, operands: dict[BooleanCondition, None]) -> bool:
+        for operand in operands:
+            if operand.__class__ is NotBooleanCondition:
+                if operand.arg in operands:
+                    return True
+                continue
+            negated_class = _NEGATED_COMPARISONS.get(operand.__class__)
+            if negated_class is not None and negated_class(operand.left, operand.right) in operands:
+                return True
+        return False
+
+    @staticmethod
+    def __remove_subsumed_operands(operands: list[BooleanCondition], node_class: type) -> list[BooleanCondition]:
+        """
+        Remove the operands that are implied by (resp. imply) another operand of a conjunction (resp. disjunction).
+
+        E.g. 'a and (a or b)' is 'a', and '(a and b) or (a and b and c)' is 'a and b'.
+        """
+        dual_class = OrBooleanCondition if node_class is AndBooleanCondition else AndBooleanCondition
+        clauses = [
+            frozenset(operand.operands) if operand.__class__ is dual_class else None for operand in operands
+        ]
+        if all(clause is None for clause in clauses):
+            return operands
+
+        single_operands = {operand for operand, clause in zip(operands, clauses) if clause is None}
+        result = []
+        for index, (operand, clause) in enumerate(zip(operands, clauses)):
+            if clause is not None and (
+                not clause.isdisjoint(single_operands)
+                or any(
+                    other_clause is not None
+                    and (other_clause < clause or (other_clause == clause and other_index < index))
+                    for other_index, other_clause in enumerate(clauses)
+                )
+            ):
+                continue
+            result.append(operand)
+        return result
+
+
+def simplify_boolean_condition(condition: BooleanCondition) -> Simplified:
+    """
+    Simplify a boolean condition, without any knowledge on the types of its variables.
+
+    :param condition: the boolean condition
+    :return: the simplified condition, or a truth value if the condition is constant
+    """
+    return _ConditionSimplifier({}).simplify(condition)
+
+
+def _get_var_domain(vartype: VarType) -> dict[Any, None] | None:
+    if isinstance(vartype, BooleanVarType):
+        return {TrueBoolValue(): None, FalseBoolValue(): None}
+    if isinstance(vartype, EnumVarType):
+        return {IdAtom(value): None for value in sorted(vartype.values)}
+    return None
+
+
+def _add_var_domains(
+    domains: dict[Any, dict[Any, None]],
+    var_definitions: Iterable[VarDefinition],
+    make_variable: Callable[[McmasId], Any],
+) -> None:
+    for var_definition in var_definitions:
+        domain = _get_var_domain(var_definition.vartype)
+        if domain is not None:
+            domains[make_variable(var_definition.varname)] = domain
+
+
+def _add_action_domain(domains: dict[Any, dict[Any, None]], owner: McmasId | None, actions: Iterable[McmasId]) -> None:
+    domain = {action: None for action in sorted(actions)}
+    if len(domain) > 0:
+        domains[_ActionOf(owner)] = domain
+
+
+def _get_environment_var_definitions(environment: Environment | None) -> list[VarDefinition]:
+    if environment is None:
+        return []
+    return [*(environment.obs_var_definitions or ()), *(environment.env_var_definitions or ())]
+
+
+def _keep_if_constant(condition: BooleanCondition, simplified: Simplified) -> BooleanCondition:
+    # constant conditions cannot be written in ISPL: keep the original one
+    return condition if _is_constant(simplified) else simplified  # type: ignore[return-value]
+
+
+def _simplify_optional(simplifier: _ConditionSimplifier, condition: BooleanCondition | None) -> BooleanCondition | None:
+    if condition is None:
+        return None
+    return _keep_if_constant(condition, simplifier.simplify(condition))
+
+
+def _simplify_protocol(simplifier: _ConditionSimplifier, protocol: Protocol) -> Protocol:
+    if protocol.rules is None:
+        return protocol
+    rules = []
+    for rule in protocol.rules:
+        condition = simplifier.simplify(rule.condition)
+        if condition is False:
+            # the rule never enables its actions
+            continue
+        condition = _keep_if_constant(rule.condition, condition)
+        rules.append(rule if condition is rule.condition else dataclasses.replace(rule, condition=condition))
+    if len(rules) == 0:
+        return protocol
+    return dataclasses.replace(protocol, rules=rules)
+
+
+def _simplify_evolution(simplifier: _ConditionSimplifier, rules: Sequence[EvolutionRule]) -> list[EvolutionRule]:
+    result = []
+    for rule in rules:
+        condition = simplifier.simplify(rule.condition)
+        if condition is False:
+            # the rule never fires
+            continue
+        condition = _keep_if_constant(rule.condition, condition)
+        result.append(rule if condition is rule.condition else dataclasses.replace(rule, condition=condition))
+    return result
+
+
+def _simplify_environment(environment: Environment, global_domains: _Domains) -> Environment:
+    domains = dict(global_domains)
+    _add_var_domains(domains, _get_environment_var_definitions(environment), IdAtom)
+    _add_action_domain(domains, None, environment.env_action_definitions)
+    simplifier = _ConditionSimplifier(domains)
+    return dataclasses.replace(
+        environment,
+        env_red_definitions=_simplify_optional(simplifier, environment.env_red_definitions),
+        env_protocol_definition=_simplify_protocol(simplifier, environment.env_protocol_definition),
+        env_evolution_definition=_simplify_evolution(simplifier, environment.env_evolution_definition),
+    )
+
+
+def _simplify_agent(agent: Agent, global_domains: _Domains) -> Agent:
+    domains = dict(global_domains)
+    _add_var_domains(domains, agent.agent_var_definitions, IdAtom)
+    _add_action_domain(domains, None, agent.agent_action_definitions)
+    simplifier = _ConditionSimplifier(domains)
+    return dataclasses.replace(
+        agent,
+        agent_red_definitions=_simplify_optional(simplifier, agent.agent_red_definitions),
+        agent_protocol_definition=_simplify_protocol(simplifier, agent.agent_protocol_definition),
+        agent_evolution_definition=_simplify_evolution(simplifier, agent.agent_evolution_definition),
+    )
+
+
+def simplify_interpreted_system(system: InterpretedSystem) -> InterpretedSystem:
+    """
+    Simplify the boolean conditions of an interpreted system.
+
+    Constants are folded, duplicate and subsumed operands of conjunctions and disjunctions are removed, and the
+    equalities on the same boolean or enumeration variable (or on the same action) are merged. The protocol and
+    evolution rules whose condition is always false are removed; the conditions that are always true are kept as
+    they are, since ISPL has no constant conditions. The input system is not modified.
+
+    :param system: the interpreted system
+    :return: the simplified interpreted system
+    """
+    environment = system.environment
+    global_domains: dict[Any, dict[Any, None]] = {}
+    _add_var_domains(global_domains, _get_environment_var_definitions(environment), EnvironmentIdAtom)
+    if environment is not None:
+        _add_action_domain(global_domains, ENVIRONMENT, environment.env_action_definitions)
+    for agent in system.agents:
+        _add_var_domains(
+            global_domains, agent.agent_var_definitions, lambda varname: AttributeIdAtom(agent.name, varname)
+        )
+        _add_action_domain(global_domains, agent.name, agent.agent_action_definitions)
+
+    evaluation_simplifier = _ConditionSimplifier(global_domains)
+    evaluation_rules = [
+        EvaluationRule(rule.prop_id, _keep_if_constant(rule.condition, evaluation_simplifier.simplify(rule.condition)))
+        for rule in system.evaluation_rules
+    ]
+    # the initial states condition admits only equalities
+    initial_states_simplifier = _ConditionSimplifier(global_domains, use_not_equal=False)
+    initial_states_condition = _keep_if_constant(
+        system.initial_states_boolean_condition,
+        initial_states_simplifier.simplify(system.initial_states_boolean_condition),
+    )
+
+    return dataclasses.replace(
+        system,
+        environment=_simplify_environment(environment, global_domains) if environment is not None else None,
+        agents=[_simplify_agent(agent, global_domains) for agent in system.agents],
+        evaluation_rules=evaluation_rules,
+        initial_states_boolean_condition=initial_states_condition,
+    )
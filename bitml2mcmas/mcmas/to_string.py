@@ -1,9 +1,10 @@
 """Transform a MCMAS program to string."""
 
-from collections.abc import Callable, Collection, Sequence
+import io
+from collections.abc import Callable, Collection, Iterator, Sequence
+from contextlib import contextmanager
 from functools import singledispatch
-from textwrap import indent
-from typing import AbstractSet
+from typing import AbstractSet, Any, TextIO
 
 from bitml2mcmas.helpers.misc import CaseNotHandledError
 from bitml2mcmas.mcmas.ast import (
@@ -50,7 +51,6 @@ from bitml2mcmas.mcmas.boolcond import (
     OrBooleanCondition,
     SubtractExpr,
     TrueBoolValue,
-    _BinaryBoolCondition,
 )
 from bitml2mcmas.mcmas.custom_types import ENVIRONMENT, McmasId
 from bitml2mcmas.mcmas.formula import (
@@ -80,262 +80,464 @@ from bitml2mcmas.mcmas.formula import (
 _DEFAULT_INDENTATION = "  "
 
 
-@singledispatch
-def boolcond_to_string(obj: object) -> str:
-    raise CaseNotHandledError(boolcond_to_string.__name__, obj)  # type: ignore[attr-defined]
+# a node is serialized as a sequence of parts: strings, and children nodes to be serialized in their place
+_Parts = Sequence[Any]
+
+_BOOLCOND_PARTS_BY_CLASS: dict[type, Callable[[Any], _Parts]] = {}
+_FORMULA_PARTS_BY_CLASS: dict[type, Callable[[Any], _Parts]] = {}
+
+
+class SerializationMemo:
+    """
+    Cache of the serialized boolean conditions, expressions and formulae.
+
+    The nodes are cached by identity: a subterm shared by several rules (e.g. the same condition object, or a canonical
+    node of a system compiled with intern_nodes=True) is copied from the cache after its second serialization. Only
+    the nodes with children that are met more than once are cached, and not the ones met while serializing a node that
+    is being cached: the text of a tree that is not shared is never stored, and the text of a shared tree is stored
+    once, not once per level. The leaves are serialized directly. The memo keeps the nodes it met alive.
+    """
+
+    def __init__(self) -> None:
+        self.__strings: dict[int, tuple[Any, str]] = {}
+        # the nodes met once, by id, kept alive so that their ids are not reused
+        self.__seen: dict[int, Any] = {}
+        self.__hits = 0
+        self.__misses = 0
+
+    def __len__(self) -> int:
+        return len(self.__strings)
+
+    @property
+    def hits(self) -> int:
+        """The number of nodes whose serialization was found in the cache."""
+        return self.__hits
+
+    @property
+    def misses(self) -> int:
+        """The number of nodes that were looked up, but not found in the cache."""
+        return self.__misses
+
+    @property
+    def hit_rate(self) -> float:
+        """The fraction of the looked up nodes that were found in the cache, or 0 if no node was looked up."""
+        nb_lookups = self.__hits + self.__misses
+        return self.__hits / nb_lookups if nb_lookups > 0 else 0.0
+
+    def _get(self, node: Any) -> str | None:
+        entry = self.__strings.get(id(node))
+        if entry is None:
+            self.__misses += 1
+            return None
+        self.__hits += 1
+        return entry[1]
+
+    def _is_shared(self, node: Any) -> bool:
+        """Tell whether the node was met before, and mark it as met."""
+        node_id = id(node)
+        if node_id in self.__seen:
+            return True
+        self.__seen[node_id] = node
+        return False
+
+    def _put(self, node: Any, text: str) -> None:
+        # keep a reference to the node, so that its id is not reused
+        self.__strings[id(node)] = (node, text)
+
+
+def _serialize(
+    root: Any,
+    get_parts: Any,
+    implementations: dict[type, Callable[[Any], _Parts]],
+    memo: SerializationMemo | None,
+) -> str:
+    """
+    Serialize a tree from the parts of its nodes, with an explicit stack instead of recursion.
+
+    :param root: the root node
+    :param get_parts: the single-dispatch function that gets the parts of a node; a single part must be a string
+    :param implementations: cache of the implementations of get_parts, by node class
+    :param memo: the cache of the serialized nodes, or None
+    """
+    if memo is not None:
+        return _serialize_memoized(root, get_parts, implementations, memo)
+
+    dispatch: Callable[[type], Callable[[Any], _Parts]] = get_parts.dispatch
+    chunks: list[str] = []
+    append_chunk = chunks.append
+    stack: list[Any] = [root]
+    pop = stack.pop
+    push_parts = stack.extend
+    while stack:
+        item = pop()
+        item_class = item.__class__
+        if item_class is str:
+            append_chunk(item)
+            continue
+        implementation = implementations.get(item_class)
+        if implementation is None:
+            implementation = implementations[item_class] = dispatch(item_class)
+        parts = implementation(item)
+        if len(parts) == 1:
+            append_chunk(parts[0])
+        else:
+            push_parts(reversed(parts))
+    return "".join(chunks)
+
+
+def _serialize_memoized(
+    root: Any,
+    get_parts: Any,
+    implementations: dict[type, Callable[[Any], _Parts]],
+    memo: SerializationMemo,
+) -> str:
+    """Same as _serialize, but look up the nodes with children in the memo, and store the serialization of the shared
+    ones in it."""
+    dispatch: Callable[[type], Callable[[Any], _Parts]] = get_parts.dispatch
+    chunks: list[str] = []
+    append_chunk = chunks.append
+    # the stack items are parts, and (node, index of its first chunk) pairs, to close the serialization of a node
+    stack: list[Any] = [root]
+    pop = stack.pop
+    push_parts = stack.extend
+    # the number of nodes being cached, whose pairs are on the stack: their descendants are not cached
+    nb_recording = 0
+    while stack:
+        item = pop()
+        item_class = item.__class__
+        if item_class is str:
+            append_chunk(item)
+            continue
+        if item_class is tuple:
+            node, start = item
+            text = "".join(chunks[start:])
+            del chunks[start:]
+            append_chunk(text)
+            memo._put(node, text)
+            nb_recording -= 1
+            continue
+        implementation = implementations.get(item_class)
+        if implementation is None:
+            implementation = implementations[item_class] = dispatch(item_class)
+        parts = implementation(item)
+        if len(parts) == 1:
+            append_chunk(parts[0])
+            continue
+        text = memo._get(item)
+        if text is not None:
+            append_chunk(text)
+            continue
+        if memo._is_shared(item) and nb_recording == 0:
+            stack.append((item, len(chunks)))
+            nb_recording += 1
+        push_parts(reversed(parts))
+    return "".join(chunks)
+
+
+def _flatten(node: Any) -> list[Any]:
+    """Get the operands of a chain of binary nodes of the same class as the given node, from left to right."""
+    node_class = node.__class__
+    operands = []
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if current.__class__ is node_class:
+            stack.append(current.right)
+            stack.append(current.left)
+        else:
+            operands.append(current)
+    return operands
+
+
+def _nary_parts(operands: Sequence[Any], operator: str) -> _Parts:
+    parts: list[Any] = ["("]
+    for operand in operands:
+        if len(parts) > 1:
+            parts.append(operator)
+        parts.append(operand)
+    parts.append(")")
+    return parts
+
+
+def boolcond_to_string(obj: object, memo: SerializationMemo | None = None) -> str:
+    """
+    Serialize a boolean condition, or an expression.
+
+    The serialization does not recurse, so it works on arbitrarily deep conditions; the operands of the n-ary
+    conjunctions and disjunctions are written in a single pair of parentheses.
+
+    :param obj: the boolean condition, or the expression
+    :param memo: if not None, the cache of the serialized subterms, shared between calls
+    :return: the ISPL code of the condition
+    """
+    return _serialize(obj, _boolcond_parts, _BOOLCOND_PARTS_BY_CLASS, memo)
 
 
-@boolcond_to_string.register
-def boolcond_to_string_subtract(f: SubtractExpr) -> str:
-    return f"({boolcond_to_string(f.left)} - {boolcond_to_string(f.right)})"
+@singledispatch
+def _boolcond_parts(obj: object) -> _Parts:
+    raise CaseNotHandledError(boolcond_to_string.__name__, obj)
 
 
-@boolcond_to_string.register
-def boolcond_to_string_add(f: AddExpr) -> str:
-    return f"({boolcond_to_string(f.left)} + {boolcond_to_string(f.right)})"
+@_boolcond_parts.register
+def _boolcond_parts_subtract(f: SubtractExpr) -> _Parts:
+    return "(", f.left, " - ", f.right, ")"
 
 
-@boolcond_to_string.register
-def boolcond_to_string_multiply(f: MultiplyExpr) -> str:
-    return f"({boolcond_to_string(f.left)} * {boolcond_to_string(f.right)})"
+@_boolcond_parts.register
+def _boolcond_parts_add(f: AddExpr) -> _Parts:
+    return "(", f.left, " + ", f.right, ")"
 
 
-@boolcond_to_string.register
-def boolcond_to_string_divide(f: DivideExpr) -> str:
-    return f"({boolcond_to_string(f.left)} / {boolcond_to_string(f.right)})"
+@_boolcond_parts.register
+def _boolcond_parts_multiply(f: MultiplyExpr) -> _Parts:
+    return "(", f.left, " * ", f.right, ")"
 
 
-@boolcond_to_string.register
-def boolcond_to_string_bitor(f: BitOr) -> str:
-    return f"({boolcond_to_string(f.left)} | {boolcond_to_string(f.right)})"
+@_boolcond_parts.register
+def _boolcond_parts_divide(f: DivideExpr) -> _Parts:
+    return "(", f.left, " / ", f.right, ")"
 
 
-@boolcond_to_string.register
-def boolcond_to_string_bitand(f: BitAnd) -> str:
-    return f"({boolcond_to_string(f.left)} & {boolcond_to_string(f.right)})"
+@_boolcond_parts.register
+def _boolcond_parts_bitor(f: BitOr) -> _Parts:
+    return "(", f.left, " | ", f.right, ")"
 
 
-@boolcond_to_string.register
-def boolcond_to_string_bitxor(f: BitXor) -> str:
-    return f"({boolcond_to_string(f.left)} ^ {boolcond_to_string(f.right)})"
+@_boolcond_parts.register
+def _boolcond_parts_bitand(f: BitAnd) -> _Parts:
+    return "(", f.left, " & ", f.right, ")"
 
 
-@boolcond_to_string.register
-def boolcond_to_string_bitnot(f: BitNot) -> str:
-    return f"(~{formula_to_string(f.arg)})"
+@_boolcond_parts.register
+def _boolcond_parts_bitxor(f: BitXor) -> _Parts:
+    return "(", f.left, " ^ ", f.right, ")"
 
 
-@boolcond_to_string.register
-def boolcond_to_string_binary_bool_condition(f: _BinaryBoolCondition) -> str:
-    return boolcond_to_string(f.left) and boolcond_to_string(f.right)
+@_boolcond_parts.register
+def _boolcond_parts_bitnot(f: BitNot) -> _Parts:
+    return "(~", f.arg, ")"
 
 
-@boolcond_to_string.register
-def boolcond_to_string_equal_to(f: EqualTo) -> str:
-    return f"({boolcond_to_string(f.left)} = {boolcond_to_string(f.right)})"
+@_boolcond_parts.register
+def _boolcond_parts_equal_to(f: EqualTo) -> _Parts:
+    return "(", f.left, " = ", f.right, ")"
 
 
-@boolcond_to_string.register
-def boolcond_to_string_not_equal_to(f: NotEqualTo) -> str:
-    return f"({boolcond_to_string(f.left)} != {boolcond_to_string(f.right)})"
+@_boolcond_parts.register
+def _boolcond_parts_not_equal_to(f: NotEqualTo) -> _Parts:
+    return "(", f.left, " <> ", f.right, ")"
 
 
-@boolcond_to_string.register
-def boolcond_to_string_less_than(f: LessThan) -> str:
-    return f"({boolcond_to_string(f.left)} < {boolcond_to_string(f.right)})"
+@_boolcond_parts.register
+def _boolcond_parts_less_than(f: LessThan) -> _Parts:
+    return "(", f.left, " < ", f.right, ")"
 
 
-@boolcond_to_string.register
-def boolcond_to_string_less_than_or_equal(f: LessThanOrEqual) -> str:
-    return f"({boolcond_to_string(f.left)} <= {boolcond_to_string(f.right)})"
+@_boolcond_parts.register
+def _boolcond_parts_less_than_or_equal(f: LessThanOrEqual) -> _Parts:
+    return "(", f.left, " <= ", f.right, ")"
 
 
-@boolcond_to_string.register
-def boolcond_to_string_greater_than(f: GreaterThan) -> str:
-    return f"({boolcond_to_string(f.left)} > {boolcond_to_string(f.right)})"
+@_boolcond_parts.register
+def _boolcond_parts_greater_than(f: GreaterThan) -> _Parts:
+    return "(", f.left, " > ", f.right, ")"
 
 
-@boolcond_to_string.register
-def boolcond_to_string_greater_than_or_equal(f: GreaterThanOrEqual) -> str:
-    return f"({boolcond_to_string(f.left)} >= {boolcond_to_string(f.right)})"
+@_boolcond_parts.register
+def _boolcond_parts_greater_than_or_equal(f: GreaterThanOrEqual) -> _Parts:
+    return "(", f.left, " >= ", f.right, ")"
 
 
-@boolcond_to_string.register
-def boolcond_to_string_and(f: AndBooleanCondition) -> str:
-    return f"({boolcond_to_string(f.left)} and {boolcond_to_string(f.right)})"
+@_boolcond_parts.register
+def _boolcond_parts_and(f: AndBooleanCondition) -> _Parts:
+    return _nary_parts(f.operands, " and ")
 
 
-@boolcond_to_string.register
-def boolcond_to_string_or(f: OrBooleanCondition) -> str:
-    return f"({boolcond_to_string(f.left)} or {boolcond_to_string(f.right)})"
+@_boolcond_parts.register
+def _boolcond_parts_or(f: OrBooleanCondition) -> _Parts:
+    return _nary_parts(f.operands, " or ")
 
 
-@boolcond_to_string.register
-def boolcond_to_string_not(f: NotBooleanCondition) -> str:
-    return f"(!{boolcond_to_string(f.arg)})"
+@_boolcond_parts.register
+def _boolcond_parts_not(f: NotBooleanCondition) -> _Parts:
+    return "(!", f.arg, ")"
 
 
-@boolcond_to_string.register
-def boolcond_to_string_id_atom(f: IdAtom) -> str:
-    return f.value
+@_boolcond_parts.register
+def _boolcond_parts_id_atom(f: IdAtom) -> _Parts:
+    return (f.value,)
 
 
-@boolcond_to_string.register
-def boolcond_to_string_int_atom(f: IntAtom) -> str:
-    return str(f.value)
+@_boolcond_parts.register
+def _boolcond_parts_int_atom(f: IntAtom) -> _Parts:
+    return (str(f.value),)
 
 
-@boolcond_to_string.register
-def boolcond_to_string_false_bool_value(f: FalseBoolValue) -> str:
-    return "false"
+@_boolcond_parts.register
+def _boolcond_parts_false_bool_value(f: FalseBoolValue) -> _Parts:
+    return ("false",)
 
 
-@boolcond_to_string.register
-def boolcond_to_string_true_bool_value(f: TrueBoolValue) -> str:
-    return "true"
+@_boolcond_parts.register
+def _boolcond_parts_true_bool_value(f: TrueBoolValue) -> _Parts:
+    return ("true",)
 
 
-@boolcond_to_string.register
-def boolcond_to_string_action_equal_to_constraint(f: ActionEqualToConstraint) -> str:
-    return f"(Action = {f.action_value})"
+@_boolcond_parts.register
+def _boolcond_parts_action_equal_to_constraint(f: ActionEqualToConstraint) -> _Parts:
+    return (f"(Action = {f.action_value})",)
 
 
-@boolcond_to_string.register
-def boolcond_to_string_agent_action_equal_to_constraint(
+@_boolcond_parts.register
+def _boolcond_parts_agent_action_equal_to_constraint(
     f: AgentActionEqualToConstraint,
-) -> str:
-    return f"({f.agent}.Action = {f.action_value})"
+) -> _Parts:
+    return (f"({f.agent}.Action = {f.action_value})",)
 
 
-@boolcond_to_string.register
-def boolcond_to_string_environment_action_equal_to_constraint(
+@_boolcond_parts.register
+def _boolcond_parts_environment_action_equal_to_constraint(
     f: EnvironmentActionEqualToConstraint,
-) -> str:
-    return f"({ENVIRONMENT}.Action = {f.action_value})"
+) -> _Parts:
+    return (f"({ENVIRONMENT}.Action = {f.action_value})",)
+
+
+@_boolcond_parts.register
+def _boolcond_parts_attribute_id_atom(f: AttributeIdAtom) -> _Parts:
+    return (f"{f.mcmas_object}.{f.attribute}",)
+
 
+@_boolcond_parts.register
+def _boolcond_parts_environment_id_atom(f: EnvironmentIdAtom) -> _Parts:
+    return (f"{ENVIRONMENT}.{f.attribute}",)
 
-@boolcond_to_string.register
-def boolcond_to_string_attribute_id_atom(f: AttributeIdAtom) -> str:
-    return f"{f.mcmas_object}.{f.attribute}"
 
+def formula_to_string(obj: object, memo: SerializationMemo | None = None) -> str:
+    """
+    Serialize a formula.
 
-@boolcond_to_string.register
-def boolcond_to_string_environment_id_atom(f: EnvironmentIdAtom) -> str:
-    return f"{ENVIRONMENT}.{f.attribute}"
+    The serialization does not recurse, and chains of 'and' (resp. 'or') formulae are
+    written as a single n-ary conjunction (resp. disjunction).
+
+    :param obj: the formula
+    :param memo: if not None, the cache of the serialized subterms, shared between calls
+    :return: the ISPL code of the formula
+    """
+    return _serialize(obj, _formula_parts, _FORMULA_PARTS_BY_CLASS, memo)
 
 
 @singledispatch
-def formula_to_string(obj: object) -> str:
-    raise CaseNotHandledError(formula_to_string.__name__, obj)  # type: ignore[attr-defined]
+def _formula_parts(obj: object) -> _Parts:
+    raise CaseNotHandledError(formula_to_string.__name__, obj)
 
 
-@formula_to_string.register
-def formula_to_string_ag(f: AGFormula) -> str:
-    return f"(AG ({formula_to_string(f.arg)}))"
+@_formula_parts.register
+def _formula_parts_ag(f: AGFormula) -> _Parts:
+    return "(AG (", f.arg, "))"
 
 
-@formula_to_string.register
-def formula_to_string_eg(f: EGFormula) -> str:
-    return f"(EG {formula_to_string(f.arg)})"
+@_formula_parts.register
+def _formula_parts_eg(f: EGFormula) -> _Parts:
+    return "(EG ", f.arg, ")"
 
 
-@formula_to_string.register
-def formula_to_string_ax(f: AXFormula) -> str:
-    return f"(AX {formula_to_string(f.arg)})"
+@_formula_parts.register
+def _formula_parts_ax(f: AXFormula) -> _Parts:
+    return "(AX ", f.arg, ")"
 
 
-@formula_to_string.register
-def formula_to_string_ex(f: EXFormula) -> str:
-    return f"(EX {formula_to_string(f.arg)})"
+@_formula_parts.register
+def _formula_parts_ex(f: EXFormula) -> _Parts:
+    return "(EX ", f.arg, ")"
 
 
-@formula_to_string.register
-def formula_to_string_af(f: AFFormula) -> str:
-    return f"(AF {formula_to_string(f.arg)})"
+@_formula_parts.register
+def _formula_parts_af(f: AFFormula) -> _Parts:
+    return "(AF ", f.arg, ")"
 
 
-@formula_to_string.register
-def formula_to_string_ef(f: EFFormula) -> str:
-    return f"(EF {formula_to_string(f.arg)})"
+@_formula_parts.register
+def _formula_parts_ef(f: EFFormula) -> _Parts:
+    return "(EF ", f.arg, ")"
 
 
-@formula_to_string.register
-def formula_to_string_auntil(f: AUntilFormula) -> str:
-    return f"(A {formula_to_string(f.left)} U {formula_to_string(f.right)})"
+@_formula_parts.register
+def _formula_parts_auntil(f: AUntilFormula) -> _Parts:
+    return "(A ", f.left, " U ", f.right, ")"
 
 
-@formula_to_string.register
-def formula_to_string_euntil(f: EUntilFormula) -> str:
-    return f"(E {formula_to_string(f.left)} U {formula_to_string(f.right)})"
+@_formula_parts.register
+def _formula_parts_euntil(f: EUntilFormula) -> _Parts:
+    return "(E ", f.left, " U ", f.right, ")"
 
 
-@formula_to_string.register
-def formula_to_string_diamond_next(f: DiamondNextFormula) -> str:
-    return f"(<{f.group_id}>X({formula_to_string(f.arg)}))"
+@_formula_parts.register
+def _formula_parts_diamond_next(f: DiamondNextFormula) -> _Parts:
+    return f"(<{f.group_id}>X(", f.arg, "))"
 
 
-@formula_to_string.register
-def formula_to_string_diamond_eventually(f: DiamondEventuallyFormula) -> str:
-    return f"(<{f.group_id}>F({formula_to_string(f.arg)}))"
+@_formula_parts.register
+def _formula_parts_diamond_eventually(f: DiamondEventuallyFormula) -> _Parts:
+    return f"(<{f.group_id}>F(", f.arg, "))"
 
 
-@formula_to_string.register
-def formula_to_string_diamond_always(f: DiamondAlwaysFormula) -> str:
-    return f"(<{f.group_id}>G({formula_to_string(f.arg)}))"
+@_formula_parts.register
+def _formula_parts_diamond_always(f: DiamondAlwaysFormula) -> _Parts:
+    return f"(<{f.group_id}>G(", f.arg, "))"
 
 
-@formula_to_string.register
-def formula_to_string_xxx(f: DiamondUntilFormula) -> str:
-    return f"(<{f.group_id}>({formula_to_string(f.left)} U {formula_to_string(f.right)}))"
+@_formula_parts.register
+def _formula_parts_diamond_until(f: DiamondUntilFormula) -> _Parts:
+    return f"(<{f.group_id}>(", f.left, " U ", f.right, "))"
 
 
-@formula_to_string.register
-def formula_to_string_atomic_formula(f: AtomicFormula) -> str:
-    return f.id
+@_formula_parts.register
+def _formula_parts_atomic_formula(f: AtomicFormula) -> _Parts:
+    return (f.id,)
 
 
-@formula_to_string.register
-def formula_to_string_green_states_atomic(f: GreenStatesAtomicFormula) -> str:
-    return f"{f.id}.GreenStates"
+@_formula_parts.register
+def _formula_parts_green_states_atomic(f: GreenStatesAtomicFormula) -> _Parts:
+    return (f"{f.id}.GreenStates",)
 
 
-@formula_to_string.register
-def formula_to_string_red_states_atomic(f: RedStatesAtomicFormula) -> str:
-    return f"{f.id}.RedStates"
+@_formula_parts.register
+def _formula_parts_red_states_atomic(f: RedStatesAtomicFormula) -> _Parts:
+    return (f"{f.id}.RedStates",)
 
 
-@formula_to_string.register
-def formula_to_string_environment_green_states_atomic(
+@_formula_parts.register
+def _formula_parts_environment_green_states_atomic(
     f: EnvGreenStatesAtomicFormula,
-) -> str:
-    return f"{ENVIRONMENT}.GreenStates"
+) -> _Parts:
+    return (f"{ENVIRONMENT}.GreenStates",)
 
 
-@formula_to_string.register
-def formula_to_string_environment_red_states_atomic(
+@_formula_parts.register
+def _formula_parts_environment_red_states_atomic(
     f: EnvRedStatesAtomicFormula,
-) -> str:
-    return f"{ENVIRONMENT}.RedStates"
+) -> _Parts:
+    return (f"{ENVIRONMENT}.RedStates",)
 
 
-@formula_to_string.register
-def formula_to_string_not_formula(f: NotFormula) -> str:
-    return f"(!{formula_to_string(f.arg)})"
+@_formula_parts.register
+def _formula_parts_not_formula(f: NotFormula) -> _Parts:
+    return "(!", f.arg, ")"
 
 
-@formula_to_string.register
-def formula_to_string_and_formula(f: AndFormula) -> str:
-    return f"({formula_to_string(f.left)} and {formula_to_string(f.right)})"
+@_formula_parts.register
+def _formula_parts_and_formula(f: AndFormula) -> _Parts:
+    return _nary_parts(_flatten(f), " and ")
 
 
-@formula_to_string.register
-def formula_to_string_or_formula(f: OrFormula) -> str:
-    return f"({formula_to_string(f.left)} or {formula_to_string(f.right)})"
+@_formula_parts.register
+def _formula_parts_or_formula(f: OrFormula) -> _Parts:
+    return _nary_parts(_flatten(f), " or ")
 
 
-@formula_to_string.register
-def formula_to_string_or_formula(f: ImpliesFormula) -> str:
-    return f"({formula_to_string(f.left)}) -> ({formula_to_string(f.right)})"
+@_formula_parts.register
+def _formula_parts_implies_formula(f: ImpliesFormula) -> _Parts:
+    return "(", f.left, ") -> (", f.right, ")"
 
 
 @singledispatch
@@ -358,12 +560,58 @@ def enum_var_type_to_string(var_type: EnumVarType) -> str:
     return "{" + ", ".join(sorted([v for v in var_type.values])) + "}"
 
 
-def _make_section(section_name: str, content: str, with_colon: bool = True) -> str:
-    return (
-        f"{section_name}{':' if with_colon else ''}\n"
-        f"{indent(content, _DEFAULT_INDENTATION)}\n"
-        f"end {section_name}"
-    )
+class _IndentedWriter:
+    """
+    Write lines to a text stream, with incremental indentation.
+
+    Lines are separated by a newline, without a trailing newline after the last line. Empty lines are not
+    indented, as with textwrap.indent.
+    """
+
+    def __init__(self, stream: TextIO, memo: SerializationMemo | None) -> None:
+        self.__stream = stream
+        self.__memo = memo
+        self.__indentation = ""
+        self.__first_line = True
+        self.__nb_lines = 0
+
+    @property
+    def nb_lines(self) -> int:
+        return self.__nb_lines
+
+    @property
+    def memo(self) -> SerializationMemo | None:
+        """The cache of the serialized conditions and formulae, shared by all the written lines, if any."""
+        return self.__memo
+
+    def line(self, text: str = "") -> None:
+        if self.__first_line:
+            self.__first_line = False
+        else:
+            self.__stream.write("\n")
+        if text:
+            self.__stream.write(self.__indentation + text if self.__indentation else text)
+        self.__nb_lines += 1
+
+    @contextmanager
+    def indented(self) -> Iterator[None]:
+        previous_indentation = self.__indentation
+        self.__indentation += _DEFAULT_INDENTATION
+        try:
+            yield
+        finally:
+            self.__indentation = previous_indentation
+
+    @contextmanager
+    def section(self, section_name: str, with_colon: bool = True) -> Iterator[None]:
+        """Write a section; if no line is written in its body, the body is an empty line."""
+        self.line(f"{section_name}{':' if with_colon else ''}")
+        nb_lines_before = self.__nb_lines
+        with self.indented():
+            yield
+            if self.__nb_lines == nb_lines_before:
+                self.line()
+        self.line(f"end {section_name}")
 
 
 def var_definition_to_string(vardef: VarDefinition) -> str:
@@ -374,38 +622,27 @@ def _list_of_mcmas_ids(ids: Collection[McmasId]) -> str:
     return ", ".join(sorted(ids))
 
 
-def _var_definitions_to_string(
-    var_definitions: Sequence[VarDefinition],
+def _write_var_definitions(
+    writer: _IndentedWriter,
+    var_definitions: Sequence[VarDefinition] | None,
     section_name: str,
-    vardef_to_string: Callable,
-) -> str:
-    var_defs_strings = [vardef_to_string(vardef) for vardef in var_definitions]
-    var_defs_body = ";\n".join(var_defs_strings) + ";"
-    return _make_section(section_name, var_defs_body)
-
-
-def _obs_var_defs_to_string(obs_var_definitions: Sequence[VarDefinition] | None) -> str:
-    if obs_var_definitions is None:
-        return ""
-    return _var_definitions_to_string(
-        obs_var_definitions, "Obsvars", var_definition_to_string
-    )
-
-
-def _var_defs_to_string(vars_definitions: Sequence[VarDefinition] | None) -> str:
-    if vars_definitions is None:
-        return ""
-    return _var_definitions_to_string(
-        vars_definitions, "Vars", var_definition_to_string
-    )
-
-
-def _red_states_to_string(red_states: _EnvRedStatesDef) -> str:
+) -> None:
+    if var_definitions is None:
+        writer.line()
+        return
+    with writer.section(section_name):
+        for vardef in var_definitions:
+            writer.line(var_definition_to_string(vardef) + ";")
+        if len(var_definitions) == 0:
+            writer.line(";")
+
+
+def _write_red_states(writer: _IndentedWriter, red_states: _EnvRedStatesDef) -> None:
     if red_states is None:
-        return ""
-
-    condition_str = boolcond_to_string(red_states)
-    return _make_section("RedStates", condition_str)
+        writer.line()
+        return
+    with writer.section("RedStates"):
+        writer.line(boolcond_to_string(red_states, writer.memo))
 
 
 def _actions_to_string(actions: AbstractSet[McmasId]) -> str:
@@ -413,8 +650,8 @@ def _actions_to_string(actions: AbstractSet[McmasId]) -> str:
     return f"Actions = {{{action_list}}};"
 
 
-def _protocol_rule_to_str(protocol_rule: ProtocolRule) -> str:
-    boolcond_str = boolcond_to_string(protocol_rule.condition)
+def _protocol_rule_to_str(protocol_rule: ProtocolRule, memo: SerializationMemo | None) -> str:
+    boolcond_str = boolcond_to_string(protocol_rule.condition, memo)
     action_list_str = _list_of_mcmas_ids(protocol_rule.enabled_actions)
     return f"{boolcond_str}: {{{action_list_str}}};"
 
@@ -424,155 +661,146 @@ def _other_rule_to_str(actions: AbstractSet[McmasId]) -> str:
     return f"Other: {{{action_list_str}}};"
 
 
-def _protocol_to_string(protocol: Protocol | None) -> str:
+def _write_protocol(writer: _IndentedWriter, protocol: Protocol | None) -> None:
     if protocol is None:
-        return ""
-
-    rules_str_list = []
-    if protocol.rules is not None:
-        for rule in protocol.rules:
-            rules_str_list.append(_protocol_rule_to_str(rule))
-
-    if protocol.other_rule is not None:
-        other_rule_str = _other_rule_to_str(protocol.other_rule)
-        rules_str_list.append(other_rule_str)
+        writer.line()
+        return
 
-    protocol_content = "\n".join(rules_str_list)
-    return _make_section("Protocol", protocol_content)
+    with writer.section("Protocol"):
+        if protocol.rules is not None:
+            for rule in protocol.rules:
+                writer.line(_protocol_rule_to_str(rule, writer.memo))
+        if protocol.other_rule is not None:
+            writer.line(_other_rule_to_str(protocol.other_rule))
 
 
-def _effects_to_string(effects: Sequence[Effect]) -> str:
+def _effects_to_string(effects: Sequence[Effect], memo: SerializationMemo | None) -> str:
     effects_str = []
     for effect in effects:
-        effect_str = f"{effect.varname} = {boolcond_to_string(effect.value)}"
+        effect_str = f"{effect.varname} = {boolcond_to_string(effect.value, memo)}"
         effects_str.append(effect_str)
 
     return " and ".join(effects_str)
 
 
-def _evolution_rule_to_string(evolution_rule: EvolutionRule) -> str:
-    effects_str = _effects_to_string(evolution_rule.effects)
-    condition_str = boolcond_to_string(evolution_rule.condition)
+def _evolution_rule_to_string(evolution_rule: EvolutionRule, memo: SerializationMemo | None) -> str:
+    effects_str = _effects_to_string(evolution_rule.effects, memo)
+    condition_str = boolcond_to_string(evolution_rule.condition, memo)
     return f"{effects_str} if {condition_str};"
 
 
-def _evolution_to_string(evolution_rules: Sequence[EvolutionRule]) -> str:
-    evolution_rules_str = "\n".join(map(_evolution_rule_to_string, evolution_rules))
-    return _make_section("Evolution", evolution_rules_str)
+def _write_evolution(writer: _IndentedWriter, evolution_rules: Sequence[EvolutionRule]) -> None:
+    with writer.section("Evolution"):
+        for evolution_rule in evolution_rules:
+            writer.line(_evolution_rule_to_string(evolution_rule, writer.memo))
 
 
-def _environment_to_string(env: Environment | None) -> str:
+def _write_environment(writer: _IndentedWriter, env: Environment | None) -> None:
     if env is None:
-        return ""
-
-    opening = f"Agent {ENVIRONMENT}\n"
-
-    obs_var_section = _obs_var_defs_to_string(env.obs_var_definitions)
-    vars_section = _var_defs_to_string(env.env_var_definitions)
-    red_states_section = _red_states_to_string(env.env_red_definitions)
-    action_def_section = _actions_to_string(env.env_action_definitions)
-    protocol_section = _protocol_to_string(env.env_protocol_definition)
-    evolution_section = _evolution_to_string(env.env_evolution_definition)
-
-    env_body = (
-        f"{obs_var_section}\n"
-        f"{vars_section}\n"
-        f"{red_states_section}\n"
-        f"{action_def_section}\n"
-        f"{protocol_section}\n"
-        f"{evolution_section}\n"
-    )
-
-    closing = "end Agent\n"
-
-    return opening + indent(env_body, prefix=_DEFAULT_INDENTATION) + closing
-
-
-def _lobs_vars_to_string(lobs_vars: Sequence[McmasId] | None) -> str:
+        writer.line()
+        return
+
+    writer.line(f"Agent {ENVIRONMENT}")
+    with writer.indented():
+        _write_var_definitions(writer, env.obs_var_definitions, "Obsvars")
+        _write_var_definitions(writer, env.env_var_definitions, "Vars")
+        _write_red_states(writer, env.env_red_definitions)
+        writer.line(_actions_to_string(env.env_action_definitions))
+        _write_protocol(writer, env.env_protocol_definition)
+        _write_evolution(writer, env.env_evolution_definition)
+    writer.line("end Agent")
+    writer.line()
+
+
+def _write_lobs_vars(writer: _IndentedWriter, lobs_vars: Sequence[McmasId] | None) -> None:
     if lobs_vars is None:
-        return ""
-
-    return f"Lobsvars = {{{_list_of_mcmas_ids(lobs_vars)}}};"
-
-
-def _agent_to_string(agent: Agent) -> str:
-    opening = f"Agent {agent.name}\n"
-
-    lobs_var_section = _lobs_vars_to_string(agent.lobs_var_definitions)
-    vars_section = _var_defs_to_string(agent.agent_var_definitions)
-    red_states_section = _red_states_to_string(agent.agent_red_definitions)
-    action_def_section = _actions_to_string(agent.agent_action_definitions)
-    protocol_section = _protocol_to_string(agent.agent_protocol_definition)
-    evolution_section = _evolution_to_string(agent.agent_evolution_definition)
-
-    agent_body = (
-        f"{lobs_var_section}\n"
-        f"{vars_section}\n"
-        f"{red_states_section}\n"
-        f"{action_def_section}\n"
-        f"{protocol_section}\n"
-        f"{evolution_section}\n"
-    )
+        writer.line()
+        return
+    writer.line(f"Lobsvars = {{{_list_of_mcmas_ids(lobs_vars)}}};")
 
-    closing = "end Agent"
 
-    return opening + indent(agent_body, prefix=_DEFAULT_INDENTATION) + closing
+def _write_agent(writer: _IndentedWriter, agent: Agent) -> None:
+    writer.line(f"Agent {agent.name}")
+    with writer.indented():
+        _write_lobs_vars(writer, agent.lobs_var_definitions)
+        _write_var_definitions(writer, agent.agent_var_definitions, "Vars")
+        _write_red_states(writer, agent.agent_red_definitions)
+        writer.line(_actions_to_string(agent.agent_action_definitions))
+        _write_protocol(writer, agent.agent_protocol_definition)
+        _write_evolution(writer, agent.agent_evolution_definition)
+    writer.line("end Agent")
 
 
-def _evaluation_rule_to_string(evaluation_rule: EvaluationRule) -> str:
-    condition_str = boolcond_to_string(evaluation_rule.condition)
+def _evaluation_rule_to_string(evaluation_rule: EvaluationRule, memo: SerializationMemo | None) -> str:
+    condition_str = boolcond_to_string(evaluation_rule.condition, memo)
     return f"{evaluation_rule.prop_id} if {condition_str}"
 
 
-def _evaluation_to_string(evaluation_rules: Sequence[EvaluationRule]) -> str:
-    content_str = ";\n".join(map(_evaluation_rule_to_string, evaluation_rules)) + ";"
-    return _make_section("Evaluation", content_str, with_colon=False)
+def _write_evaluation(writer: _IndentedWriter, evaluation_rules: Sequence[EvaluationRule]) -> None:
+    with writer.section("Evaluation", with_colon=False):
+        for evaluation_rule in evaluation_rules:
+            writer.line(_evaluation_rule_to_string(evaluation_rule, writer.memo) + ";")
+        if len(evaluation_rules) == 0:
+            writer.line(";")
 
 
-def _initial_states_to_string(initial_states: BooleanCondition) -> str:
-    content_str = boolcond_to_string(initial_states) + ";"
-    return _make_section("InitStates", content_str, with_colon=False)
+def _write_initial_states(writer: _IndentedWriter, initial_states: BooleanCondition) -> None:
+    with writer.section("InitStates", with_colon=False):
+        writer.line(boolcond_to_string(initial_states, writer.memo) + ";")
 
 
 def _group_line_to_string(group: Group) -> str:
     return f"{group.group_name} = {{{_list_of_mcmas_ids(group.agents)}}};"
 
 
-def _groups_to_string(groups: Sequence[Group]) -> str:
-    content = "\n".join(map(_group_line_to_string, groups))
-    return _make_section("Groups", content, with_colon=False)
-
-
-def _formulae_to_string(section_name: str, formulae: Sequence[FormulaType]) -> str:
-    formulae_str = map(lambda f: formula_to_string(f) + ";", formulae)
-    content = "\n".join(formulae_str)
-    return _make_section(section_name, content, with_colon=False)
-
-
-def interpreted_system_to_string(program: InterpretedSystem) -> str:
-    semantics_str = (
-        f"Semantics={program.semantics.value};" if program.semantics is not None else ""
-    )
-    environment_str = _environment_to_string(program.environment)
-
-    agents_str = "\n".join(map(_agent_to_string, program.agents))
-    evaluation_str = _evaluation_to_string(program.evaluation_rules)
-    initial_states_str = _initial_states_to_string(
-        program.initial_states_boolean_condition
-    )
-    groups_str = _groups_to_string(program.groups)
-    fair_formulae_str = _formulae_to_string("Fairness", program.fair_formulae)
-    formulae_str = _formulae_to_string("Formulae", program.formulae)
-
-    program_str = (
-        f"{semantics_str}\n"
-        f"{environment_str}\n"
-        f"{agents_str}\n"
-        f"{evaluation_str}\n"
-        f"{initial_states_str}\n"
-        f"{groups_str}\n"
-        f"{fair_formulae_str}\n"
-        f"{formulae_str}"
-    )
-
-    return program_str
+def _write_groups(writer: _IndentedWriter, groups: Sequence[Group]) -> None:
+    with writer.section("Groups", with_colon=False):
+        for group in groups:
+            writer.line(_group_line_to_string(group))
+
+
+def _write_formulae(writer: _IndentedWriter, section_name: str, formulae: Sequence[FormulaType]) -> None:
+    with writer.section(section_name, with_colon=False):
+        for formula in formulae:
+            writer.line(formula_to_string(formula, writer.memo) + ";")
+
+
+def interpreted_system_to_stream(
+    program: InterpretedSystem, stream: TextIO, memo: SerializationMemo | None = None
+) -> None:
+    """
+    Write the ISPL code of an interpreted system to a text stream.
+
+    The program is written section by section, and rule by rule: apart from the memo, if any, no string holds more
+    than a single line of the output. The output is the same as the one of interpreted_system_to_string.
+
+    :param program: the interpreted system
+    :param stream: the text stream, e.g. a file opened in text mode
+    :param memo: if not None, the cache of the serialized conditions and formulae; it makes the serialization of the
+        shared subterms faster, but it keeps their serialization in memory
+    """
+    writer = _IndentedWriter(stream, memo)
+    writer.line(f"Semantics={program.semantics.value};" if program.semantics is not None else "")
+    _write_environment(writer, program.environment)
+    for agent in program.agents:
+        _write_agent(writer, agent)
+    _write_evaluation(writer, program.evaluation_rules)
+    _write_initial_states(writer, program.initial_states_boolean_condition)
+    _write_groups(writer, program.groups)
+    _write_formulae(writer, "Fairness", program.fair_formulae)
+    _write_formulae(writer, "Formulae", program.formulae)
+
+
+def interpreted_system_to_string(program: InterpretedSystem, memo: SerializationMemo | None = None) -> str:
+    """
+    Get the ISPL code of an interpreted system.
+
+    :param program: the interpreted system
+    :param memo: if not None, the cache of the serialized conditions and formulae; it makes the serialization of the
+        subterms shared by several rules faster, e.g. for a system compiled with intern_nodes=True. Its statistics
+        (e.g. the hit rate) can be read after the call
+    :return: the ISPL code
+    """
+    stream = io.StringIO()
+    interpreted_system_to_stream(program, stream, memo)
+    return stream.getvalue()
@@ -0,0 +1,49 @@
+"""Memoization of the recursive validators of MCMAS objects."""
+
+import functools
+from collections.abc import Callable
+from typing import Any
+
+# name of the instance attribute that stores the results of the validators on an object
+_RESULTS_ATTRIBUTE = "_validation_results"
+
+
+def memoized_validator(validator: Callable[[Any], bool]) -> Callable[[Any], bool]:
+    """
+    Cache the results of a single-dispatch validator on the validated objects.
+
+    The objects are immutable, so the result of a validator on an object never changes: it is computed once and stored
+    in the object itself, and the shared subterms of the validated trees are checked once per validator. The returned
+    function exposes the 'register' and 'dispatch' methods of the single-dispatch function.
+
+    :param validator: the single-dispatch validator
+    :return: the memoized validator
+    """
+    validator_name = validator.__name__
+    dispatch = validator.dispatch  # type: ignore[attr-defined]
+
+    @functools.wraps(validator)
+    def wrapper(obj: Any) -> bool:
+        obj_dict = getattr(obj, "__dict__", None)
+        if obj_dict is None:
+            return dispatch(obj.__class__)(obj)
+
+        results = obj_dict.get(_RESULTS_ATTRIBUTE)
+        if results is None:
+            results = {}
+            # bypass the __setattr__ of frozen dataclasses; the attribute is not a field, so it is not compared
+            obj_dict[_RESULTS_ATTRIBUTE] = results
+        else:
+            result = results.get(validator_name)
+            if result is not None:
+                return result
+
+        # call the implementation directly, to not add a stack frame per level of the validated tree
+        result = dispatch(obj.__class__)(obj)
+        results[validator_name] = result
+        return result
+
+    wrapper.register = validator.register  # type: ignore[attr-defined]
+    wrapper.dispatch = validator.dispatch  # type: ignore[attr-defined]
+    wrapper.registry = validator.registry  # type: ignore[attr-defined]
+    return wrapper
@@ -23,6 +23,7 @@ from bitml2mcmas.mcmas.boolcond import (
     _BinaryBoolCondition,
 )
 from bitml2mcmas.mcmas.exceptions import McmasValidationError
+from bitml2mcmas.mcmas.validation._memoization import memoized_validator
 
 
 class _IsEnvEvolutionCondition(_Processor):
@@ -35,6 +36,7 @@ class _IsEnvEvolutionCondition(_Processor):
         return value
 
 
+@memoized_validator
 @singledispatch
 def is_env_evolution_condition(obj: object) -> bool:
     raise CaseNotHandledError(is_env_evolution_condition.__name__, obj)  # type: ignore[attr-defined]
@@ -42,12 +44,12 @@ def is_env_evolution_condition(obj: object) -> bool:
 
 @is_env_evolution_condition.register
 def _is_env_evolution_condition_and(f: AndBooleanCondition) -> bool:
-    return is_env_evolution_condition(f.left) and is_env_evolution_condition(f.right)
+    return all(is_env_evolution_condition(operand) for operand in f.operands)
 
 
 @is_env_evolution_condition.register
 def _is_env_evolution_condition_or(f: OrBooleanCondition) -> bool:
-    return is_env_evolution_condition(f.left) and is_env_evolution_condition(f.right)
+    return all(is_env_evolution_condition(operand) for operand in f.operands)
 
 
 @is_env_evolution_condition.register
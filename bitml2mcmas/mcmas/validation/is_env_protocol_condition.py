@@ -23,6 +23,7 @@ from bitml2mcmas.mcmas.boolcond import (
     _BinaryBoolCondition,
 )
 from bitml2mcmas.mcmas.exceptions import McmasValidationError
+from bitml2mcmas.mcmas.validation._memoization import memoized_validator
 
 
 class _IsEnvProtocolCondition(_Processor):
@@ -34,6 +35,7 @@ class _IsEnvProtocolCondition(_Processor):
         return value
 
 
+@memoized_validator
 @singledispatch
 def is_env_protocol_condition(obj: object) -> bool:
     raise CaseNotHandledError(is_env_protocol_condition.__name__, obj)  # type: ignore[attr-defined]
@@ -41,12 +43,12 @@ def is_env_protocol_condition(obj: object) -> bool:
 
 @is_env_protocol_condition.register
 def _is_env_protocol_condition_and(f: AndBooleanCondition) -> bool:
-    return is_env_protocol_condition(f.left) and is_env_protocol_condition(f.right)
+    return all(is_env_protocol_condition(operand) for operand in f.operands)
 
 
 @is_env_protocol_condition.register
 def _is_env_protocol_condition_or(f: OrBooleanCondition) -> bool:
-    return is_env_protocol_condition(f.left) and is_env_protocol_condition(f.right)
+    return all(is_env_protocol_condition(operand) for operand in f.operands)
 
 
 @is_env_protocol_condition.register
@@ -13,6 +13,7 @@ from bitml2mcmas.mcmas.formula import (
     _BaseDiamondFormula,
     _BaseUnaryFormula,
 )
+from bitml2mcmas.mcmas.validation._memoization import memoized_validator
 
 
 class _IsFairFormula(_Processor):
@@ -22,6 +23,7 @@ class _IsFairFormula(_Processor):
         return value
 
 
+@memoized_validator
 @singledispatch
 def is_fair_formula(obj: object) -> bool:
     raise CaseNotHandledError(is_fair_formula.__name__, obj)  # type: ignore[attr-defined]
@@ -24,6 +24,7 @@ from bitml2mcmas.mcmas.boolcond import (
     _BinaryBoolCondition,
 )
 from bitml2mcmas.mcmas.exceptions import McmasValidationError
+from bitml2mcmas.mcmas.validation._memoization import memoized_validator
 
 
 class _IsInitialStateCondition(_Processor):
@@ -35,6 +36,7 @@ class _IsInitialStateCondition(_Processor):
         return value
 
 
+@memoized_validator
 @singledispatch
 def is_initial_state_condition(obj: object) -> bool:
     raise CaseNotHandledError(is_initial_state_condition.__name__, obj)  # type: ignore[attr-defined]
@@ -42,12 +44,12 @@ def is_initial_state_condition(obj: object) -> bool:
 
 @is_initial_state_condition.register
 def _is_initial_state_condition_and(f: AndBooleanCondition) -> bool:
-    return is_initial_state_condition(f.left) and is_initial_state_condition(f.right)
+    return all(is_initial_state_condition(operand) for operand in f.operands)
 
 
 @is_initial_state_condition.register
 def _is_initial_state_condition_or(f: OrBooleanCondition) -> bool:
-    return is_initial_state_condition(f.left) and is_initial_state_condition(f.right)
+    return all(is_initial_state_condition(operand) for operand in f.operands)
 
 
 @is_initial_state_condition.register
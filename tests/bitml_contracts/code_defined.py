@@ -1429,6 +1429,38 @@ def bitml_contracts_tests_auth_withdraw() -> BitMLContract:
     )
 
 
+@pytest.fixture(scope="session")
+def bitml_contracts_tests_choice_after_withdraw() -> BitMLContract:
+    return BitMLContract(
+        participants=(
+            BitMLParticipant(identifier="A", pubkey="0"),
+            BitMLParticipant(identifier="B", pubkey="1"),
+        ),
+        preconditions=[
+            BitMLDepositPrecondition(
+                participant_id="A",
+                amount=Decimal("1"),
+                tx=BitMLTransactionOutput(tx_identifier="txA", tx_output_index=0),
+            ),
+            BitMLDepositPrecondition(
+                participant_id="B",
+                amount=Decimal("1"),
+                tx=BitMLTransactionOutput(tx_identifier="txB", tx_output_index=0),
+            ),
+        ],
+        contract=BitMLChoiceExpression(
+            choices=(
+                BitMLAfterExpression(
+                    timeout=5, branch=BitMLWithdrawExpression(participant_id="A")
+                ),
+                BitMLAfterExpression(
+                    timeout=10, branch=BitMLWithdrawExpression(participant_id="B")
+                ),
+            )
+        ),
+    )
+
+
 @pytest.fixture(scope="session")
 def bitml_contracts_tests_choice_withdraw() -> BitMLContract:
     return BitMLContract(
@@ -1,5 +1,8 @@
 """Pytest tests configurations."""
 
+from collections.abc import Iterator
+from pathlib import Path
+
 from bitml2mcmas.bitml.parser.parser import BitMLParser
 from tests.bitml_contracts.code_defined import *
 from tests.helpers import get_contract_name_file_pairs
@@ -35,6 +38,15 @@ def pytest_generate_tests(metafunc):
         metafunc.parametrize("index,arg", indexed_args)
 
 
+@pytest.fixture(scope="session", autouse=True)
+def user_cache_dir(tmp_path_factory: pytest.TempPathFactory) -> Iterator[Path]:
+    """Store the cache files of the parsers in a temporary directory, instead of the user cache directory."""
+    cache_dir = tmp_path_factory.mktemp("cache")
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv("BITML2MCMAS_CACHE_DIR", str(cache_dir))
+        yield cache_dir
+
+
 @pytest.fixture(scope="session")
 def bitml_parser() -> BitMLParser:
     return BitMLParser()
@@ -40,6 +40,7 @@ class BaseVerificationTest:
     override_mcmas_options_kwargs: dict = dict(
         atlk=2,
     )
+    compiler_kwargs: dict = dict()
     BASE_VERIFICATION_OUTPUT_DIR: Path = (
         TEST_DIRECTORY / "test_compiler" / "verification_outputs"
     )
@@ -60,7 +61,7 @@ class BaseVerificationTest:
 
         contract = BitMLParser()(cls.PATH_TO_CONTRACT_FILE.read_text())
         compiler = Compiler(
-            contract, cls._get_formulae(), evaluation_rules=cls.EVALUATION_RULES
+            contract, cls._get_formulae(), evaluation_rules=cls.EVALUATION_RULES, **cls.compiler_kwargs
         )
         system = compiler.compile()
         system_str = interpreted_system_to_string(system)
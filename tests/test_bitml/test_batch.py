@@ -0,0 +1,35 @@
+"""Test the batch parsing of BitML contracts."""
+
+from pathlib import Path
+
+import pytest
+
+from bitml2mcmas.bitml.parser.batch import parse_many
+from bitml2mcmas.bitml.parser.parser import BitMLParser
+from tests.conftest import contract_files
+from tests.helpers import INVALID_BITML_CONTRACTS_DIR
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_parse_many(jobs: int, tmp_path: Path, bitml_parser: BitMLParser) -> None:
+    invalid_file = tmp_path / "invalid.rkt"
+    invalid_file.write_text("#lang bitml\n(contract")
+    paths = [*contract_files, invalid_file, tmp_path / "missing.rkt"]
+
+    results = {result.path: result for result in parse_many(paths, jobs=jobs)}
+
+    assert results.keys() == set(paths)
+    for contract_file in contract_files:
+        result = results[contract_file]
+        assert result.ok
+        assert result.contract.contract_root == bitml_parser(contract_file.read_text()).contract_root
+    assert results[invalid_file].error.startswith("UnexpectedToken")
+    assert results[tmp_path / "missing.rkt"].error.startswith("FileNotFoundError")
+
+
+def test_parse_many_reports_validation_errors() -> None:
+    invalid_file = INVALID_BITML_CONTRACTS_DIR / "test-volatile-spent-multiple-times.rkt"
+    (result,) = parse_many([invalid_file], jobs=1)
+    assert not result.ok
+    assert result.contract is None
+    assert result.error.startswith("BitMLSplitExpressionInputOutpuInconsistencyError")
@@ -0,0 +1,88 @@
+"""Test the incremental BitML parser."""
+
+import re
+from pathlib import Path
+
+import pytest
+from lark.exceptions import UnexpectedInput
+
+from bitml2mcmas.bitml.ast import BitMLWithdrawExpression
+from bitml2mcmas.bitml.exceptions import BitMLSplitExpressionInputOutpuInconsistencyError
+from bitml2mcmas.bitml.parser.incremental import IncrementalBitMLParser
+from bitml2mcmas.bitml.parser.parser import BitMLParser
+from tests.conftest import contract_files
+
+CONTRACT = """#lang bitml
+
+(participant "A" "0a")
+(participant "B" "0b")
+
+(contract
+  (pre
+    (deposit "A" 2 "txA@0")
+  )
+  (split
+    (1 -> (choice (auth "A" "B" (withdraw "A")) (after 10 (withdraw "B"))))
+    (1 -> (withdraw "B"))
+  )
+)
+"""
+
+
+def _replace(parser: IncrementalBitMLParser, old: str, new: str, occurrence: int = 0) -> None:
+    start = [match.start() for match in re.finditer(re.escape(old), parser.text)][occurrence]
+    parser.edit(start, start + len(old), new)
+
+
+@pytest.mark.parametrize("contract_file", contract_files)
+def test_withdraw_edits(contract_file: Path, bitml_parser: BitMLParser) -> None:
+    parser = IncrementalBitMLParser(contract_file.read_text())
+    withdraws = list(re.finditer(r'\(withdraw "(\w+)"\)', parser.text))
+    # edit the withdraws from the last one, so that the positions of the others do not change
+    for match in reversed(withdraws):
+        parser.edit(match.start(1), match.end(1), match.group(1))
+        assert parser.last_edit_incremental
+        assert parser.contract.contract_root == bitml_parser(parser.text).contract_root
+
+
+def test_edit_reuses_unchanged_nodes(bitml_parser: BitMLParser) -> None:
+    parser = IncrementalBitMLParser(CONTRACT)
+    old_root = parser.contract.contract_root
+
+    _replace(parser, '(withdraw "A")', '(withdraw "B")')
+    new_root = parser.contract.contract_root
+
+    assert parser.last_edit_incremental
+    assert new_root == bitml_parser(parser.text).contract_root
+    assert new_root.branches[1] is old_root.branches[1]
+    old_choice, new_choice = old_root.branches[0].branch, new_root.branches[0].branch
+    assert new_choice.choices[1] is old_choice.choices[1]
+    assert new_choice.choices[0].branch.branch == BitMLWithdrawExpression("B")
+
+    # the spans after the edit are updated
+    _replace(parser, "after 10", "after 1000")
+    _replace(parser, '(withdraw "B")', '(choice (withdraw "A") (withdraw "B"))', occurrence=2)
+    assert parser.last_edit_incremental
+    assert parser.contract.contract_root == bitml_parser(parser.text).contract_root
+
+
+def test_invalid_edit_keeps_state() -> None:
+    parser = IncrementalBitMLParser(CONTRACT)
+    old_text, old_contract = parser.text, parser.contract
+
+    with pytest.raises(UnexpectedInput):
+        _replace(parser, '(withdraw "B"))', '(withdraw "B")')
+    # a choice cannot be the branch of an 'after' expression
+    with pytest.raises(UnexpectedInput):
+        _replace(parser, '(after 10 (withdraw "B"))', '(after 10 (choice (withdraw "A") (withdraw "B")))')
+    with pytest.raises(BitMLSplitExpressionInputOutpuInconsistencyError):
+        _replace(parser, "(1 ->", "(2 ->")
+    assert parser.text == old_text
+    assert parser.contract is old_contract
+
+
+def test_edit_outside_contract_body(bitml_parser: BitMLParser) -> None:
+    parser = IncrementalBitMLParser(CONTRACT)
+    _replace(parser, '(deposit "A" 2 "txA@0")', '(deposit "B" 2 "txB@0")')
+    assert not parser.last_edit_incremental
+    assert parser.contract.preconditions == bitml_parser(parser.text).preconditions
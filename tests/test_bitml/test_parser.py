@@ -1,12 +1,16 @@
 """Test BitML parser."""
 
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import pytest
 from _pytest.fixtures import SubRequest
+from lark.exceptions import UnexpectedInput
 
-from bitml2mcmas.bitml.parser.parser import BitMLParser
-from tests.conftest import file_contract_pairs
+from bitml2mcmas.bitml.parser._cached_lark import get_grammar_cache_file
+from bitml2mcmas.bitml.parser.parser import BitMLParser, get_shared_parser, parse_contract
+from tests.conftest import contract_files, file_contract_pairs
 
 
 @pytest.mark.parametrize("contract_fixture_str, contract_file", file_contract_pairs)
@@ -21,3 +25,49 @@ def test_parser_parametrized(
     assert expected_contract_obj.participants == actual_contract_obj.participants
     assert expected_contract_obj.preconditions == actual_contract_obj.preconditions
     assert expected_contract_obj.contract_root == actual_contract_obj.contract_root
+
+
+@pytest.mark.parametrize("contract_file", contract_files)
+def test_inline_transform_parser(contract_file: Path, bitml_parser: BitMLParser) -> None:
+    expected_contract_obj = bitml_parser(contract_file.read_text())
+    actual_contract_obj = BitMLParser(inline_transform=True)(contract_file.read_text())
+    assert expected_contract_obj.participants == actual_contract_obj.participants
+    assert expected_contract_obj.preconditions == actual_contract_obj.preconditions
+    assert expected_contract_obj.contract_root == actual_contract_obj.contract_root
+
+
+def test_parser_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("BITML2MCMAS_CACHE_DIR", str(tmp_path))
+    contract_file = contract_files[0]
+
+    expected_contract = BitMLParser(use_cache=False)(contract_file.read_text())
+    # the first parser writes the cache file, the second one loads it
+    for _ in range(2):
+        actual_contract = BitMLParser()(contract_file.read_text())
+        assert len(list(tmp_path.iterdir())) == 1
+        assert expected_contract.contract_root == actual_contract.contract_root
+
+
+def test_grammar_cache_file_depends_on_grammar(tmp_path: Path) -> None:
+    grammar_1 = 'start: "a"'
+    grammar_2 = 'start: "b"'
+    assert get_grammar_cache_file(grammar_1, tmp_path) == get_grammar_cache_file(grammar_1, tmp_path)
+    assert get_grammar_cache_file(grammar_1, tmp_path) != get_grammar_cache_file(grammar_2, tmp_path)
+    assert get_grammar_cache_file(grammar_1, tmp_path, parser="lalr") != get_grammar_cache_file(grammar_1, tmp_path)
+
+
+def test_parse_contract_from_many_threads() -> None:
+    assert get_shared_parser() is get_shared_parser()
+
+    texts = [contract_file.read_text() for contract_file in contract_files] * 4
+    expected_roots = [BitMLParser()(text).contract_root for text in texts]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        actual_roots = [contract.contract_root for contract in executor.map(parse_contract, texts)]
+    assert expected_roots == actual_roots
+
+
+def test_parsing_error_does_not_change_tracebacklimit() -> None:
+    old_tracebacklimit = getattr(sys, "tracebacklimit", None)
+    with pytest.raises(UnexpectedInput):
+        parse_contract("#lang bitml\n(contract")
+    assert getattr(sys, "tracebacklimit", None) == old_tracebacklimit
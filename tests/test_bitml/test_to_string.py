@@ -1,11 +1,14 @@
 """Tests for the bitml.to_string module."""
 
+import dataclasses
+import sys
 from pathlib import Path
 
 import pytest
 
+from bitml2mcmas.bitml.ast import BitMLAfterExpression, BitMLWithdrawExpression
 from bitml2mcmas.bitml.parser.parser import BitMLParser
-from bitml2mcmas.bitml.to_string import to_string
+from bitml2mcmas.bitml.to_string import after_to_string, deposit_precondition, to_string
 from tests.conftest import (
     contract_files,
 )
@@ -25,3 +28,50 @@ def test_parser_parametrized(contract_file: Path, bitml_parser: BitMLParser) ->
     assert (
         expected_contract_str == actual_contract_str
     ), f"expected:\n{expected_contract_str}\n\nactual:\n{actual_contract_str}"
+
+
+def test_deep_contract(bitml_parser: BitMLParser) -> None:
+    depth = 10 * sys.getrecursionlimit()
+    body = '(reveal (a) (after 1 (auth "A" ' * depth + '(withdraw "A")' + ")))" * depth
+    contract_str = (
+        "#lang bitml\n"
+        "\n"
+        '(participant "A" "0")\n'
+        "\n"
+        "(contract\n"
+        "  (pre\n"
+        '    (deposit "A" 1 "txA@0")\n'
+        '    (secret "A" a "00a")\n'
+        "  )\n"
+        f"  {body}\n"
+        ")\n"
+    )
+    contract_obj = bitml_parser(contract_str)
+
+    assert to_string(contract_obj) == contract_str
+
+
+@dataclasses.dataclass(frozen=True)
+class _CommentedWithdrawExpression(BitMLWithdrawExpression):
+    pass
+
+
+@to_string.register
+def _commented_withdraw_to_string(expr: _CommentedWithdrawExpression) -> str:
+    return f'(withdraw "{expr.participant_id}") ; commented'
+
+
+def test_registered_implementation() -> None:
+    expr = BitMLAfterExpression(1, _CommentedWithdrawExpression("A"))
+
+    # the implementations registered by other modules are used in the sub-expressions too
+    assert to_string(expr) == after_to_string(expr) == '(after 1 (withdraw "A") ; commented)'
+
+
+def test_public_implementations(bitml_parser: BitMLParser) -> None:
+    contract_file = next(path for path in contract_files if path.name == "choice-after-withdraw.rkt")
+    contract = bitml_parser(contract_file.read_text())
+    deposit = contract.preconditions[0]
+
+    assert deposit_precondition(deposit) == to_string(deposit)
+    assert deposit_precondition(deposit).startswith("(deposit ")
@@ -1,11 +1,13 @@
 """Tests for the bitml.validation module."""
 
+import sys
 from collections.abc import Sequence
 from decimal import Decimal
 
 import pytest
 
 from bitml2mcmas.bitml.ast import (
+    BitMLAfterExpression,
     BitMLDepositPrecondition,
     BitMLExpression,
     BitMLParticipant,
@@ -61,6 +63,15 @@ SECRET_HASH_3 = "00003"
 WITHDRAW_A = BitMLWithdrawExpression(PARTICIPANT_A_ID)
 WITHDRAW_B = BitMLWithdrawExpression(PARTICIPANT_B_ID)
 
+# deeper than the recursion limit
+DEEP_CONTRACT_DEPTH = 10 * sys.getrecursionlimit()
+
+
+def nested_in_afters(expr: BitMLExpression, depth: int = DEEP_CONTRACT_DEPTH) -> BitMLExpression:
+    for _ in range(depth):
+        expr = BitMLAfterExpression(1, expr)
+    return expr
+
 
 class BaseTestValidationError:
     participants: Sequence[BitMLParticipant]
@@ -178,6 +189,38 @@ class TestBitMLVolatileDepositsAlreadySpentError(BaseTestValidationError):
     expected_exception = BitMLVolatileDepositsAlreadySpentError
 
 
+class TestDeepBitMLParticipantNotDefinedError(BaseTestValidationError):
+    participants = [PARTICIPANT_A]
+    preconditions = [BitMLDepositPrecondition(PARTICIPANT_A_ID, Decimal(1), TX_A)]
+    contract = nested_in_afters(WITHDRAW_B)
+
+    expected_exception = BitMLParticipantNotDefinedError
+
+
+class TestDeepBitMLVolatileDepositsAlreadySpentError(BaseTestValidationError):
+    participants = [PARTICIPANT_A]
+    preconditions = [
+        BitMLVolatileDepositPrecondition(
+            PARTICIPANT_A_ID, VOLATILE_DEPOSIT_A_ID, Decimal(1), TX_A
+        )
+    ]
+    contract = BitMLPutExpression(
+        [VOLATILE_DEPOSIT_A_ID],
+        nested_in_afters(BitMLPutExpression([VOLATILE_DEPOSIT_A_ID], WITHDRAW_A)),
+    )
+
+    expected_exception = BitMLVolatileDepositsAlreadySpentError
+
+
+def test_deep_contract() -> None:
+    preconditions = [BitMLDepositPrecondition(PARTICIPANT_A_ID, Decimal(1), TX_A)]
+    root = nested_in_afters(WITHDRAW_A)
+
+    contract = BitMLContract([PARTICIPANT_A], preconditions, root)
+
+    assert contract.contract_root is root
+
+
 def test_initialization_of_participant_with_reserved_keyword() -> None:
     with pytest.raises(DataClassFieldValidationError):
         BitMLParticipant("withdraw", "00")
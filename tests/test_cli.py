@@ -0,0 +1,20 @@
+"""Test the command-line interface."""
+
+import pytest
+
+from bitml2mcmas.cli import main
+from tests.helpers import INVALID_BITML_CONTRACTS_DIR, TESTS_BITML_CONTRACTS_DIR
+
+
+def test_parse_command(capsys: pytest.CaptureFixture[str]) -> None:
+    assert main(["parse", "--jobs", "1", str(TESTS_BITML_CONTRACTS_DIR)]) == 0
+    captured = capsys.readouterr()
+    assert captured.out.count("OK ") == len(list(TESTS_BITML_CONTRACTS_DIR.rglob("*.rkt")))
+    assert "0 failed" in captured.err
+
+
+def test_parse_command_with_errors(capsys: pytest.CaptureFixture[str]) -> None:
+    assert main(["parse", "--jobs", "2", "--quiet", str(INVALID_BITML_CONTRACTS_DIR)]) == 1
+    captured = capsys.readouterr()
+    assert captured.out.startswith("ERROR ")
+    assert "0 parsed, 1 failed" in captured.err
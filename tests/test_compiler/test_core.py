@@ -0,0 +1,369 @@
+"""Tests for the compiler.core module."""
+
+import dataclasses
+import json
+import sys
+
+import pytest
+
+from bitml2mcmas.bitml.ast import BitMLAfterExpression, BitMLWithdrawExpression
+from bitml2mcmas.bitml.core import BitMLContract
+from bitml2mcmas.bitml.exceptions import BitMLExpressionNotSupportedByCompilerError
+from bitml2mcmas.bitml.parser.parser import BitMLParser
+from bitml2mcmas.compiler._private.contract_graph import BitMLGraph
+from bitml2mcmas.compiler._private.contract_wrapper import ContractWrapper
+from bitml2mcmas.compiler._private.mcmas_objects import McmasObjects
+from bitml2mcmas.compiler._private.terms import BitMLExprStatus
+from bitml2mcmas.compiler._private.transformers.contract_execution import BitMLNodeWrappers
+from bitml2mcmas.compiler.check_supported import check_supported
+from bitml2mcmas.compiler.core import ChoiceEncoding, Compiler, TimeEncoding
+from bitml2mcmas.compiler.profiling import CompilationProfiler
+from bitml2mcmas.helpers.traversal import iter_nodes
+from bitml2mcmas.mcmas.ast import Group, IntegerRangeVarType, InterpretedSystem
+from bitml2mcmas.mcmas.boolcond import (
+    AgentActionEqualToConstraint,
+    EnvironmentIdAtom,
+    GreaterThanOrEqual,
+    IdAtom,
+    IntAtom,
+)
+from bitml2mcmas.mcmas.formula import AtomicFormula, DiamondEventuallyFormula
+from bitml2mcmas.mcmas.to_string import interpreted_system_to_string
+from tests.conftest import contract_files
+
+_FORMULAE = [DiamondEventuallyFormula("Participants", AtomicFormula("contract_is_initialized"))]
+
+# a contract, with the system compiled from it
+_CompiledContract = tuple[BitMLContract, InterpretedSystem]
+
+
+@pytest.fixture(scope="module", params=contract_files)
+def compiled_contract(request: pytest.FixtureRequest, bitml_parser: BitMLParser) -> _CompiledContract:
+    """A contract supported by the compiler, with its compiled system; the unsupported contracts are skipped."""
+    contract = bitml_parser(request.param.read_text())
+    try:
+        system = Compiler(contract, _FORMULAE).compile()
+    except BitMLExpressionNotSupportedByCompilerError:
+        pytest.skip("contract not supported by the compiler")
+    return contract, system
+
+
+def test_trusted_construction_same_output(compiled_contract: _CompiledContract) -> None:
+    contract, expected = compiled_contract
+
+    actual = Compiler(contract, _FORMULAE, trusted_construction=True, validate_output=True).compile()
+
+    assert actual == expected
+    assert interpreted_system_to_string(actual) == interpreted_system_to_string(expected)
+
+
+def test_intern_nodes_same_output(compiled_contract: _CompiledContract) -> None:
+    contract, expected = compiled_contract
+
+    actual = Compiler(contract, _FORMULAE, intern_nodes=True).compile()
+
+    assert actual == expected
+    assert interpreted_system_to_string(actual) == interpreted_system_to_string(expected)
+
+
+def test_optimize_valid_and_not_larger(compiled_contract: _CompiledContract) -> None:
+    contract, system = compiled_contract
+
+    optimized = Compiler(contract, _FORMULAE, optimize=True, validate_output=True).compile()
+
+    assert len(interpreted_system_to_string(optimized)) <= len(interpreted_system_to_string(system))
+    assert Compiler(contract, _FORMULAE, optimize=True).compile() == optimized
+
+
+def test_cone_of_influence_valid_and_not_larger(compiled_contract: _CompiledContract) -> None:
+    contract, system = compiled_contract
+
+    reduced = Compiler(contract, _FORMULAE, cone_of_influence=True, validate_output=True).compile()
+
+    assert len(interpreted_system_to_string(reduced)) <= len(interpreted_system_to_string(system))
+    assert reduced.formulae == system.formulae
+    assert reduced.fair_formulae == system.fair_formulae
+
+    # the uniform reduction keeps the local states of the agents
+    uniform = Compiler(contract, _FORMULAE, cone_of_influence=True, uniform_cone_of_influence=True).compile()
+    assert uniform.agents == system.agents
+
+
+def _get_integer_ranges(system) -> dict[str, IntegerRangeVarType]:
+    return {
+        var_definition.varname: var_definition.vartype
+        for var_definition in system.environment.obs_var_definitions
+        if isinstance(var_definition.vartype, IntegerRangeVarType)
+    }
+
+
+def test_tight_ranges_valid_and_not_wider(compiled_contract: _CompiledContract) -> None:
+    contract, system = compiled_contract
+
+    tightened = Compiler(contract, _FORMULAE, tight_ranges=True, validate_output=True).compile()
+
+    ranges = _get_integer_ranges(system)
+    tight_ranges = _get_integer_ranges(tightened)
+    assert ranges.keys() == tight_ranges.keys()
+    for varname, var_type in tight_ranges.items():
+        assert ranges[varname].lower <= var_type.lower < var_type.upper <= ranges[varname].upper
+    assert tightened.environment.env_evolution_definition == system.environment.env_evolution_definition
+    assert tightened.initial_states_boolean_condition == system.initial_states_boolean_condition
+
+
+def test_tight_ranges_put_withdraw(bitml_parser: BitMLParser) -> None:
+    contract_file = next(path for path in contract_files if path.name == "put-withdraw.rkt")
+    contract = bitml_parser(contract_file.read_text())
+
+    tightened = Compiler(contract, _FORMULAE, tight_ranges=True).compile()
+
+    # the funds of the contract go from 2 to 4 (put), then to 0 (withdraw); A puts 1 and gets 4, B puts 1
+    assert _get_integer_ranges(tightened) == {
+        "contract_funds": IntegerRangeVarType(0, 4),
+        "part_A_total_deposits": IntegerRangeVarType(0, 4),
+        "part_B_total_deposits": IntegerRangeVarType(0, 1),
+    }
+
+
+def test_time_regions_valid(compiled_contract: _CompiledContract) -> None:
+    contract, system = compiled_contract
+
+    with_regions = Compiler(contract, _FORMULAE, time_encoding=TimeEncoding.REGIONS, validate_output=True).compile()
+
+    time_type = _get_integer_ranges(with_regions).get("time")
+    if time_type is None:
+        assert with_regions == system
+        return
+    assert time_type.lower == 0
+    assert time_type.upper <= _get_integer_ranges(system)["time"].upper
+
+
+def test_time_regions_choice_after_withdraw(bitml_parser: BitMLParser) -> None:
+    contract_file = next(path for path in contract_files if path.name == "choice-after-withdraw.rkt")
+    contract = bitml_parser(contract_file.read_text())
+
+    system = Compiler(contract, _FORMULAE, time_encoding=TimeEncoding.REGIONS).compile()
+
+    # the regions start at 0, 5 and 10
+    assert _get_integer_ranges(system)["time"] == IntegerRangeVarType(0, 2)
+    conditions = {rule.prop_id: rule.condition for rule in system.evaluation_rules}
+    assert conditions["timeout_5_has_expired"] == GreaterThanOrEqual(EnvironmentIdAtom("time"), IntAtom(1))
+    assert conditions["timeout_10_has_expired"] == GreaterThanOrEqual(EnvironmentIdAtom("time"), IntAtom(2))
+
+
+def _wide_choice_contract(nb_branches: int) -> str:
+    branches = " ".join(f'(withdraw "{"AB"[i % 2]}")' for i in range(nb_branches))
+    return (
+        '#lang bitml\n(participant "A" "00")\n(participant "B" "01")\n'
+        f'(contract (pre (deposit "A" 1 "txA@0")) (choice {branches}))\n'
+    )
+
+
+@pytest.mark.parametrize("choice_encoding", list(ChoiceEncoding))
+def test_choice_encoding_status_rules(bitml_parser: BitMLParser, choice_encoding: ChoiceEncoding) -> None:
+    nb_branches = 6
+    contract = bitml_parser(_wide_choice_contract(nb_branches))
+
+    system = Compiler(contract, _FORMULAE, choice_encoding=choice_encoding, validate_output=True).compile()
+
+    # the number of exec actions read by the rules of the status of a branch
+    nb_read_exec_actions = []
+    disabled_statuses = set()
+    for rule in system.environment.env_evolution_definition:
+        if rule.effects[0].varname.startswith("status_"):
+            if rule.effects[0].value == IdAtom(BitMLExprStatus.DISABLED.value):
+                disabled_statuses.add(rule.effects[0].varname)
+            actions = {
+                node.action_value for node in iter_nodes([rule.condition]) if isinstance(node, AgentActionEqualToConstraint)
+            }
+            nb_read_exec_actions.append(len({action for action in actions if action.startswith("exec_")}))
+    if choice_encoding == ChoiceEncoding.SIBLINGS:
+        # the branch is disabled when one of the other branches is executed
+        assert max(nb_read_exec_actions) == nb_branches - 1
+        assert len(disabled_statuses) == nb_branches
+    else:
+        assert max(nb_read_exec_actions) == 1
+        # the branches are disabled by the chosen branch variable, not by their status variables
+        assert len(disabled_statuses) == 0
+        chosen_type = next(
+            var_definition.vartype
+            for var_definition in system.environment.obs_var_definitions
+            if var_definition.varname.startswith("chosen_")
+        )
+        assert len(chosen_type.values) == nb_branches + 1
+
+
+def test_used_coalitions(bitml_parser: BitMLParser) -> None:
+    contract_file = next(path for path in contract_files if path.name == "zero-coupon-bond.rkt")
+    contract = bitml_parser(contract_file.read_text())
+    formulae = [
+        *_FORMULAE,
+        DiamondEventuallyFormula("Agent_G__Agent_A", AtomicFormula("contract_is_initialized")),
+        DiamondEventuallyFormula("Agent_A__Agent_G", AtomicFormula("contract_is_initialized")),
+        DiamondEventuallyFormula("custom", AtomicFormula("contract_is_initialized")),
+    ]
+
+    system = Compiler(contract, formulae, groups={Group("custom", {"Agent_B"})}).compile()
+
+    # the names of the coalitions are the sorted names of their agents
+    assert {group.group_name for group in system.groups} == {
+        "Participants",
+        "Env",
+        "ParticipantsAndEnv",
+        "Agent_A__Agent_G",
+        "custom",
+    }
+    assert Group("Agent_A__Agent_G", {"Agent_A", "Agent_G"}) in system.groups
+
+    all_coalitions = Compiler(contract, formulae, groups={Group("custom", {"Agent_B"})}, all_coalitions=True).compile()
+    assert len(all_coalitions.groups) == 2**3 - 2 + 4
+
+
+def test_mcmas_objects_memoized(bitml_parser: BitMLParser) -> None:
+    contract_file = next(path for path in contract_files if path.name == "choice-after-withdraw.rkt")
+    wrapper = ContractWrapper(bitml_parser(contract_file.read_text()))
+    objects = McmasObjects(wrapper)
+    participant_id = min(wrapper.participant_ids)
+
+    assert objects.all_agent_done_are_false is objects.all_agent_done_are_false
+    assert objects.get_agent_done_is_false(participant_id) is objects.get_agent_done_is_false(participant_id)
+    # the caches are not shared between instances
+    other_objects = McmasObjects(wrapper)
+    assert other_objects.all_agent_done_are_false == objects.all_agent_done_are_false
+    assert other_objects.all_agent_done_are_false is not objects.all_agent_done_are_false
+
+
+def test_contract_graph(bitml_parser: BitMLParser) -> None:
+    contract_text = (
+        '#lang bitml\n(participant "A" "0")\n(participant "B" "1")\n'
+        '(contract (pre (deposit "A" 1 "txA@0") (deposit "B" 1 "txB@0"))\n'
+        '  (split (1 -> (after 5 (auth "B" (auth "A" (withdraw "A"))))) (1 -> (after 5 (withdraw "B")))))\n'
+    )
+    graph = BitMLGraph(bitml_parser(contract_text))
+
+    # the children are created before their parents
+    assert [node.full_node_id for node in graph.nodes] == ["node_0_withdraw", "node_1_withdraw", "node_2_split"]
+    first_withdraw, second_withdraw, split = graph.nodes
+    assert graph.root_node is split
+    assert split.parent is None
+    assert split.children == (first_withdraw, second_withdraw)
+    assert split.children is split.children
+    assert first_withdraw.parent is split and first_withdraw.is_leaf_node
+    assert [graph.get_node_index(node) for node in graph.nodes] == [0, 1, 2]
+
+    assert first_withdraw.auths == {"A", "B"}
+    assert second_withdraw.auths == frozenset()
+    # the equal sets of timeouts and funds are shared by the nodes
+    assert first_withdraw.afters == {5}
+    assert first_withdraw.afters is second_withdraw.afters
+    assert first_withdraw.funds == 1 and split.funds == 2
+    assert graph.timeouts == {5}
+    with pytest.raises(ValueError, match="leaf node"):
+        first_withdraw.children
+
+    # a node whose children already have a parent is not added, and the other children are left unchanged
+    with pytest.raises(ValueError, match="parent node already set"):
+        graph._create_node(split.expression, (), (), split.funds, [2, 0])
+    assert split.parent is None
+    assert graph._create_node(first_withdraw.expression, (), (), first_withdraw.funds) == len(graph.nodes)
+
+
+def test_deep_contract(bitml_parser: BitMLParser) -> None:
+    # deeper than the recursion limit: a chain of reveal nodes, whose last node is guarded by a chain of timeouts
+    depth = 2 * sys.getrecursionlimit()
+    body = "(reveal (a) " * depth + "".join(f"(after {i} " for i in range(depth)) + '(withdraw "A")' + ")" * (2 * depth)
+    contract_text = (
+        '#lang bitml\n(participant "A" "0")\n'
+        '(contract (pre (deposit "A" 1 "txA@0") (secret "A" a "00a"))\n'
+        f"  {body})\n"
+    )
+    contract = bitml_parser(contract_text)
+    graph = BitMLGraph(contract)
+
+    assert len(graph.nodes) == depth + 1
+    assert graph.nodes[0].afters == set(range(depth))
+    assert graph.root_node is graph.nodes[-1] and graph.root_node.afters == frozenset()
+    assert graph.nodes[0].parent is graph.nodes[1]
+    system = Compiler(contract, _FORMULAE).compile()
+    assert len(interpreted_system_to_string(system)) > 0
+
+
+@dataclasses.dataclass(frozen=True)
+class _UnsupportedWithdrawExpression(BitMLWithdrawExpression):
+    pass
+
+
+@check_supported.register
+def _check_unsupported_withdraw_expression(expr: _UnsupportedWithdrawExpression) -> None:
+    raise BitMLExpressionNotSupportedByCompilerError(expr)
+
+
+def test_check_supported_registered_implementation() -> None:
+    check_supported(BitMLAfterExpression(1, BitMLWithdrawExpression("A")))
+    # the implementations registered by other modules are used in the sub-expressions too
+    with pytest.raises(BitMLExpressionNotSupportedByCompilerError):
+        check_supported(BitMLAfterExpression(1, _UnsupportedWithdrawExpression("A")))
+
+
+def test_node_wrappers_created_once(bitml_parser: BitMLParser) -> None:
+    contract_file = next(path for path in contract_files if path.name == "choice-after-withdraw.rkt")
+    wrapper = ContractWrapper(bitml_parser(contract_file.read_text()))
+    node_wrappers = BitMLNodeWrappers(wrapper, McmasObjects(wrapper))
+    choice_node = wrapper.graph.root_node
+    first_branch, second_branch = choice_node.children
+
+    assert node_wrappers.get(first_branch) is node_wrappers.get(first_branch)
+    # the siblings of a choice reuse the conditions of each other
+    wrapped_second_branch = node_wrappers.get(second_branch)
+    disabled_rule = node_wrappers.get(first_branch).evolution_rules_is_disabled[0]
+    assert disabled_rule.condition is wrapped_second_branch.is_executed_now_or_earlier
+
+
+def test_profile(bitml_parser: BitMLParser) -> None:
+    contract_file = next(path for path in contract_files if path.name == "choice-after-withdraw.rkt")
+    contract = bitml_parser(contract_file.read_text())
+    expected = Compiler(contract, _FORMULAE).compile()
+
+    compiler = Compiler(contract, _FORMULAE, optimize=True, profile=True)
+    assert compiler.profile_report is None
+    system = compiler.compile()
+    report = compiler.profile_report
+
+    assert [stage.name for stage in report.stages] == [
+        "AddSchedulingActions",
+        "AddTimeProgression",
+        "AddDeposits",
+        "AddSecrets",
+        "AddContractInitialization",
+        "AddContractExecution",
+        "AddLastAction",
+        "finalization",
+        "build",
+        "optimize",
+    ]
+    assert all(stage.wall_time >= 0 for stage in report.stages)
+    assert sum(stage.wall_time for stage in report.stages) <= report.total_time
+    assert report.get_stage("optimize").added is None
+    # the counts added by the stages sum up to the size of the compiled system
+    added = [stage.added for stage in report.stages if stage.added is not None]
+    nb_evolution_rules = len(expected.environment.env_evolution_definition) + sum(
+        len(agent.agent_evolution_definition) for agent in expected.agents
+    )
+    assert sum(counts["evolution_rules"] for counts in added) == nb_evolution_rules
+    assert sum(counts["groups"] for counts in added) == len(expected.groups)
+    assert report.get_stage("AddSecrets").added["vars"] == 0
+    # the profiling does not change the output
+    assert system == Compiler(contract, _FORMULAE, optimize=True).compile()
+
+    assert json.loads(report.to_json()) == report.to_dict()
+    trace = json.loads(report.to_chrome_trace())
+    assert [event["name"] for event in trace["traceEvents"]] == ["compile"] + [stage.name for stage in report.stages]
+    assert all(event["ph"] == "X" for event in trace["traceEvents"])
+
+
+def test_profile_failed_stage() -> None:
+    profiler = CompilationProfiler()
+    with pytest.raises(ValueError), profiler.stage("failing"):
+        raise ValueError("failure")
+    # the stage that raised is recorded too
+    assert [stage.name for stage in profiler.get_profile().stages] == ["failing"]
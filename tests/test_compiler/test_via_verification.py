@@ -2,7 +2,7 @@ import pytest
 
 from bitml2mcmas.bitml.custom_types import TermString
 from bitml2mcmas.compiler._private.terms import PARTICIPANTS_GROUP, PARTICIPANTS_AND_ENV_GROUP, CONTRACT_FUNDS, \
-    CONTRACT_IS_INITIALIZED, TermNaming, PublicSecretValues, PrivateSecretValues
+    CONTRACT_IS_INITIALIZED, TermNaming, PublicSecretValues, PrivateSecretValues, TimeEncoding, ChoiceEncoding
 from bitml2mcmas.mcmas.ast import EvaluationRule
 from bitml2mcmas.mcmas.boolcond import EqualTo, IntAtom, IdAtom, EnvironmentIdAtom, TrueBoolValue, GreaterThanOrEqual, \
     LessThan
@@ -207,6 +207,50 @@ class TestVerificationAfterWithdraw(BaseVerificationTest):
     )
 
 
+class TestVerificationChoiceAfterWithdraw(BaseVerificationTest):
+    PATH_TO_CONTRACT_FILE = TESTS_BITML_CONTRACTS_DIR / "choice-after-withdraw.rkt"
+    override_mcmas_options_kwargs: dict = dict(
+        atlk=1
+    )
+    TIMEOUT_A = 5
+    TIMEOUT_B = 10
+
+    @staticmethod
+    def timeout_has_expired_formula(timeout: int) -> FormulaType:
+        return AtomicFormula(TermNaming.timeout_has_expired(timeout))
+
+    FORMULAE_AND_EXPECTED_OUTCOME = (
+        (TIME_REACHES_MAXIMUM_FORMULA, True),
+        (EF_FUNDS_IS_ZERO, True),
+        (AF_FUNDS_IS_ZERO, False),
+        (EF_A_GETS_2_FORMULA, True),
+        (EF_B_GETS_2_FORMULA, True),
+        (AGENT_A_GROUP_A_GETS_2_FORMULA, True),
+        (AGENT_B_GROUP_A_GETS_2_FORMULA, True),
+        (AGENT_A_GROUP_B_GETS_2_FORMULA, False),
+        (AGENT_B_GROUP_B_GETS_2_FORMULA, False),
+        (PARTICIPANTS_GROUP_B_GETS_2_FORMULA, True),
+        (
+            EFFormula(
+                AndFormula(timeout_has_expired_formula(TIMEOUT_A), NotFormula(timeout_has_expired_formula(TIMEOUT_B)))
+            ),
+            True,
+        ),
+        (AGFormula(ImpliesFormula(timeout_has_expired_formula(TIMEOUT_B), timeout_has_expired_formula(TIMEOUT_A))), True),
+        (AGFormula(ImpliesFormula(A_GETS_2_FORMULA, timeout_has_expired_formula(TIMEOUT_A))), True),
+        (AGFormula(ImpliesFormula(B_GETS_2_FORMULA, timeout_has_expired_formula(TIMEOUT_B))), True),
+    )
+    EVALUATION_RULES = (
+        CONTRACT_FUNDS_ARE_ZERO_ER,
+        A_GETS_2_ER,
+        B_GETS_2_ER
+    )
+
+
+class TestVerificationChoiceAfterWithdrawTimeRegions(TestVerificationChoiceAfterWithdraw):
+    compiler_kwargs: dict = dict(time_encoding=TimeEncoding.REGIONS)
+
+
 class TestVerificationAfterAuthWithdraw(BaseVerificationTest):
     PATH_TO_CONTRACT_FILE = TESTS_BITML_CONTRACTS_DIR / "after-auth-withdraw.rkt"
     FORMULAE_AND_EXPECTED_OUTCOME = (
@@ -530,6 +574,17 @@ class TestVerificationChoiceWithdraw(BaseVerificationTest):
     )
 
 
+class TestVerificationChoiceWithdrawChosenBranch(TestVerificationChoiceWithdraw):
+    FORMULAE_AND_EXPECTED_OUTCOME = (
+        *TestVerificationChoiceWithdraw.FORMULAE_AND_EXPECTED_OUTCOME,
+        # once a branch is executed, the other one is disabled
+        (AGFormula(ImpliesFormula(AtomicFormula("node_0_withdraw_is_executed"), AtomicFormula("node_1_withdraw_is_disabled"))), True),
+        (AGFormula(ImpliesFormula(AtomicFormula("node_1_withdraw_is_executed"), AtomicFormula("node_0_withdraw_is_disabled"))), True),
+        (EFFormula(AtomicFormula("node_0_withdraw_is_enabled")), True),
+    )
+    compiler_kwargs: dict = dict(choice_encoding=ChoiceEncoding.CHOSEN_BRANCH)
+
+
 class TestVerificationRevealChoiceWithdraw(BaseVerificationTest):
     PATH_TO_CONTRACT_FILE = TESTS_BITML_CONTRACTS_DIR / "reveal-choice-withdraw.rkt"
     FORMULAE_AND_EXPECTED_OUTCOME = (
@@ -1089,3 +1144,31 @@ class TestVerificationZeroCouponBond(BaseVerificationTest):
         A_GETS_10_ER,
         B_GETS_AT_LEAST_9_ER
     )
+
+
+class TestVerificationRevealOneWithdrawOptimized(TestVerificationRevealOneWithdraw):
+    compiler_kwargs: dict = dict(optimize=True)
+
+
+class TestVerificationTimeCommitmentOptimized(TestVerificationTimeCommitment):
+    compiler_kwargs: dict = dict(optimize=True)
+
+
+class TestVerificationRevealOneWithdrawConeOfInfluence(TestVerificationRevealOneWithdraw):
+    compiler_kwargs: dict = dict(cone_of_influence=True)
+
+
+class TestVerificationTimeCommitmentConeOfInfluence(TestVerificationTimeCommitment):
+    compiler_kwargs: dict = dict(cone_of_influence=True, optimize=True)
+
+
+class TestVerificationEscrowTightRanges(TestVerificationEscrow):
+    compiler_kwargs: dict = dict(tight_ranges=True)
+
+
+class TestVerificationPutWithdrawTightRanges(TestVerificationPutWithdraw):
+    compiler_kwargs: dict = dict(tight_ranges=True)
+
+
+class TestVerificationEscrowChosenBranch(TestVerificationEscrow):
+    compiler_kwargs: dict = dict(choice_encoding=ChoiceEncoding.CHOSEN_BRANCH)
@@ -17,6 +17,13 @@
 
 """Tests for the mcmas.ast module."""
 
+import pytest
+
+from bitml2mcmas.helpers.validation import (
+    DataClassFieldValidationError,
+    trusted_construction,
+    validate_dataclass_tree,
+)
 from bitml2mcmas.mcmas.ast import (
     Agent,
     BooleanVarType,
@@ -264,3 +271,28 @@ def test_bit_transmission_problem() -> None:
     )
 
     print(interpreted_system_to_string(system))
+
+
+def test_trusted_construction_skips_checks() -> None:
+    with trusted_construction():
+        # the agent is not named "A": it is an ISPL keyword, so the rule would be invalid too, and the validation of the
+        # tree below would not reach the bad group
+        rule = EvolutionRule([Effect("x", TrueBoolValue())], EqualTo(AttributeIdAtom("Alice", "x"), TrueBoolValue()))
+        bad_group = Group("g", {"1invalid"})
+
+    # conversions are still applied
+    assert isinstance(rule.effects, tuple)
+    assert isinstance(bad_group.agents, frozenset)
+
+    with pytest.raises(DataClassFieldValidationError):
+        Group("g", {"1invalid"})
+    validate_dataclass_tree([rule])
+    with pytest.raises(DataClassFieldValidationError):
+        validate_dataclass_tree([rule, bad_group])
+
+
+def test_validate_dataclass_tree_valid() -> None:
+    with trusted_construction():
+        rule = EvolutionRule([Effect("x", TrueBoolValue())], EqualTo(IdAtom("x"), FalseBoolValue()))
+    validate_dataclass_tree(Protocol([ProtocolRule(EqualTo(IdAtom("x"), TrueBoolValue()), {"a"})], None))
+    validate_dataclass_tree(rule)
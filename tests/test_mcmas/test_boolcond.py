@@ -0,0 +1,78 @@
+"""Tests for the mcmas.boolcond module."""
+
+import pickle
+
+import pytest
+
+from bitml2mcmas.helpers.validation import DataClassFieldValidationError
+from bitml2mcmas.mcmas.boolcond import (
+    AndBooleanCondition,
+    EqualTo,
+    IdAtom,
+    IntAtom,
+    NotEqualTo,
+    OrBooleanCondition,
+    TrueBoolValue,
+    conjunction,
+    disjunction,
+)
+from bitml2mcmas.mcmas.exceptions import McmasException
+
+
+def _chain(length: int) -> AndBooleanCondition:
+    condition = EqualTo(IdAtom("x"), IntAtom(0))
+    for i in range(length):
+        # the negations prevent the flattening of the conjunctions
+        condition = ~condition & EqualTo(IdAtom("x"), IntAtom(i % 10))
+    return condition
+
+
+def test_hash_and_eq_of_deep_conditions() -> None:
+    first, second = _chain(20_000), _chain(20_000)
+    assert first is not second
+    assert hash(first) == hash(second)
+    assert first == second
+    assert first != _chain(19_999)
+    assert {first: 1}[second] == 1
+
+
+def test_hash_depends_on_class() -> None:
+    equal_to = EqualTo(IdAtom("x"), IntAtom(0))
+    not_equal_to = NotEqualTo(IdAtom("x"), IntAtom(0))
+    assert equal_to != not_equal_to
+    assert hash(equal_to) != hash(not_equal_to)
+    assert TrueBoolValue() == TrueBoolValue()
+
+
+def test_pickle_does_not_store_hash() -> None:
+    condition = _chain(10)
+    hash(condition)
+    state = condition.__getstate__()
+    assert "_hash" not in state
+
+    unpickled = pickle.loads(pickle.dumps(condition))
+    assert unpickled == condition
+    assert hash(unpickled) == hash(condition)
+
+
+def test_conjunctions_are_flattened() -> None:
+    atoms = [EqualTo(IdAtom("x"), IntAtom(i)) for i in range(4)]
+    condition = (atoms[0] & atoms[1]) & (atoms[2] & atoms[3])
+    assert isinstance(condition, AndBooleanCondition)
+    assert condition.operands == tuple(atoms)
+    assert condition == conjunction(atoms)
+
+    # operands of a different connective are not flattened
+    disjunction_ = disjunction([atoms[0] & atoms[1], atoms[2]])
+    assert isinstance(disjunction_, OrBooleanCondition)
+    assert len(disjunction_.operands) == 2
+
+
+def test_conjunction_and_disjunction_helpers() -> None:
+    atom = EqualTo(IdAtom("x"), IntAtom(0))
+    assert conjunction([atom]) is atom
+    assert disjunction(iter([atom])) is atom
+    with pytest.raises(McmasException):
+        conjunction([])
+    with pytest.raises(DataClassFieldValidationError):
+        AndBooleanCondition((atom,))
@@ -0,0 +1,188 @@
+"""Tests for the mcmas.cone_of_influence module."""
+
+import dataclasses
+
+from bitml2mcmas.helpers.validation import trusted_construction
+from bitml2mcmas.mcmas.ast import (
+    Agent,
+    BooleanVarType,
+    Effect,
+    EnumVarType,
+    Environment,
+    EvaluationRule,
+    EvolutionRule,
+    Group,
+    InterpretedSystem,
+    Protocol,
+    Semantics,
+    VarDefinition,
+)
+from bitml2mcmas.mcmas.boolcond import (
+    ActionEqualToConstraint,
+    AttributeIdAtom,
+    EnvironmentIdAtom,
+    EqualTo,
+    FalseBoolValue,
+    IdAtom,
+    TrueBoolValue,
+    conjunction,
+)
+from bitml2mcmas.mcmas.cone_of_influence import reduce_to_cone_of_influence
+from bitml2mcmas.mcmas.formula import AtomicFormula
+
+
+def _system(observed_proposition: str = "done") -> InterpretedSystem:
+    """
+    Build a system where 'done' depends on 'status', 'mirror' copies 'noise', and Agent_A observes 'noise'.
+
+    The formula uses only the proposition observed_proposition.
+    """
+    environment = Environment(
+        obs_var_definitions=[VarDefinition("status", EnumVarType({"disabled", "enabled"}))],
+        env_var_definitions=[
+            VarDefinition("done", BooleanVarType()),
+            VarDefinition("noise", BooleanVarType()),
+            VarDefinition("mirror", BooleanVarType()),
+        ],
+        env_red_definitions=None,
+        env_action_definitions={"delay", "nop"},
+        env_protocol_definition=Protocol(None, {"delay", "nop"}),
+        env_evolution_definition=[
+            EvolutionRule([Effect("done", TrueBoolValue())], EqualTo(IdAtom("status"), IdAtom("enabled"))),
+            EvolutionRule([Effect("noise", TrueBoolValue())], ActionEqualToConstraint("nop")),
+            EvolutionRule(
+                [Effect("mirror", IdAtom("noise")), Effect("status", IdAtom("enabled"))],
+                ActionEqualToConstraint("delay"),
+            ),
+        ],
+    )
+    agent = Agent(
+        "Agent_A",
+        ["noise"],
+        [VarDefinition("dummy", BooleanVarType()), VarDefinition("extra", BooleanVarType())],
+        None,
+        {"nop"},
+        Protocol(None, {"nop"}),
+        [EvolutionRule([Effect("extra", TrueBoolValue())], ActionEqualToConstraint("nop"))],
+    )
+    initial_condition = conjunction(
+        [
+            EqualTo(EnvironmentIdAtom("status"), IdAtom("disabled")),
+            EqualTo(EnvironmentIdAtom("done"), FalseBoolValue()),
+            EqualTo(EnvironmentIdAtom("noise"), FalseBoolValue()),
+            EqualTo(EnvironmentIdAtom("mirror"), FalseBoolValue()),
+            EqualTo(AttributeIdAtom("Agent_A", "dummy"), FalseBoolValue()),
+            EqualTo(AttributeIdAtom("Agent_A", "extra"), FalseBoolValue()),
+        ]
+    )
+    return InterpretedSystem(
+        Semantics.SINGLE_ASSIGNMENT,
+        environment,
+        [agent],
+        [
+            EvaluationRule("done", EqualTo(EnvironmentIdAtom("done"), TrueBoolValue())),
+            EvaluationRule("mirrored", EqualTo(EnvironmentIdAtom("mirror"), TrueBoolValue())),
+        ],
+        initial_condition,
+        [Group("g", {"Agent_A"})],
+        [],
+        [AtomicFormula(observed_proposition)],
+    )
+
+
+def _varnames(var_definitions) -> list[str]:
+    return [var_definition.varname for var_definition in var_definitions]
+
+
+def test_irrelevant_variables_are_removed() -> None:
+    system = _system()
+
+    reduced = reduce_to_cone_of_influence(system)
+
+    environment = reduced.environment
+    assert _varnames(environment.obs_var_definitions) == ["status"]
+    assert _varnames(environment.env_var_definitions) == ["done"]
+    # the rule that assigns only 'noise' is removed, the effect on 'mirror' is removed from the other one
+    assert list(environment.env_evolution_definition) == [
+        EvolutionRule([Effect("done", TrueBoolValue())], EqualTo(IdAtom("status"), IdAtom("enabled"))),
+        EvolutionRule([Effect("status", IdAtom("enabled"))], ActionEqualToConstraint("delay")),
+    ]
+    # the actions and the protocols are kept
+    assert environment.env_action_definitions == system.environment.env_action_definitions
+    assert environment.env_protocol_definition == system.environment.env_protocol_definition
+
+    agent = reduced.agents[0]
+    assert list(agent.lobs_var_definitions) == []
+    assert _varnames(agent.agent_var_definitions) == ["dummy"]
+    assert list(agent.agent_evolution_definition) == []
+
+    assert reduced.evaluation_rules == system.evaluation_rules[:1]
+    assert reduced.initial_states_boolean_condition == conjunction(
+        [
+            EqualTo(EnvironmentIdAtom("status"), IdAtom("disabled")),
+            EqualTo(EnvironmentIdAtom("done"), FalseBoolValue()),
+            EqualTo(AttributeIdAtom("Agent_A", "dummy"), FalseBoolValue()),
+        ]
+    )
+    assert reduced.formulae == system.formulae
+    # the input system is not modified
+    assert _varnames(system.environment.env_var_definitions) == ["done", "noise", "mirror"]
+
+
+def test_dependencies_through_evolution_rules() -> None:
+    reduced = reduce_to_cone_of_influence(_system(observed_proposition="mirrored"))
+
+    # 'mirror' is assigned the value of 'noise', and its rule reads the action only
+    assert _varnames(reduced.environment.env_var_definitions) == ["noise", "mirror"]
+    assert [rule.prop_id for rule in reduced.evaluation_rules] == ["mirrored"]
+    assert _varnames(reduced.agents[0].agent_var_definitions) == ["dummy"]
+
+
+def test_uniform() -> None:
+    system = _system()
+
+    reduced = reduce_to_cone_of_influence(system, uniform=True)
+
+    # 'noise' is observed by Agent_A, and the variables of the agents are kept
+    assert _varnames(reduced.environment.env_var_definitions) == ["done", "noise"]
+    assert list(reduced.agents[0].lobs_var_definitions) == ["noise"]
+    assert reduced.agents[0] == system.agents[0]
+
+
+def _with_noise_rule(condition) -> InterpretedSystem:
+    """Add to the system a rule that assigns 'noise' a value different from the one of the rule enabled by 'nop'."""
+    system = _system()
+    environment = system.environment
+    evolution_rules = [*environment.env_evolution_definition, EvolutionRule([Effect("noise", FalseBoolValue())], condition)]
+    return dataclasses.replace(
+        system, environment=dataclasses.replace(environment, env_evolution_definition=evolution_rules)
+    )
+
+
+def test_conflicting_assignments_are_kept() -> None:
+    # the rule may be enabled together with the one enabled by 'nop', and then the transition is blocked
+    reduced = reduce_to_cone_of_influence(_with_noise_rule(EqualTo(IdAtom("status"), IdAtom("enabled"))))
+
+    assert _varnames(reduced.environment.env_var_definitions) == ["done", "noise"]
+
+
+def test_exclusive_assignments_are_removed() -> None:
+    reduced = reduce_to_cone_of_influence(_with_noise_rule(ActionEqualToConstraint("delay")))
+
+    assert _varnames(reduced.environment.env_var_definitions) == ["done"]
+
+
+def test_no_evaluation_rules() -> None:
+    # only a trusted construction allows a system without evaluation rules
+    with trusted_construction():
+        system = dataclasses.replace(_system(), evaluation_rules=[])
+        reduced = reduce_to_cone_of_influence(system)
+
+    assert list(reduced.evaluation_rules) == []
+
+
+def test_nothing_to_remove() -> None:
+    system = _system()
+    reduced = reduce_to_cone_of_influence(system)
+
+    assert reduce_to_cone_of_influence(reduced) is reduced
@@ -0,0 +1,52 @@
+"""Tests for the mcmas.interning module."""
+
+from bitml2mcmas.mcmas.ast import Effect, EvolutionRule
+from bitml2mcmas.mcmas.boolcond import EnvironmentIdAtom, EqualTo, IdAtom, IntAtom, TrueBoolValue
+from bitml2mcmas.mcmas.formula import AtomicFormula, DiamondEventuallyFormula
+from bitml2mcmas.mcmas.interning import NodeInterner
+
+
+def _condition() -> EqualTo:
+    return EqualTo(EnvironmentIdAtom("status"), IdAtom("executed"))
+
+
+def test_equal_nodes_are_identical() -> None:
+    interner = NodeInterner()
+    first = interner.intern(_condition() & _condition())
+    second = interner.intern(_condition())
+
+    assert first == _condition() & _condition()
+    assert first.operands[0] is first.operands[1]
+    assert first.operands[0] is second
+    # the second condition of the conjunction, and the whole third one, are made of 3 nodes each
+    assert interner.hits == 6
+    assert len(interner) == 4
+
+
+def test_different_nodes_are_not_merged() -> None:
+    interner = NodeInterner()
+    conditions = interner.intern([EqualTo(IdAtom("x"), IntAtom(1)), EqualTo(IdAtom("x"), IntAtom(2))])
+    assert conditions[0] is not conditions[1]
+    assert conditions[0].left is conditions[1].left
+
+
+def test_containers_are_rebuilt() -> None:
+    interner = NodeInterner()
+    rules = (
+        EvolutionRule([Effect("x", TrueBoolValue())], _condition()),
+        EvolutionRule([Effect("y", TrueBoolValue())], _condition()),
+    )
+    new_rules = interner.intern(rules)
+
+    assert new_rules == rules
+    assert new_rules[0].condition is new_rules[1].condition
+    assert new_rules[0].effects[0].value is new_rules[1].effects[0].value
+    assert rules[0].condition is not rules[1].condition
+
+
+def test_formulae() -> None:
+    interner = NodeInterner()
+    formula = interner.intern(
+        DiamondEventuallyFormula("g", AtomicFormula("p")) & DiamondEventuallyFormula("g", AtomicFormula("p"))
+    )
+    assert formula.left is formula.right
@@ -0,0 +1,166 @@
+"""Tests for the mcmas.simplification module."""
+
+from bitml2mcmas.mcmas.ast import (
+    Agent,
+    BooleanVarType,
+    EnumVarType,
+    Environment,
+    EvaluationRule,
+    Effect,
+    EvolutionRule,
+    Group,
+    InterpretedSystem,
+    Protocol,
+    ProtocolRule,
+    Semantics,
+    VarDefinition,
+)
+from bitml2mcmas.mcmas.boolcond import (
+    ActionEqualToConstraint,
+    AgentActionEqualToConstraint,
+    AndBooleanCondition,
+    EnvironmentIdAtom,
+    EqualTo,
+    FalseBoolValue,
+    GreaterThanOrEqual,
+    IdAtom,
+    IntAtom,
+    LessThan,
+    NotEqualTo,
+    OrBooleanCondition,
+    TrueBoolValue,
+)
+from bitml2mcmas.mcmas.formula import AtomicFormula
+from bitml2mcmas.mcmas.simplification import simplify_boolean_condition, simplify_interpreted_system
+
+_A = EqualTo(IdAtom("a"), IntAtom(1))
+_B = EqualTo(IdAtom("b"), IntAtom(1))
+_C = EqualTo(IdAtom("c"), IntAtom(1))
+
+
+def test_constant_comparisons() -> None:
+    assert simplify_boolean_condition(EqualTo(IntAtom(1), IntAtom(1))) is True
+    assert simplify_boolean_condition(LessThan(IntAtom(2), IntAtom(1))) is False
+    assert simplify_boolean_condition(EqualTo(TrueBoolValue(), FalseBoolValue())) is False
+    assert simplify_boolean_condition(GreaterThanOrEqual(IdAtom("x"), IdAtom("x"))) is True
+    assert simplify_boolean_condition(_A) is _A
+
+
+def test_constants_are_folded() -> None:
+    always_true = EqualTo(IntAtom(0), IntAtom(0))
+    always_false = EqualTo(IntAtom(0), IntAtom(1))
+    assert simplify_boolean_condition(_A & always_true) == _A
+    assert simplify_boolean_condition(_A & always_false) is False
+    assert simplify_boolean_condition(_A | always_true) is True
+    assert simplify_boolean_condition(_A | always_false) == _A
+    assert simplify_boolean_condition(~always_false) is True
+
+
+def test_negations() -> None:
+    assert simplify_boolean_condition(~~_A) == _A
+    assert simplify_boolean_condition(~_A) == NotEqualTo(IdAtom("a"), IntAtom(1))
+    assert simplify_boolean_condition(~LessThan(IdAtom("a"), IntAtom(1))) == GreaterThanOrEqual(IdAtom("a"), IntAtom(1))
+
+
+def test_duplicates_are_removed() -> None:
+    assert simplify_boolean_condition(AndBooleanCondition((_A, _B, _A, _B))) == _A & _B
+    assert simplify_boolean_condition(OrBooleanCondition((_A, _A))) == _A
+
+
+def test_complementary_operands() -> None:
+    action = ActionEqualToConstraint("delay")
+    assert simplify_boolean_condition(_B & action & ~action) is False
+    assert simplify_boolean_condition(_B | action | ~action) is True
+    comparison = LessThan(IdAtom("t"), IdAtom("u"))
+    assert simplify_boolean_condition(comparison & GreaterThanOrEqual(IdAtom("t"), IdAtom("u"))) is False
+
+
+def test_subsumed_operands() -> None:
+    assert simplify_boolean_condition(_A & (_A | _B)) == _A
+    assert simplify_boolean_condition(_A | (_A & _B)) == _A
+    assert simplify_boolean_condition((_A & _B) | (_C & _B & _A) | _C) == (_A & _B) | _C
+    assert simplify_boolean_condition((_A | _B) & (_B | _A)) == _A | _B
+
+
+def test_equalities_on_the_same_variable() -> None:
+    # without the domain of the variable, only the equalities with literals are merged
+    assert simplify_boolean_condition(_A & EqualTo(IdAtom("a"), IntAtom(2))) is False
+    assert simplify_boolean_condition(_A & NotEqualTo(IdAtom("a"), IntAtom(2))) == _A
+    assert simplify_boolean_condition(NotEqualTo(IdAtom("a"), IntAtom(1)) | NotEqualTo(IntAtom(2), IdAtom("a"))) is True
+    assert simplify_boolean_condition(~_A & ~EqualTo(IdAtom("a"), IntAtom(2))) == AndBooleanCondition(
+        (NotEqualTo(IdAtom("a"), IntAtom(1)), NotEqualTo(IdAtom("a"), IntAtom(2)))
+    )
+    # the actions of different agents are different variables
+    first = AgentActionEqualToConstraint("Agent_A", "nop")
+    second = AgentActionEqualToConstraint("Agent_B", "exec")
+    assert simplify_boolean_condition(first & second) == first & second
+    assert simplify_boolean_condition(first & AgentActionEqualToConstraint("Agent_A", "exec")) is False
+
+
+def _system(evolution_condition, protocol_conditions, initial_condition) -> InterpretedSystem:
+    environment = Environment(
+        obs_var_definitions=[VarDefinition("status", EnumVarType({"disabled", "enabled", "executed"}))],
+        env_var_definitions=[VarDefinition("done", BooleanVarType())],
+        env_red_definitions=None,
+        env_action_definitions={"delay", "nop"},
+        env_protocol_definition=Protocol(
+            [ProtocolRule(condition, {"nop"}) for condition in protocol_conditions], {"delay"}
+        ),
+        env_evolution_definition=[EvolutionRule([Effect("done", TrueBoolValue())], evolution_condition)],
+    )
+    agent = Agent(
+        "Agent_A",
+        None,
+        [VarDefinition("dummy", BooleanVarType())],
+        None,
+        {"nop"},
+        Protocol(None, {"nop"}),
+        [],
+    )
+    return InterpretedSystem(
+        Semantics.SINGLE_ASSIGNMENT,
+        environment,
+        [agent],
+        [EvaluationRule("p", EqualTo(EnvironmentIdAtom("done"), TrueBoolValue()))],
+        initial_condition,
+        [Group("g", {"Agent_A"})],
+        [],
+        [AtomicFormula("p")],
+    )
+
+
+def test_interpreted_system() -> None:
+    status = IdAtom("status")
+    evolution_condition = (EqualTo(status, IdAtom("enabled")) | EqualTo(status, IdAtom("executed"))) & (
+        ActionEqualToConstraint("delay") | ActionEqualToConstraint("nop")
+    )
+    always_false = EqualTo(IdAtom("done"), TrueBoolValue()) & EqualTo(IdAtom("done"), FalseBoolValue())
+    protocol_condition = NotEqualTo(IdAtom("done"), TrueBoolValue())
+    initial_condition = ~EqualTo(EnvironmentIdAtom("status"), IdAtom("executed")) & ~EqualTo(
+        EnvironmentIdAtom("status"), IdAtom("enabled")
+    )
+    system = _system(evolution_condition, [always_false, protocol_condition], initial_condition)
+
+    simplified = simplify_interpreted_system(system)
+
+    environment = simplified.environment
+    # all the actions are allowed: the condition on the actions is dropped; 'status' is not 'disabled'
+    assert environment.env_evolution_definition[0].condition == NotEqualTo(status, IdAtom("disabled"))
+    # the rule that is never enabled is removed
+    assert list(environment.env_protocol_definition.rules) == [ProtocolRule(protocol_condition, {"nop"})]
+    # the initial states condition admits only equalities
+    assert simplified.initial_states_boolean_condition == EqualTo(EnvironmentIdAtom("status"), IdAtom("disabled"))
+    assert simplified.evaluation_rules == system.evaluation_rules
+    assert simplified.agents == system.agents
+
+
+def test_constant_conditions_are_kept() -> None:
+    always_true = EqualTo(IdAtom("done"), TrueBoolValue()) | EqualTo(IdAtom("done"), FalseBoolValue())
+    initial_condition = EqualTo(EnvironmentIdAtom("done"), FalseBoolValue())
+    system = _system(always_true, [always_true], initial_condition)
+
+    simplified = simplify_interpreted_system(system)
+
+    assert simplified.environment.env_evolution_definition[0].condition is always_true
+    assert simplified.environment.env_protocol_definition.rules[0].condition is always_true
+    assert simplified.initial_states_boolean_condition is initial_condition
@@ -0,0 +1,253 @@
+"""Tests for the mcmas.to_string module."""
+
+import io
+import tracemalloc
+from pathlib import Path
+from typing import Any
+
+from bitml2mcmas.mcmas.ast import (
+    Agent,
+    BooleanVarType,
+    Effect,
+    EnumVarType,
+    Environment,
+    EvaluationRule,
+    EvolutionRule,
+    Group,
+    IntegerRangeVarType,
+    InterpretedSystem,
+    Protocol,
+    ProtocolRule,
+    Semantics,
+    VarDefinition,
+)
+from bitml2mcmas.mcmas.boolcond import (
+    ActionEqualToConstraint,
+    AddExpr,
+    AgentActionEqualToConstraint,
+    AndBooleanCondition,
+    AttributeIdAtom,
+    BitNot,
+    EnvironmentIdAtom,
+    EqualTo,
+    FalseBoolValue,
+    GreaterThanOrEqual,
+    IdAtom,
+    IntAtom,
+    OrBooleanCondition,
+    SubtractExpr,
+    TrueBoolValue,
+)
+from bitml2mcmas.mcmas.formula import (
+    AGFormula,
+    AndFormula,
+    AtomicFormula,
+    DiamondEventuallyFormula,
+    ImpliesFormula,
+    NotFormula,
+    OrFormula,
+)
+from bitml2mcmas.mcmas.to_string import (
+    SerializationMemo,
+    boolcond_to_string,
+    formula_to_string,
+    interpreted_system_to_stream,
+    interpreted_system_to_string,
+)
+
+# the ISPL code of the system built by _system, as written by interpreted_system_to_string before the streaming writer
+_EXPECTED_ISPL = """\
+Semantics=SingleAssignment;
+Agent Environment
+  Obsvars:
+    status: {disabled, enabled};
+  end Obsvars
+  Vars:
+    counter: 0..3;
+  end Vars
+
+  Actions = {nop, tick};
+  Protocol:
+    (counter = 3): {nop};
+    Other: {nop, tick};
+  end Protocol
+  Evolution:
+    counter = (counter + 1) if ((Action = tick) and (Agent_A.Action = push));
+    status = enabled if (counter >= 2);
+  end Evolution
+end Agent
+
+Agent Agent_A
+  Lobsvars = {counter};
+  Vars:
+    pushed: boolean;
+  end Vars
+
+  Actions = {nop, push};
+  Protocol:
+    (pushed = false): {nop, push};
+    Other: {nop};
+  end Protocol
+  Evolution:
+    pushed = true if (Action = push);
+  end Evolution
+end Agent
+Evaluation
+  enabled if (Environment.status = enabled);
+  pushed if (Agent_A.pushed = true);
+end Evaluation
+InitStates
+  ((Environment.counter = 0) and (!(Agent_A.pushed = true)));
+end InitStates
+Groups
+  g = {Agent_A};
+end Groups
+Fairness
+  pushed;
+end Fairness
+Formulae
+  (<g>F(enabled));
+  (AG ((enabled) -> (pushed)));
+end Formulae"""
+
+
+def _atom(value: int) -> EqualTo:
+    return EqualTo(IdAtom("x"), IntAtom(value))
+
+
+def test_and_or_conditions() -> None:
+    conjunction = AndBooleanCondition((_atom(0), _atom(1), _atom(2)))
+    assert boolcond_to_string(conjunction) == "((x = 0) and (x = 1) and (x = 2))"
+
+    mixed = OrBooleanCondition((AndBooleanCondition((_atom(0), _atom(1))), _atom(2), _atom(3)))
+    assert boolcond_to_string(mixed) == "(((x = 0) and (x = 1)) or (x = 2) or (x = 3))"
+
+
+def test_expressions() -> None:
+    expression = SubtractExpr(BitNot(IdAtom("x")), IntAtom(1))
+    assert boolcond_to_string(EqualTo(expression, IntAtom(0))) == "(((~x) - 1) = 0)"
+
+
+def test_deep_condition() -> None:
+    condition = _atom(0)
+    for i in range(1, 50_000):
+        condition = ~condition & _atom(i % 10)
+    result = boolcond_to_string(condition)
+    assert result.startswith("((!((!(")
+    assert result.count(" and ") == 49_999
+
+
+def test_formulae() -> None:
+    formula = AndFormula(AndFormula(AtomicFormula("p"), AtomicFormula("q")), NotFormula(AtomicFormula("r")))
+    assert formula_to_string(formula) == "(p and q and (!r))"
+    assert formula_to_string(OrFormula(formula, AtomicFormula("s"))) == "((p and q and (!r)) or s)"
+    assert formula_to_string(ImpliesFormula(AtomicFormula("p"), AtomicFormula("q"))) == "(p) -> (q)"
+
+    deep_formula = AtomicFormula("p")
+    for _ in range(50_000):
+        deep_formula = NotFormula(deep_formula)
+    assert formula_to_string(deep_formula) == "(!" * 50_000 + "p" + ")" * 50_000
+
+
+def test_memo_shared_subterms() -> None:
+    shared = AndBooleanCondition((_atom(0), _atom(1)))
+    memo = SerializationMemo()
+    first = boolcond_to_string(~shared, memo)
+    second = boolcond_to_string(OrBooleanCondition((shared, _atom(2))), memo)
+
+    assert first == "(!((x = 0) and (x = 1)))"
+    assert second == "(((x = 0) and (x = 1)) or (x = 2))"
+    # only the shared conjunction is cached, on its second serialization, and not its operands
+    assert memo.hits == 0
+    assert memo.misses == 4 + 5
+    assert len(memo) == 1
+
+    assert boolcond_to_string(~shared, memo) == first
+    assert memo.hits == 1
+    assert memo.misses == 9 + 1
+    assert memo.hit_rate == 1 / 11
+
+    # equal, but not identical, subterms are not shared
+    boolcond_to_string(AndBooleanCondition((_atom(0), _atom(1))), memo)
+    assert memo.hits == 1
+
+
+def test_memo_deep_tree() -> None:
+    expression: Any = IdAtom("x")
+    for _ in range(20_000):
+        expression = AddExpr(IntAtom(1), expression)
+    condition = EqualTo(expression, IntAtom(0))
+    memo = SerializationMemo()
+
+    tracemalloc.start()
+    try:
+        results = {boolcond_to_string(condition, memo) for _ in range(3)}
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert len(results) == 1
+    # the text of the tree is stored once, not once per level: caching every level takes more than a gigabyte
+    assert peak < 20 * 1024 * 1024
+    assert memo.hits == 1
+    assert len(memo) == 1
+
+
+def _system() -> InterpretedSystem:
+    counter = IdAtom("counter")
+    environment = Environment(
+        obs_var_definitions=[VarDefinition("status", EnumVarType({"enabled", "disabled"}))],
+        env_var_definitions=[VarDefinition("counter", IntegerRangeVarType(0, 3))],
+        env_red_definitions=None,
+        env_action_definitions={"tick", "nop"},
+        env_protocol_definition=Protocol([ProtocolRule(EqualTo(counter, IntAtom(3)), {"nop"})], {"tick", "nop"}),
+        env_evolution_definition=[
+            EvolutionRule(
+                [Effect("counter", AddExpr(counter, IntAtom(1)))],
+                ActionEqualToConstraint("tick") & AgentActionEqualToConstraint("Agent_A", "push"),
+            ),
+            EvolutionRule([Effect("status", IdAtom("enabled"))], GreaterThanOrEqual(counter, IntAtom(2))),
+        ],
+    )
+    agent = Agent(
+        "Agent_A",
+        ["counter"],
+        [VarDefinition("pushed", BooleanVarType())],
+        None,
+        {"push", "nop"},
+        Protocol([ProtocolRule(EqualTo(IdAtom("pushed"), FalseBoolValue()), {"push", "nop"})], {"nop"}),
+        [EvolutionRule([Effect("pushed", TrueBoolValue())], ActionEqualToConstraint("push"))],
+    )
+    initial_condition = EqualTo(EnvironmentIdAtom("counter"), IntAtom(0)) & ~EqualTo(
+        AttributeIdAtom("Agent_A", "pushed"), TrueBoolValue()
+    )
+    return InterpretedSystem(
+        Semantics.SINGLE_ASSIGNMENT,
+        environment,
+        [agent],
+        [
+            EvaluationRule("enabled", EqualTo(EnvironmentIdAtom("status"), IdAtom("enabled"))),
+            EvaluationRule("pushed", EqualTo(AttributeIdAtom("Agent_A", "pushed"), TrueBoolValue())),
+        ],
+        initial_condition,
+        [Group("g", {"Agent_A"})],
+        [AtomicFormula("pushed")],
+        [
+            DiamondEventuallyFormula("g", AtomicFormula("enabled")),
+            AGFormula(ImpliesFormula(AtomicFormula("enabled"), AtomicFormula("pushed"))),
+        ],
+    )
+
+
+def test_interpreted_system(tmp_path: Path) -> None:
+    system = _system()
+    assert interpreted_system_to_string(system) == _EXPECTED_ISPL
+    assert interpreted_system_to_string(system, SerializationMemo()) == _EXPECTED_ISPL
+
+    stream = io.StringIO()
+    interpreted_system_to_stream(system, stream)
+    assert stream.getvalue() == _EXPECTED_ISPL
+
+    output_file = tmp_path / "system.ispl"
+    with output_file.open("w") as fileobj:
+        interpreted_system_to_stream(system, fileobj)
+    assert output_file.read_text() == _EXPECTED_ISPL
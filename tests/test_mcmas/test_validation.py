@@ -0,0 +1,31 @@
+"""Tests for the mcmas.validation package."""
+
+from bitml2mcmas.mcmas.boolcond import (
+    AndBooleanCondition,
+    AttributeIdAtom,
+    EqualTo,
+    IdAtom,
+    IntAtom,
+    OrBooleanCondition,
+)
+from bitml2mcmas.mcmas.validation.is_agent_evolution_condition import is_agent_evolution_condition
+from bitml2mcmas.mcmas.validation.is_evaluation_condition import is_evaluation_protocol_condition
+
+
+def test_shared_subterms_checked_once() -> None:
+    # a DAG of depth 100, whose tree unfolding has 2^100 leaves; conjunctions and disjunctions alternate, so they are
+    # not flattened
+    condition = EqualTo(IdAtom("x"), IntAtom(0))
+    for i in range(100):
+        connective = AndBooleanCondition if i % 2 == 0 else OrBooleanCondition
+        condition = connective((condition, condition))
+    assert is_agent_evolution_condition(condition)
+
+
+def test_results_are_per_validator() -> None:
+    condition = EqualTo(AttributeIdAtom("Alice", "x"), IntAtom(0))
+    assert not is_agent_evolution_condition(condition)
+    assert is_evaluation_protocol_condition(condition)
+    # cached results
+    assert not is_agent_evolution_condition(condition)
+    assert is_evaluation_protocol_condition(condition)